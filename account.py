@@ -6,7 +6,7 @@ from algosdk.future import transaction
 from algosdk.v2client import algod
 
 from constants import Constants
-from helpers import algo_helper
+from models.AccountRegistry import AccountRegistry
 from models.ApplicationManager import ApplicationManager
 from utilities import utils
 
@@ -33,8 +33,8 @@ def delete_user_apps(mnemonic):
     algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
     algod_client = algod.AlgodClient(algod_token, algod_address)
 
-    private_key = algo_helper.get_private_key_from_mnemonic(mnemonic)
-    address = algo_helper.get_address_from_private_key(private_key)
+    user = AccountRegistry.shared().from_mnemonic(mnemonic)
+    private_key, address = user.private_key, user.address
     account_info = algod_client.account_info(address)
     for app in account_info['created-apps']:
         txn = ApplicationManager.delete_app(algod_client=algod_client,
@@ -54,8 +54,8 @@ def clear_user_apps(mnemonic):
     algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
     algod_client = algod.AlgodClient(algod_token, algod_address)
 
-    private_key = algo_helper.get_private_key_from_mnemonic(mnemonic)
-    address = algo_helper.get_address_from_private_key(private_key)
+    user = AccountRegistry.shared().from_mnemonic(mnemonic)
+    private_key, address = user.private_key, user.address
     account_info = algod_client.account_info(address)
     for app in account_info['apps-local-state']:
         txn = ApplicationManager.clear_app(algod_client=algod_client,
@@ -133,8 +133,8 @@ if __name__ == '__main__':
         generate_algorand_keypair()
     elif x == 2:
         mnemonic = Constants.creator_mnemonic
-        private_key = algo_helper.get_private_key_from_mnemonic(mnemonic)
-        address = algo_helper.get_address_from_private_key(private_key)
+        user = AccountRegistry.shared().from_mnemonic(mnemonic)
+        private_key, address = user.private_key, user.address
         test_transaction(private_key, address)
     elif x == 3:
         print('Insert the user mnemonic')
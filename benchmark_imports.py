@@ -0,0 +1,73 @@
+# import-time benchmark of the modules used by the read-only and signing paths
+# each module is imported in a fresh interpreter, the script fails if a module pulls in a heavy dependency
+# that it should not need or if its import time exceeds the budget
+
+import argparse
+import json
+import subprocess
+import sys
+
+# module -> heavy modules it must not import
+guarded_modules = {
+    "constants": ["pyteal", "numpy", "algosdk"],
+    "helpers.algo_helper": ["pyteal", "numpy"],
+    "models.TripState": ["pyteal", "numpy"],
+    "models.ApplicationManager": ["pyteal", "numpy"],
+    "models.Trip": ["pyteal", "numpy"],
+    "models.AsyncTrip": ["pyteal", "numpy"],
+    "models.TripFollower": ["pyteal", "numpy"],
+    "main": ["pyteal", "numpy"],
+}
+
+probe = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str, repeat: int):
+    """
+    Import a module in fresh interpreters
+    :param module:
+    :param repeat:
+    :return: best import time in seconds, modules loaded by the import
+    """
+    best = None
+    modules = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", probe.format(module=module)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best:
+            best = result["seconds"]
+        modules = result["modules"]
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the runtime modules")
+    parser.add_argument("--repeat", type=int, default=3, help="imports per module, the best time is kept")
+    parser.add_argument("--budget", type=float, default=None, help="max import time in seconds per module")
+    args = parser.parse_args()
+
+    failures = []
+    for module, forbidden in guarded_modules.items():
+        seconds, modules = measure(module, args.repeat)
+        loaded = [name for name in forbidden if name in modules]
+        print("{:<32} {:>8.1f} ms  {}".format(module, seconds * 1000,
+                                              "imports " + ", ".join(loaded) if loaded else "ok"))
+        if loaded:
+            failures.append("{} imports {}".format(module, ", ".join(loaded)))
+        if args.budget is not None and seconds > args.budget:
+            failures.append("{} import takes {:.1f} ms".format(module, seconds * 1000))
+
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# benchmark of the trip lifecycle against the local mock algod and indexer
+# every operation is measured in wall time, client CPU time, HTTP requests and bytes exchanged with the node,
+# the JSON report can be saved and compared with a previous one to spot regressions in the node traffic
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from algosdk import account, mnemonic
+from algosdk.v2client import algod
+
+from models.IndexerManager import IndexerHelper
+from models.Trip import Trip
+from models.TripCatalog import TripCatalog
+from utilities.mock_algod import MockAlgodServer, MockIndexerServer
+
+operations = ["create_app", "initialize_escrow", "fund_escrow", "participate", "start_trip", "close_trip",
+              "catalog_sync"]
+
+# metrics compared by --compare, they do not depend on the machine load
+traffic_metrics = ["http_calls", "bytes_sent", "bytes_received"]
+
+
+def generate_users(count: int, prefix: str):
+    """
+    Generate new accounts, the mock funds any account on first use
+    :param count:
+    :param prefix:
+    :return: list of {'name', 'mnemonic'}
+    """
+    users = []
+    for i in range(count):
+        private_key, _ = account.generate_account()
+        users.append({'name': "{}{}".format(prefix, i), 'mnemonic': mnemonic.from_private_key(private_key)})
+    return users
+
+
+class Probe:
+    """
+    Measure an operation: wall time, CPU time of the client and requests to the mock servers
+    """
+
+    def __init__(self, servers: dict):
+        self.servers = servers
+
+    def snapshot(self):
+        return time.perf_counter(), time.process_time(), {name: server.stats.snapshot()
+                                                          for name, server in self.servers.items()}
+
+    def measure(self, operation, *args):
+        """
+        :param operation:
+        :param args:
+        :return: result of the operation, metrics
+        """
+        wall_start, cpu_start, stats_start = self.snapshot()
+        result = operation(*args)
+        wall_end, cpu_end, stats_end = self.snapshot()
+
+        metrics = {"wall_seconds": wall_end - wall_start, "http_calls": 0, "bytes_sent": 0, "bytes_received": 0,
+                   "server_cpu_seconds": 0.0, "routes": {}}
+        for name in self.servers:
+            start, end = stats_start[name], stats_end[name]
+            metrics["http_calls"] += end["requests"] - start["requests"]
+            # from the client point of view
+            metrics["bytes_sent"] += end["bytes_received"] - start["bytes_received"]
+            metrics["bytes_received"] += end["bytes_sent"] - start["bytes_sent"]
+            metrics["server_cpu_seconds"] += end["cpu_seconds"] - start["cpu_seconds"]
+            for route, count in end["routes"].items():
+                count -= start["routes"].get(route, 0)
+                if count:
+                    metrics["routes"]["{}.{}".format(name, route)] = count
+        # the mock servers run in this process, their CPU time is not charged to the client
+        metrics["cpu_seconds"] = max(cpu_end - cpu_start - metrics["server_cpu_seconds"], 0.0)
+        return result, metrics
+
+
+def run_lifecycle(algod_server: MockAlgodServer, client: algod.AlgodClient, catalog: TripCatalog, probe: Probe,
+                  participants: int):
+    """
+    Run a whole trip lifecycle
+    :return: dict of operation -> metrics
+    """
+    creator = generate_users(1, "Creator")[0]
+    users = generate_users(participants, "User")
+    creator_private_key = mnemonic.to_private_key(creator['mnemonic'])
+    users_private_keys = [mnemonic.to_private_key(user['mnemonic']) for user in users]
+
+    start_date = (datetime.now() + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+    trip = Trip(client)
+    results = {}
+
+    def check(operation, result):
+        # the trip operations return False on failure
+        if result is False:
+            raise RuntimeError("{} failed".format(operation))
+
+    def participate_all():
+        return all([trip.participate(private_key, user['name'])
+                    for private_key, user in zip(users_private_keys, users)])
+
+    steps = [
+        ("create_app", lambda: trip.create_app(creator_private_key, creator['name'], "Benchmark departure",
+                                               "Benchmark arrival", start_date, end_date, 5000, participants)),
+        ("initialize_escrow", lambda: trip.initialize_escrow(creator_private_key)),
+        ("fund_escrow", lambda: trip.fund_escrow(creator_private_key)),
+        ("participate", participate_all),
+    ]
+    for operation, step in steps:
+        result, results[operation] = probe.measure(step)
+        check(operation, result)
+
+    # skip to the departure round without going through the node
+    ledger = algod_server.ledger
+    while ledger.round < ledger.apps[trip.app_id]['global']['departure_date_round']:
+        ledger.next_round()
+
+    result, results["start_trip"] = probe.measure(trip.start_trip, creator_private_key)
+    check("start_trip", result)
+    result, results["close_trip"] = probe.measure(trip.close_trip, creator_private_key, users)
+    check("close_trip", result)
+    _, results["catalog_sync"] = probe.measure(catalog.sync)
+    return results
+
+
+def summarize(iterations: [dict]):
+    """
+    Aggregate the metrics of the iterations, median and min of the times, median of the counters
+    :param iterations:
+    :return: dict of operation -> metrics
+    """
+    summary = {}
+    for operation in operations:
+        samples = [iteration[operation] for iteration in iterations]
+        summary[operation] = {
+            "wall_seconds": {"median": statistics.median(s["wall_seconds"] for s in samples),
+                             "min": min(s["wall_seconds"] for s in samples)},
+            "cpu_seconds": {"median": statistics.median(s["cpu_seconds"] for s in samples),
+                            "min": min(s["cpu_seconds"] for s in samples)},
+            "server_cpu_seconds": statistics.median(s["server_cpu_seconds"] for s in samples),
+        }
+        for metric in traffic_metrics:
+            summary[operation][metric] = statistics.median(s[metric] for s in samples)
+    return summary
+
+
+def compare(summary: dict, baseline: dict):
+    """
+    Compare the traffic metrics with a previous report
+    :param summary:
+    :param baseline: summary of the previous report
+    :return: list of the regressions
+    """
+    regressions = []
+    print("\n{:<20} {:<16} {:>12} {:>12}".format("operation", "metric", "baseline", "current"))
+    for operation in operations:
+        if operation not in baseline:
+            continue
+        for metric in traffic_metrics + ["wall_seconds"]:
+            current = summary[operation][metric]
+            previous = baseline[operation][metric]
+            if isinstance(current, dict):
+                current, previous = current["median"], previous["median"]
+            print("{:<20} {:<16} {:>12.4g} {:>12.4g}".format(operation, metric, previous, current))
+            if metric in traffic_metrics and current > previous:
+                regressions.append("{} {}: {} -> {}".format(operation, metric, previous, current))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trip lifecycle against a local mock algod")
+    parser.add_argument("--iterations", type=int, default=3, help="lifecycles to run, the first one is a warmup")
+    parser.add_argument("--participants", type=int, default=2, help="participants per trip")
+    parser.add_argument("--round-time", type=float, default=0.0,
+                        help="seconds between rounds, 0 produces a round for each submission")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report to compare the node traffic with")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with an error if an operation makes more requests or transfers more bytes")
+    args = parser.parse_args()
+
+    algod_server = MockAlgodServer(round_time=args.round_time, latency=args.latency).start()
+    indexer_server = MockIndexerServer(algod_server.ledger, latency=args.latency).start()
+    client = algod.AlgodClient(algod_server.token, algod_server.address)
+    probe = Probe({"algod": algod_server, "indexer": indexer_server})
+    catalog_dir = tempfile.mkdtemp()
+    catalog = TripCatalog(IndexerHelper(host=indexer_server.address, token=indexer_server.token),
+                          path=os.path.join(catalog_dir, "catalog.sqlite"))
+
+    try:
+        # warmup: fills the per-client caches and the compiled programs
+        run_lifecycle(algod_server, client, catalog, probe, args.participants)
+        iterations = [run_lifecycle(algod_server, client, catalog, probe, args.participants)
+                      for _ in range(max(args.iterations - 1, 1))]
+    finally:
+        catalog.close()
+        indexer_server.stop()
+        algod_server.stop()
+
+    summary = summarize(iterations)
+    report = {
+        "config": {"iterations": len(iterations), "participants": args.participants,
+                   "round_time": args.round_time, "latency": args.latency, "python": sys.version.split()[0]},
+        "summary": summary,
+        "iterations": iterations,
+    }
+
+    print("\n{:<20} {:>10} {:>10} {:>8} {:>10} {:>10}".format("operation", "wall ms", "cpu ms", "calls",
+                                                               "sent", "received"))
+    for operation in operations:
+        metrics = summary[operation]
+        print("{:<20} {:>10.1f} {:>10.1f} {:>8g} {:>10g} {:>10g}".format(
+            operation, metrics["wall_seconds"]["median"] * 1000, metrics["cpu_seconds"]["median"] * 1000,
+            metrics["http_calls"], metrics["bytes_sent"], metrics["bytes_received"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ("participants", "round_time", "latency"):
+            if baseline["config"].get(key) != report["config"][key]:
+                print("The baseline was run with {} {}, the results are not comparable".format(
+                    key, baseline["config"].get(key)))
+        regressions = compare(summary, baseline["summary"])
+        if regressions:
+            print("\n".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,11 @@ from pyteal import compileTeal, Mode
 
 from constants import Constants
 from helpers import algo_helper
+from models.ContractArtifacts import ContractArtifacts
 from models.Trip import Trip
-from smart_contracts.contract_carsharing import CarSharingContract
+from smart_contracts import carsharing_interface
 from smart_contracts.contract_escrow import contract_escrow
+from utilities import utils
 
 
 def main():
@@ -15,38 +17,33 @@ def main():
     app = Trip(algod_client=algod_client)
 
     # compile program to TEAL assembly
-    approval_program_compiled = compileTeal(
-        app.app_contract.approval_program(),
-        mode=Mode.Application,
-        version=app.teal_version_stateful,
-    )
-
-    clear_program_compiled = compileTeal(
-        app.app_contract.clear_program(),
-        mode=Mode.Application,
-        version=app.teal_version_stateful
-    )
+    approval_program_compiled, clear_program_compiled = app.get_contract_sources()
 
     escrow_fund_program_compiled = compileTeal(
         contract_escrow(app_id=1),
         mode=Mode.Signature,
         version=app.teal_version_stateless,
     )
+    # the escrow is built from a template by the signing paths, check that it matches the pyteal contract
+    if escrow_fund_program_compiled != carsharing_interface.escrow_source(1, app.teal_version_stateless):
+        raise Exception("carsharing_interface.escrow_source does not match the escrow contract")
 
-    if not os.path.isdir("compiled"):
-        os.mkdir("compiled")
+    # compile program to binary and write the artifacts loaded by Trip at deploy time
+    manifest = ContractArtifacts.write(Constants.compiled_dir, app.teal_version_stateful, {
+        "approval": (approval_program_compiled, algo_helper.compile_program(algod_client, approval_program_compiled)),
+        "clear_state": (clear_program_compiled, algo_helper.compile_program(algod_client, clear_program_compiled)),
+    })
 
-    # compile program to binary
-    with open("compiled/carsharing_approval.teal", "w") as f:
-        f.write(approval_program_compiled)
-
-    with open("compiled/carsharing_clear_state.teal", "w") as f:
-        f.write(clear_program_compiled)
-
-    # compile program to binary
-    with open("compiled/carsharing_escrow.teal", "w") as f:
+    with open(os.path.join(Constants.compiled_dir, "carsharing_escrow.teal"), "w") as f:
         f.write(escrow_fund_program_compiled)
 
+    for name, expected in (("approval", app.approval_program_hash), ("clear_state", app.clear_state_program_hash)):
+        entry = manifest["programs"][name]
+        utils.console_log("{} program sha256: {}".format(name, entry["sha256"]), "green")
+        if expected is not None and entry["base64"] != expected:
+            utils.console_log("The {} program differs from the one in .env, update it before deploying"
+                              .format(name), "yellow")
+
 
 if __name__ == "__main__":
     main()
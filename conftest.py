@@ -0,0 +1 @@
+# pytest configuration, its presence puts the project root on sys.path for the tests
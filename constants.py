@@ -1,7 +1,11 @@
 import os
+from threading import RLock
 
 from dotenv import load_dotenv
 
+config_lock = RLock()
+env_loaded = False
+
 
 # constants file
 def read_test_users(filename):
@@ -22,21 +26,59 @@ def read_test_users(filename):
     return accounts
 
 
+def load_env(reload=False):
+    """
+    Load the .env file once, or again when reload is True (overriding the previously loaded values)
+    """
+    global env_loaded
+    with config_lock:
+        if not env_loaded or reload:
+            load_dotenv(override=reload)
+            env_loaded = True
+
+
 def get_env(key):
-    load_dotenv()
+    if not env_loaded:
+        load_env()
     return os.getenv(key)
 
 
+class lazy_config:
+    """
+    Class attribute computed on first access and memoized until Constants.reload()
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        values = owner.loaded_values
+        if self.name not in values:
+            with config_lock:
+                if self.name not in values:
+                    values[self.name] = self.loader(owner)
+        return values[self.name]
+
+
 class Constants:
-    # Generated accounts for testing on sandbox
+    # values of the lazy_config attributes loaded so far
+    loaded_values = {}
+    # callbacks run by reload(), for the caches built from the configuration
+    reload_hooks = []
+
+    # Generated accounts for testing on sandbox, read on first use
     # sandbox testnet accounts
-    testnet_accounts = read_test_users("assets/testnet_accounts.csv")
+    testnet_accounts = lazy_config(lambda cls: read_test_users("assets/testnet_accounts.csv"))
     # sandbox dev accounts
-    dev_accounts = read_test_users("assets/accounts.csv")
+    dev_accounts = lazy_config(lambda cls: read_test_users("assets/accounts.csv"))
 
     # set which accounts to use and creator account
-    accounts = dev_accounts
-    creator_mnemonic = accounts[0].get('mnemonic')
+    accounts = lazy_config(lambda cls: cls.dev_accounts)
+    creator_mnemonic = lazy_config(lambda cls: cls.accounts[0].get('mnemonic'))
 
     # Algorand parameters
     # user declared algod connection parameters. Node must have EnableDeveloperAPI set to true in its config
@@ -48,3 +90,48 @@ class Constants:
 
     # The average Algorand block production time is about 4.5 seconds per block
     block_speed = 4.5
+
+    # number of rounds to wait for a transaction confirmation before giving up
+    confirmation_max_rounds = 1000
+
+    # backend used to compile TEAL programs: "local" assembler (with algod fallback) or "algod"
+    compile_backend = "local"
+
+    # directory of the on-disk compiled programs cache
+    program_cache_dir = ".program_cache"
+
+    # directory of the contract artifacts built by compile_contract.py
+    compiled_dir = "compiled"
+
+    # sqlite database of the trips discovered on the indexer
+    trip_catalog_path = ".trip_catalog.sqlite"
+
+    # Prometheus text file with the metrics of the requests to the nodes, disabled if None
+    metrics_file = None
+
+    # level of the carsharing loggers and per-module overrides, e.g. {"models.ApplicationManager": "DEBUG"}
+    log_level = "INFO"
+    log_levels = {}
+    # "console" for colored messages, "json" for one JSON object per line
+    log_format = "console"
+
+    @classmethod
+    def reload(cls):
+        """
+        Forget the loaded configuration, accounts and .env are read again on next use
+        """
+        with config_lock:
+            cls.loaded_values.clear()
+            load_env(reload=True)
+            hooks = list(cls.reload_hooks)
+        for hook in hooks:
+            hook()
+
+    @classmethod
+    def on_reload(cls, hook):
+        """
+        Register a callback run on each reload()
+        :param hook: function without arguments
+        """
+        with config_lock:
+            cls.reload_hooks.append(hook)
@@ -1,11 +1,19 @@
 # helpers for algorand-related actions
 import base64
+import logging
 from datetime import datetime
 
+import msgpack
 from algosdk import mnemonic, account, encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction as future_transaction
 
 from constants import Constants
+from helpers import teal_assembler
 from utilities import utils
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
 
 
 def intToBytes(value):
@@ -36,9 +44,10 @@ def BytesToAddress(value: bytes):
     return encoding.encode_address(decoded_address)
 
 
-def compile_program(client, source_code):
+def compile_program_algod(client, source_code):
     """
-    helper function to compile program source
+    compile backend: compile program source with the algod /compile endpoint
+    the node must have EnableDeveloperAPI set to true in its config
     :param client:
     :param source_code:
     :return:
@@ -47,6 +56,55 @@ def compile_program(client, source_code):
     return base64.b64decode(compile_response['result'])
 
 
+def compile_program_local(client, source_code):
+    """
+    compile backend: assemble program source in-process, without contacting the node
+    :param client: unused
+    :param source_code:
+    :return:
+    """
+    return teal_assembler.assemble(source_code)
+
+
+# available compile backends, a backend is a function (client, source_code) -> program bytes
+compile_backends = {
+    "algod": compile_program_algod,
+    "local": compile_program_local,
+}
+
+
+def compile_program(client, source_code, cache=None, backend=None):
+    """
+    helper function to compile program source
+    if the local assembler does not support the source, the algod backend is used as fallback
+    :param client:
+    :param source_code:
+    :param cache: optional ProgramCache, compiled programs are looked up and stored there
+    :param backend: name of the compile backend, defaults to Constants.compile_backend
+    :return:
+    """
+    if cache is not None:
+        program = cache.get(source_code)
+        if program is not None:
+            return program
+
+    backend = backend if backend is not None else Constants.compile_backend
+    if backend not in compile_backends:
+        raise ValueError("Unknown compile backend: {}".format(backend))
+
+    try:
+        program = compile_backends[backend](client, source_code)
+    except teal_assembler.TealAssemblyError as e:
+        if client is None:
+            raise
+        logger.warning("Local assembler failed, compiling with algod: %s", e)
+        program = compile_program_algod(client, source_code)
+
+    if cache is not None:
+        cache.put(source_code, program)
+    return program
+
+
 def get_private_key_from_mnemonic(mn):
     """
     helper function that converts a mnemonic passphrase into a private signing key
@@ -117,8 +175,7 @@ def read_local_state(client, addr, app_id=None, show=True):
                 return None
             output = format_state(local_state["key-value"])
             if show:
-                utils.console_log("Local State:", 'blue')
-                print(output)
+                logger.info("Local State:\n%s", output, extra={'color': 'blue'})
             return output
     return None
 
@@ -143,41 +200,159 @@ def read_global_state(client, app_id, to_array=True, show=True):
         output = utils.toArray(output)
 
     if show:
-        utils.console_log("Global State:", 'blue')
-        print(output)
+        logger.info("Global State:\n%s", output, extra={'color': 'blue'})
     return output, creator, approval_program, clear_state_program
 
 
-def wait_for_confirmation(client, txid):
+def get_block(client, round_number):
+    """
+    helper function that reads a block in msgpack format
+    state delta keys and values are go strings holding raw bytes, invalid utf-8 is kept with surrogate escapes
+    :param client:
+    :param round_number:
+    :return: block header with its transactions, None if the block is not available
+    """
+    try:
+        block = msgpack.unpackb(client.block_info(round_number, response_format="msgpack"), raw=False,
+                                strict_map_key=False, unicode_errors="surrogateescape")
+    except Exception:
+        return None
+    return block["block"]
+
+
+def get_block_transactions(client, round_number):
+    """
+    helper function that reads the transactions confirmed in a block
+    :param client:
+    :param round_number:
+    :return: dict of txid -> confirmation info, None if the block is not available
+    """
+    header = get_block(client, round_number)
+    if header is None:
+        return None
+
+    confirmed = {}
+    for stxn in header.get("txns", []):
+        # genesis hash and id are stripped from the transactions stored in a block
+        txn = dict(stxn["txn"])
+        txn.setdefault("gh", header["gh"])
+        if stxn.get("hgi"):
+            txn["gen"] = header["gen"]
+        txid = future_transaction.Transaction.undictify(txn).get_txid()
+        txinfo = {"confirmed-round": round_number, "pool-error": ""}
+        if "apid" in stxn:
+            txinfo["application-index"] = stxn["apid"]
+        confirmed[txid] = txinfo
+    return confirmed
+
+
+def check_pending_transactions(client, txids):
+    """
+    helper function that checks the pool status of many transactions
+    :param client:
+    :param txids:
+    :return: dict of txid -> pending transaction info, or the exception raised for it
+    """
+    results = {}
+    for txid in txids:
+        try:
+            results[txid] = client.pending_transaction_info(txid)
+        except AlgodHTTPError as e:
+            results[txid] = e
+    return results
+
+
+def wait_for_confirmations(client, txids, max_rounds=Constants.confirmation_max_rounds, use_blocks=True):
+    """
+    helper function that waits for many txids to be confirmed by the network
+    every new round is inspected once for all the outstanding txids: the block contents are used when available,
+    otherwise each outstanding txid is checked in the transactions pool
+    :param client:
+    :param txids:
+    :param max_rounds: number of rounds to wait before giving up
+    :param use_blocks: look for the txids in the block contents
+    :return: dict of txid -> {txid, status: confirmed/rejected/timeout, confirmed-round, info, error}
+    """
+    results = {}
+
+    def resolve(txid, status, info=None, error=None):
+        results[txid] = {
+            "txid": txid,
+            "status": status,
+            "confirmed-round": info.get("confirmed-round") if info else None,
+            "info": info,
+            "error": error,
+        }
+
+    def check_pool(outstanding):
+        for txid, txinfo in check_pending_transactions(client, outstanding).items():
+            if isinstance(txinfo, Exception):
+                resolve(txid, "rejected", error=str(txinfo))
+            elif txinfo.get("confirmed-round", 0) > 0:
+                resolve(txid, "confirmed", info=txinfo)
+            elif txinfo.get("pool-error"):
+                resolve(txid, "rejected", info=txinfo, error=txinfo["pool-error"])
+
+    start_round = client.status().get("last-round")
+    last_round = start_round
+    # transactions could already be confirmed before the first round is inspected
+    check_pool(list(txids))
+
+    while len(results) < len(txids):
+        if last_round - start_round >= max_rounds:
+            break
+        new_round = client.status_after_block(last_round).get("last-round")
+        outstanding = [txid for txid in txids if txid not in results]
+
+        blocks_read = use_blocks
+        for round_number in range(last_round + 1, new_round + 1):
+            if not blocks_read:
+                break
+            confirmed = get_block_transactions(client, round_number)
+            if confirmed is None:
+                blocks_read = False
+                break
+            for txid in outstanding:
+                if txid in confirmed and txid not in results:
+                    resolve(txid, "confirmed", info=confirmed[txid])
+        if not blocks_read:
+            check_pool([txid for txid in outstanding if txid not in results])
+        last_round = new_round
+
+    if len(results) < len(txids):
+        # last check in the pool, then give up
+        check_pool([txid for txid in txids if txid not in results])
+        for txid in txids:
+            if txid not in results:
+                resolve(txid, "timeout", error="not confirmed after {} rounds".format(max_rounds))
+    return results
+
+
+def wait_for_confirmation(client, txid, max_rounds=Constants.confirmation_max_rounds):
     """
     helper function that waits for a given txid to be confirmed by the network
     :param client:
     :param txid:
+    :param max_rounds: number of rounds to wait before giving up
     :return:
     """
-    last_round = client.status().get("last-round")
-    txinfo = client.pending_transaction_info(txid)
-    while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
-        print("Waiting for confirmation...")
-        last_round += 1
-        client.status_after_block(last_round)
-        txinfo = client.pending_transaction_info(txid)
-    print(
-        "Transaction {} confirmed in round {}.".format(
-            txid, txinfo.get("confirmed-round")
-        )
-    )
-    return txinfo
+    result = wait_for_confirmations(client, [txid], max_rounds=max_rounds)[txid]
+    if result["status"] != "confirmed":
+        raise Exception("Transaction {} {}: {}".format(txid, result["status"], result["error"]))
+    logger.debug("Transaction %s confirmed in round %s.", txid, result["confirmed-round"])
+    return result["info"]
 
 
-def datetime_to_rounds(algod_client, given_date):
+def datetime_to_rounds(algod_client, given_date, last_round: int = None):
     """
     Get the first valid round from a datetime
     :param algod_client:
     :param given_date:
+    :param last_round: current node round, fetched from algod_client if not given
     :return:
     """
-    status = algod_client.status()
+    if last_round is None:
+        last_round = algod_client.status()["last-round"]
     now = datetime.now()
     current_time = datetime.strptime(now.strftime('%Y-%m-%d %H:%M'), '%Y-%m-%d %H:%M')
     given_date = datetime.strptime(given_date, '%Y-%m-%d %H:%M')
@@ -185,7 +360,7 @@ def datetime_to_rounds(algod_client, given_date):
     if difference_seconds < 0:
         return 0
     n_blocks_produced = difference_seconds / Constants.block_speed
-    first_valid_round = status["last-round"] + n_blocks_produced
+    first_valid_round = last_round + n_blocks_produced
     return round(first_valid_round)
 
 
@@ -203,6 +378,16 @@ def get_transaction_id(txn, is_signed: bool = True, show: bool = True):
         tx_id = txn.get_txid()
 
     if show:
-        print("TXID: ", tx_id)
+        logger.debug("TXID: %s", tx_id)
+
+    return tx_id
 
-    return tx_id
\ No newline at end of file
+
+def log_transaction_id(txn, is_signed: bool = True):
+    """
+    Log the transaction id at debug level, the id is computed only if the debug level is enabled
+    :param txn:
+    :param is_signed:
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        get_transaction_id(txn, is_signed=is_signed, show=True)
\ No newline at end of file
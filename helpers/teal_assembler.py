@@ -0,0 +1,514 @@
+# local TEAL assembler
+# assembles the opcode subset emitted by our PyTeal contracts into the same bytecode produced by algod /compile,
+# including the constant blocks optimization performed by algod for TEAL version 4 and above
+import base64
+import re
+
+from algosdk import encoding
+
+# first TEAL version supporting pushint / pushbytes
+push_version = 3
+# first TEAL version in which algod optimizes the constant blocks
+optimize_constants_version = 4
+# max supported TEAL version
+max_version = 5
+
+# opcode name: (byte, min version, immediates)
+# immediates: "uint8" single byte, "label" 2 bytes branch offset, "txn"/"global"/... named field
+opcodes = {
+    "err": (0x00, 1, ()),
+    "sha256": (0x01, 1, ()),
+    "keccak256": (0x02, 1, ()),
+    "sha512_256": (0x03, 1, ()),
+    "ed25519verify": (0x04, 1, ()),
+    "+": (0x08, 1, ()),
+    "-": (0x09, 1, ()),
+    "/": (0x0a, 1, ()),
+    "*": (0x0b, 1, ()),
+    "<": (0x0c, 1, ()),
+    ">": (0x0d, 1, ()),
+    "<=": (0x0e, 1, ()),
+    ">=": (0x0f, 1, ()),
+    "&&": (0x10, 1, ()),
+    "||": (0x11, 1, ()),
+    "==": (0x12, 1, ()),
+    "!=": (0x13, 1, ()),
+    "!": (0x14, 1, ()),
+    "len": (0x15, 1, ()),
+    "itob": (0x16, 1, ()),
+    "btoi": (0x17, 1, ()),
+    "%": (0x18, 1, ()),
+    "|": (0x19, 1, ()),
+    "&": (0x1a, 1, ()),
+    "^": (0x1b, 1, ()),
+    "~": (0x1c, 1, ()),
+    "mulw": (0x1d, 1, ()),
+    "addw": (0x1e, 2, ()),
+    "divmodw": (0x1f, 4, ()),
+    "arg": (0x2c, 1, ("uint8",)),
+    "arg_0": (0x2d, 1, ()),
+    "arg_1": (0x2e, 1, ()),
+    "arg_2": (0x2f, 1, ()),
+    "arg_3": (0x30, 1, ()),
+    "txn": (0x31, 1, ("txn",)),
+    "global": (0x32, 1, ("global",)),
+    "gtxn": (0x33, 1, ("uint8", "txn")),
+    "load": (0x34, 1, ("uint8",)),
+    "store": (0x35, 1, ("uint8",)),
+    "txna": (0x36, 2, ("txn", "uint8")),
+    "gtxna": (0x37, 2, ("uint8", "txn", "uint8")),
+    "gtxns": (0x38, 3, ("txn",)),
+    "gtxnsa": (0x39, 3, ("txn", "uint8")),
+    "gload": (0x3a, 4, ("uint8", "uint8")),
+    "gloads": (0x3b, 4, ("uint8",)),
+    "gaid": (0x3c, 4, ("uint8",)),
+    "gaids": (0x3d, 4, ()),
+    "loads": (0x3e, 5, ()),
+    "stores": (0x3f, 5, ()),
+    "bnz": (0x40, 1, ("label",)),
+    "bz": (0x41, 2, ("label",)),
+    "b": (0x42, 2, ("label",)),
+    "return": (0x43, 2, ()),
+    "assert": (0x44, 3, ()),
+    "pop": (0x48, 1, ()),
+    "dup": (0x49, 1, ()),
+    "dup2": (0x4a, 2, ()),
+    "dig": (0x4b, 3, ("uint8",)),
+    "swap": (0x4c, 3, ()),
+    "select": (0x4d, 3, ()),
+    "cover": (0x4e, 5, ("uint8",)),
+    "uncover": (0x4f, 5, ("uint8",)),
+    "concat": (0x50, 2, ()),
+    "substring": (0x51, 2, ("uint8", "uint8")),
+    "substring3": (0x52, 2, ()),
+    "getbit": (0x53, 3, ()),
+    "setbit": (0x54, 3, ()),
+    "getbyte": (0x55, 3, ()),
+    "setbyte": (0x56, 3, ()),
+    "extract": (0x57, 5, ("uint8", "uint8")),
+    "extract3": (0x58, 5, ()),
+    "extract_uint16": (0x59, 5, ()),
+    "extract_uint32": (0x5a, 5, ()),
+    "extract_uint64": (0x5b, 5, ()),
+    "balance": (0x60, 2, ()),
+    "app_opted_in": (0x61, 2, ()),
+    "app_local_get": (0x62, 2, ()),
+    "app_local_get_ex": (0x63, 2, ()),
+    "app_global_get": (0x64, 2, ()),
+    "app_global_get_ex": (0x65, 2, ()),
+    "app_local_put": (0x66, 2, ()),
+    "app_global_put": (0x67, 2, ()),
+    "app_local_del": (0x68, 2, ()),
+    "app_global_del": (0x69, 2, ()),
+    "asset_holding_get": (0x70, 2, ("asset_holding",)),
+    "asset_params_get": (0x71, 2, ("asset_params",)),
+    "app_params_get": (0x72, 5, ("app_params",)),
+    "min_balance": (0x78, 3, ()),
+    "callsub": (0x88, 4, ("label",)),
+    "retsub": (0x89, 4, ()),
+    "shl": (0x90, 4, ()),
+    "shr": (0x91, 4, ()),
+    "sqrt": (0x92, 4, ()),
+    "bitlen": (0x93, 4, ()),
+    "exp": (0x94, 4, ()),
+    "expw": (0x95, 4, ()),
+    "b+": (0xa0, 4, ()),
+    "b-": (0xa1, 4, ()),
+    "b/": (0xa2, 4, ()),
+    "b*": (0xa3, 4, ()),
+    "b<": (0xa4, 4, ()),
+    "b>": (0xa5, 4, ()),
+    "b<=": (0xa6, 4, ()),
+    "b>=": (0xa7, 4, ()),
+    "b==": (0xa8, 4, ()),
+    "b!=": (0xa9, 4, ()),
+    "b%": (0xaa, 4, ()),
+    "b|": (0xab, 4, ()),
+    "b&": (0xac, 4, ()),
+    "b^": (0xad, 4, ()),
+    "b~": (0xae, 4, ()),
+    "bzero": (0xaf, 4, ()),
+    "log": (0xb0, 5, ()),
+    "txnas": (0xc0, 5, ("txn",)),
+    "gtxnas": (0xc1, 5, ("uint8", "txn")),
+    "gtxnsas": (0xc2, 5, ("txn",)),
+    "args": (0xc3, 5, ()),
+}
+
+txn_fields = [
+    "Sender", "Fee", "FirstValid", "FirstValidTime", "LastValid", "Note", "Lease", "Receiver", "Amount",
+    "CloseRemainderTo", "VotePK", "SelectionPK", "VoteFirst", "VoteLast", "VoteKeyDilution", "Type", "TypeEnum",
+    "XferAsset", "AssetAmount", "AssetSender", "AssetReceiver", "AssetCloseTo", "GroupIndex", "TxID",
+    "ApplicationID", "OnCompletion", "ApplicationArgs", "NumAppArgs", "Accounts", "NumAccounts", "ApprovalProgram",
+    "ClearStateProgram", "RekeyTo", "ConfigAsset", "ConfigAssetTotal", "ConfigAssetDecimals",
+    "ConfigAssetDefaultFrozen", "ConfigAssetUnitName", "ConfigAssetName", "ConfigAssetURL",
+    "ConfigAssetMetadataHash", "ConfigAssetManager", "ConfigAssetReserve", "ConfigAssetFreeze",
+    "ConfigAssetClawback", "FreezeAsset", "FreezeAssetAccount", "FreezeAssetFrozen", "Assets", "NumAssets",
+    "Applications", "NumApplications", "GlobalNumUint", "GlobalNumByteSlice", "LocalNumUint", "LocalNumByteSlice",
+    "ExtraProgramPages", "Nonparticipation", "Logs", "NumLogs", "CreatedAssetID", "CreatedApplicationID",
+]
+
+global_fields = [
+    "MinTxnFee", "MinBalance", "MaxTxnLife", "ZeroAddress", "GroupSize", "LogicSigVersion", "Round",
+    "LatestTimestamp", "CurrentApplicationID", "CreatorAddress", "CurrentApplicationAddress", "GroupID",
+]
+
+asset_holding_fields = ["AssetBalance", "AssetFrozen"]
+
+asset_params_fields = [
+    "AssetTotal", "AssetDecimals", "AssetDefaultFrozen", "AssetUnitName", "AssetName", "AssetURL",
+    "AssetMetadataHash", "AssetManager", "AssetReserve", "AssetFreeze", "AssetClawback", "AssetCreator",
+]
+
+app_params_fields = [
+    "AppApprovalProgram", "AppClearStateProgram", "AppGlobalNumUint", "AppGlobalNumByteSlice", "AppLocalNumUint",
+    "AppLocalNumByteSlice", "AppExtraProgramPages", "AppCreator", "AppAddress",
+]
+
+field_groups = {
+    "txn": txn_fields,
+    "global": global_fields,
+    "asset_holding": asset_holding_fields,
+    "asset_params": asset_params_fields,
+    "app_params": app_params_fields,
+}
+
+# named integer constants accepted by the int pseudo-op
+named_ints = {
+    # TypeEnum
+    "unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6,
+    # OnComplete
+    "NoOp": 0, "OptIn": 1, "CloseOut": 2, "ClearState": 3, "UpdateApplication": 4, "DeleteApplication": 5,
+}
+
+
+class TealAssemblyError(Exception):
+    pass
+
+
+def encode_uvarint(value: int):
+    """
+    Encode an unsigned integer as varuint
+    :param value:
+    :return:
+    """
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def parse_int(token: str):
+    """
+    Parse an int pseudo-op argument
+    :param token:
+    :return:
+    """
+    if token in named_ints:
+        return named_ints[token]
+    try:
+        value = int(token, 0)
+    except ValueError:
+        raise TealAssemblyError("Invalid int constant: {}".format(token))
+    if value < 0 or value >= 1 << 64:
+        raise TealAssemblyError("Int constant out of range: {}".format(token))
+    return value
+
+
+def parse_string(literal: str):
+    """
+    Parse a double quoted string literal
+    :param literal:
+    :return:
+    """
+    if len(literal) < 2 or literal[0] != '"' or literal[-1] != '"':
+        raise TealAssemblyError("Invalid string literal: {}".format(literal))
+    escapes = {"n": b"\n", "r": b"\r", "t": b"\t", '"': b'"', "\\": b"\\"}
+    body = literal[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != "\\":
+            out += char.encode()
+            i += 1
+            continue
+        if i + 1 >= len(body):
+            raise TealAssemblyError("Invalid escape in string literal: {}".format(literal))
+        escape = body[i + 1]
+        if escape in escapes:
+            out += escapes[escape]
+            i += 2
+        elif escape == "x":
+            out.append(int(body[i + 2:i + 4], 16))
+            i += 4
+        else:
+            raise TealAssemblyError("Invalid escape in string literal: {}".format(literal))
+    return bytes(out)
+
+
+def parse_bytes(args: [str]):
+    """
+    Parse a byte pseudo-op argument
+    :param args:
+    :return:
+    """
+    if len(args) == 1:
+        arg = args[0]
+        if arg.startswith('"'):
+            return parse_string(arg)
+        if arg.startswith("0x"):
+            return bytes.fromhex(arg[2:])
+        for prefix, decode in (("base64(", decode_base64), ("b64(", decode_base64),
+                               ("base32(", decode_base32), ("b32(", decode_base32)):
+            if arg.startswith(prefix) and arg.endswith(")"):
+                return decode(arg[len(prefix):-1])
+    elif len(args) == 2:
+        if args[0] in ("base64", "b64"):
+            return decode_base64(args[1])
+        if args[0] in ("base32", "b32"):
+            return decode_base32(args[1])
+    raise TealAssemblyError("Invalid byte constant: {}".format(" ".join(args)))
+
+
+def decode_base64(value: str):
+    """
+    Decode a base64 string, padding is optional
+    :param value:
+    :return:
+    """
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def decode_base32(value: str):
+    """
+    Decode a base32 string, padding is optional
+    :param value:
+    :return:
+    """
+    return base64.b32decode(value + "=" * (-len(value) % 8))
+
+
+def tokenize(line: str):
+    """
+    Split a TEAL line into tokens, keeping string literals together and removing comments
+    :param line:
+    :return:
+    """
+    tokens = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char.isspace():
+            i += 1
+        elif line.startswith("//", i):
+            break
+        elif char == '"':
+            j = i + 1
+            while j < len(line) and line[j] != '"':
+                j += 2 if line[j] == "\\" else 1
+            tokens.append(line[i:j + 1])
+            i = j + 1
+        else:
+            j = i
+            while j < len(line) and not line[j].isspace():
+                j += 1
+            tokens.append(line[i:j])
+            i = j
+    return tokens
+
+
+class _Op:
+    """
+    Assembled instruction: either raw bytes, a constant reference or a branch to a label
+    """
+    __slots__ = ("kind", "data", "label", "value")
+
+    def __init__(self, kind, data=b"", label=None, value=None):
+        self.kind = kind
+        self.data = data
+        self.label = label
+        self.value = value
+
+
+def _encode_field(group: str, name: str):
+    """
+    Encode a named field immediate
+    :param group:
+    :param name:
+    :return:
+    """
+    fields = field_groups[group]
+    if name not in fields:
+        raise TealAssemblyError("Unknown {} field: {}".format(group, name))
+    return fields.index(name)
+
+
+def _parse(source_code: str):
+    """
+    Parse the TEAL source into a version and a list of ops
+    :param source_code:
+    :return:
+    """
+    version = 1
+    ops = []
+    for line_number, line in enumerate(source_code.splitlines(), start=1):
+        stripped = line.strip()
+        if stripped.startswith("#pragma"):
+            match = re.match(r"#pragma\s+version\s+(\d+)$", stripped)
+            if match is None:
+                raise TealAssemblyError("Line {}: invalid pragma".format(line_number))
+            version = int(match.group(1))
+            if version > max_version:
+                raise TealAssemblyError("Unsupported TEAL version: {}".format(version))
+            continue
+
+        tokens = tokenize(line)
+        if not tokens:
+            continue
+        name, args = tokens[0], tokens[1:]
+
+        if name.endswith(":") and not args:
+            ops.append(_Op("label", label=name[:-1]))
+        elif name == "int":
+            if len(args) != 1:
+                raise TealAssemblyError("Line {}: int expects one argument".format(line_number))
+            ops.append(_Op("int", value=parse_int(args[0])))
+        elif name == "byte":
+            ops.append(_Op("byte", value=parse_bytes(args)))
+        elif name == "addr":
+            if len(args) != 1:
+                raise TealAssemblyError("Line {}: addr expects one argument".format(line_number))
+            ops.append(_Op("byte", value=encoding.decode_address(args[0])))
+        elif name in opcodes:
+            opcode, min_version, immediates = opcodes[name]
+            if version < min_version:
+                raise TealAssemblyError("Line {}: {} requires TEAL version {}".format(line_number, name, min_version))
+            if len(args) != len(immediates):
+                raise TealAssemblyError("Line {}: {} expects {} arguments".format(line_number, name, len(immediates)))
+            if immediates == ("label",):
+                ops.append(_Op("branch", data=bytes([opcode]), label=args[0]))
+                continue
+            data = bytearray([opcode])
+            for immediate, arg in zip(immediates, args):
+                if immediate == "uint8":
+                    value = parse_int(arg)
+                    if value > 255:
+                        raise TealAssemblyError("Line {}: immediate out of range: {}".format(line_number, arg))
+                    data.append(value)
+                else:
+                    data.append(_encode_field(immediate, arg))
+            ops.append(_Op("raw", data=bytes(data)))
+        else:
+            raise TealAssemblyError("Line {}: unsupported opcode: {}".format(line_number, name))
+    return version, ops
+
+
+def _build_constants(ops: [_Op], kind: str, optimize: bool):
+    """
+    Build a constant block: values are ordered by first reference and,
+    when optimizing, stable sorted by descending usage frequency
+    :param ops:
+    :param kind:
+    :param optimize:
+    :return: (constant block, values referenced once)
+    """
+    frequencies = {}
+    for op in ops:
+        if op.kind == kind:
+            frequencies[op.value] = frequencies.get(op.value, 0) + 1
+
+    values = list(frequencies)
+    if not optimize:
+        return values, set()
+
+    values.sort(key=lambda value: -frequencies[value])
+    block = [value for value in values if frequencies[value] > 1]
+    singletons = {value for value in values if frequencies[value] == 1}
+    return block, singletons
+
+
+def _encode_reference(kind: str, value, block: list, singletons: set):
+    """
+    Encode a reference to a constant
+    :param kind:
+    :param value:
+    :param block:
+    :param singletons:
+    :return:
+    """
+    if kind == "int":
+        if value in singletons:
+            return bytes([0x81]) + encode_uvarint(value)
+        index, short_opcode, opcode = block.index(value), 0x22, 0x21
+    else:
+        if value in singletons:
+            return bytes([0x80]) + encode_uvarint(len(value)) + value
+        index, short_opcode, opcode = block.index(value), 0x28, 0x27
+
+    if index < 4:
+        return bytes([short_opcode + index])
+    return bytes([opcode, index])
+
+
+def assemble(source_code: str):
+    """
+    Assemble a TEAL source into program bytes
+    :param source_code:
+    :return:
+    """
+    version, ops = _parse(source_code)
+    optimize = version >= optimize_constants_version and version >= push_version
+
+    int_block, int_singletons = _build_constants(ops, "int", optimize)
+    byte_block, byte_singletons = _build_constants(ops, "byte", optimize)
+
+    # encode constant references and compute labels positions
+    labels = {}
+    position = 0
+    for op in ops:
+        if op.kind == "label":
+            if op.label in labels:
+                raise TealAssemblyError("Duplicate label: {}".format(op.label))
+            labels[op.label] = position
+            continue
+        if op.kind == "int":
+            op.data = _encode_reference("int", op.value, int_block, int_singletons)
+        elif op.kind == "byte":
+            op.data = _encode_reference("byte", op.value, byte_block, byte_singletons)
+        elif op.kind == "branch":
+            op.data = op.data + b"\x00\x00"
+        position += len(op.data)
+
+    # resolve branches, offsets are relative to the end of the branch instruction
+    code = bytearray()
+    for op in ops:
+        if op.kind == "label":
+            continue
+        if op.kind == "branch":
+            if op.label not in labels:
+                raise TealAssemblyError("Reference to undefined label: {}".format(op.label))
+            offset = labels[op.label] - (len(code) + 3)
+            if offset < 0 and version < 4:
+                raise TealAssemblyError("Backward branch to {} requires TEAL version 4".format(op.label))
+            if not -0x8000 <= offset <= 0x7fff:
+                raise TealAssemblyError("Branch to {} out of range".format(op.label))
+            code += op.data[:1] + (offset & 0xffff).to_bytes(2, "big")
+        else:
+            code += op.data
+
+    program = bytearray(encode_uvarint(version))
+    if int_block:
+        program.append(0x20)
+        program += encode_uvarint(len(int_block))
+        for value in int_block:
+            program += encode_uvarint(value)
+    if byte_block:
+        program.append(0x26)
+        program += encode_uvarint(len(byte_block))
+        for value in byte_block:
+            program += encode_uvarint(len(value)) + value
+    program += code
+    return bytes(program)
@@ -1,11 +1,10 @@
 import random
 
-from algosdk import account
-from algosdk.v2client import algod
-from numpy.core.defchararray import strip
-
 from constants import Constants, get_env
 from helpers import algo_helper
+from models import NodeMetrics
+from models.AccountRegistry import AccountRegistry
+from models.InstrumentedClient import InstrumentedAlgodClient
 from models.Trip import Trip
 from utilities import utils
 
@@ -27,7 +26,7 @@ def read_state(algod_client, app_id, user_private_key=None, show_debug=False):
     if user_private_key is not None:
         # read local state of application
         local_state = algo_helper.read_local_state(algod_client,
-                                                   account.address_from_private_key(user_private_key),
+                                                   AccountRegistry.shared().address_of(user_private_key),
                                                    app_id),
 
     # read global state of application
@@ -57,7 +56,7 @@ def read_state(algod_client, app_id, user_private_key=None, show_debug=False):
     if show_debug:
         utils.console_log("Application Info:", 'blue')
         app_info = algod_client.application_info(app_id)
-        utils.parse_response(app_info)
+        print(utils.parse_response(app_info))
 
 
 def get_test_user(user_list, ask_selection=True):
@@ -70,7 +69,7 @@ def get_test_user(user_list, ask_selection=True):
         print('With which user?')
         for i in range(0, len(user_list)):
             print('{}) {}'.format(i, user_list[i].get('name')))
-        y = int(strip(input()))
+        y = int(input().strip())
         if y <= 0 or y > len(user_list):
             y = 0
     else:
@@ -81,13 +80,15 @@ def get_test_user(user_list, ask_selection=True):
 
 def main():
     # define private keys
-    creator_private_key = algo_helper.get_private_key_from_mnemonic(Constants.creator_mnemonic)
-    algod_client = algod.AlgodClient(Constants.algod_token, Constants.algod_address)
+    account_registry = AccountRegistry.shared()
+    creator_private_key = account_registry.from_mnemonic(Constants.creator_mnemonic).private_key
+    algod_client = InstrumentedAlgodClient(Constants.algod_token, Constants.algod_address,
+                                           metrics_sink=NodeMetrics.get_default_sink())
 
     app_id = int(get_env('APP_ID'))
     accounts = Constants.accounts
 
-    carsharing_trip = Trip(algod_client=algod_client, app_id=app_id)
+    carsharing_trip = Trip(algod_client=algod_client, app_id=app_id, account_registry=account_registry)
     # ------- trip info ---------
     trip_creator_name = "Test"
     trip_start_add = "Mestre"
@@ -111,7 +112,7 @@ def main():
         utils.console_log('6) Delete Trip', color)
         utils.console_log('7) Get Trip State', color)
         utils.console_log("--------------------------------------------", color)
-        x = int(strip(input()))
+        x = int(input().strip())
         if x == 1:
             carsharing_trip.create_app(creator_private_key=creator_private_key,
                                        trip_creator_name=trip_creator_name,
@@ -128,14 +129,14 @@ def main():
                 utils.console_log("Invalid app_id")
                 continue
             test_user = get_test_user(accounts, True)
-            test_user_pk = algo_helper.get_private_key_from_mnemonic(test_user.get('mnemonic'))
+            test_user_pk = account_registry.resolve(test_user).private_key
             carsharing_trip.participate(test_user_pk, test_user.get('name'))
         elif x == 3:
             if carsharing_trip.app_id is None:
                 utils.console_log("Invalid app_id")
 
             test_user = get_test_user(accounts, True)
-            test_user_pk = algo_helper.get_private_key_from_mnemonic(test_user.get('mnemonic'))
+            test_user_pk = account_registry.resolve(test_user).private_key
             carsharing_trip.cancel_participation(creator_private_key, test_user_pk, test_user.get('name'))
         elif x == 4:
             if carsharing_trip.app_id is None:
@@ -156,7 +157,7 @@ def main():
                                              trip_available_seats=trip_seats)
         elif x == 6:
             utils.console_log("Are you sure?", 'red')
-            y = strip(input())
+            y = input().strip()
             if y != "y" and y != "yes":
                 continue
             if carsharing_trip.app_id is None:
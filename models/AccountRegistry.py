@@ -0,0 +1,160 @@
+# class to keep the key material of the known accounts
+# private keys and addresses are derived once from the mnemonics and looked up by name, address or mnemonic
+# the shared registry reads the accounts of Constants only when an account is first looked up by name or address
+
+from threading import Lock
+
+from algosdk import account, mnemonic as algo_mnemonic
+
+from constants import Constants
+
+
+class AccountEntry:
+    __slots__ = ("name", "mnemonic", "private_key", "address")
+
+    def __init__(self, name: str, mnemonic: str, private_key: str, address: str):
+        self.name = name
+        self.mnemonic = mnemonic
+        self.private_key = private_key
+        self.address = address
+
+    def __repr__(self):
+        return "AccountEntry(name={}, address={})".format(self.name, self.address)
+
+
+class AccountRegistry:
+    class Variables:
+        # max number of addresses kept for the private keys of unregistered accounts
+        max_derived_addresses = 1024
+
+    shared_registry = None
+    shared_lock = Lock()
+
+    def __init__(self, accounts: [dict] = None, loader=None):
+        """
+        :param accounts: list of accounts, each one as {'name', 'mnemonic'}
+        :param loader: function returning more accounts, called on the first lookup by name or address
+        """
+        self.by_name = {}
+        self.by_address = {}
+        self.by_mnemonic = {}
+        # private key -> address, for the registered accounts
+        self.addresses = {}
+        # private key -> address, for the keys given directly by the callers, oldest first
+        self.derived_addresses = {}
+        self.lock = Lock()
+        self.loader = loader
+        self.load_lock = Lock()
+        for user in accounts or []:
+            self.add(user.get('name'), user.get('mnemonic'))
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the process-wide registry of the accounts in Constants, read on first lookup by name or address
+        :return:
+        """
+        with cls.shared_lock:
+            if cls.shared_registry is None:
+                cls.shared_registry = cls(loader=lambda: Constants.accounts)
+            return cls.shared_registry
+
+    @classmethod
+    def reset_shared(cls):
+        """
+        Drop the shared registry, the accounts of Constants are read again on next use
+        """
+        with cls.shared_lock:
+            cls.shared_registry = None
+
+    def load(self):
+        """
+        Register the accounts of the loader, once
+        """
+        if self.loader is None:
+            return
+        with self.load_lock:
+            if self.loader is None:
+                return
+            for user in self.loader():
+                self.add(user.get('name'), user.get('mnemonic'))
+            self.loader = None
+
+    def add(self, name: str, mnemonic: str):
+        """
+        Derive and register the keys of an account, already registered mnemonics are not derived again
+        :param name:
+        :param mnemonic:
+        :return: AccountEntry
+        """
+        with self.lock:
+            entry = self.by_mnemonic.get(mnemonic)
+        if entry is None:
+            private_key = algo_mnemonic.to_private_key(mnemonic)
+            entry = AccountEntry(name, mnemonic, private_key, account.address_from_private_key(private_key))
+        elif name is not None and entry.name != name:
+            entry = AccountEntry(name, mnemonic, entry.private_key, entry.address)
+
+        with self.lock:
+            self.by_mnemonic[mnemonic] = entry
+            self.by_address[entry.address] = entry
+            self.addresses[entry.private_key] = entry.address
+            if name is not None:
+                self.by_name[name] = entry
+        return entry
+
+    def get(self, name: str):
+        """
+        Get an account by name
+        :param name:
+        :return: AccountEntry, None if not registered
+        """
+        self.load()
+        return self.by_name.get(name)
+
+    def get_by_address(self, address: str):
+        """
+        Get an account by address
+        :param address:
+        :return: AccountEntry, None if not registered
+        """
+        self.load()
+        return self.by_address.get(address)
+
+    def from_mnemonic(self, mnemonic: str, name: str = None):
+        """
+        Get the account of a mnemonic, registering it if unknown
+        :param mnemonic:
+        :param name:
+        :return: AccountEntry
+        """
+        entry = self.by_mnemonic.get(mnemonic)
+        if entry is not None and (name is None or entry.name == name):
+            return entry
+        return self.add(name, mnemonic)
+
+    def resolve(self, user: dict):
+        """
+        Get the account of a user given as {'name', 'mnemonic'}
+        :param user:
+        :return: AccountEntry
+        """
+        return self.from_mnemonic(user.get('mnemonic'), user.get('name'))
+
+    def address_of(self, private_key: str):
+        """
+        Get the address of a private key
+        :param private_key:
+        :return:
+        """
+        address = self.addresses.get(private_key) or self.derived_addresses.get(private_key)
+        if address is None:
+            address = account.address_from_private_key(private_key)
+            with self.lock:
+                if len(self.derived_addresses) >= self.Variables.max_derived_addresses:
+                    self.derived_addresses.pop(next(iter(self.derived_addresses)))
+                self.derived_addresses[private_key] = address
+        return address
+
+
+Constants.on_reload(AccountRegistry.reset_shared)
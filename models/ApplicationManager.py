@@ -1,4 +1,4 @@
-import json
+import copy
 from typing import Optional
 
 from algosdk import account
@@ -8,7 +8,11 @@ from algosdk.v2client import algod
 
 from constants import Constants
 from helpers import algo_helper
-from utilities import utils
+from models.ConfirmationTracker import ConfirmationTracker
+from models.SuggestedParamsProvider import SuggestedParamsProvider
+from utilities.log import LazyJson, get_logger
+
+logger = get_logger(__name__)
 
 
 # class for manage application transactions on Algorand Blockchain
@@ -20,6 +24,15 @@ class ApplicationManager:
         escrow_min_balance = 1000000
         transaction_note = Constants.transaction_note
 
+    @classmethod
+    def get_suggested_params(cls, algod_client: algod.AlgodClient):
+        """
+        Get the node suggested parameters, shared between all the transactions built with the same client
+        :param algod_client:
+        :return:
+        """
+        return SuggestedParamsProvider.for_client(algod_client).get()
+
     @classmethod
     def create_app(cls,
                    algod_client: algod.AlgodClient,
@@ -29,7 +42,8 @@ class ApplicationManager:
                    global_schema,
                    local_schema,
                    app_args,
-                   sign_transaction: str = None):
+                   sign_transaction: str = None,
+                   params: transaction.SuggestedParams = None):
         """
         Perform an ApplicationCreate transaction:
         Transaction to instantiate a new application
@@ -41,15 +55,16 @@ class ApplicationManager:
         :param local_schema:
         :param app_args:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         :return:
         """
-        utils.console_log("Deploying Application......", "green")
+        logger.debug("Deploying Application......")
 
         # declare on_complete as NoOp
         on_complete = transaction.OnComplete.NoOpOC.real
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
         note = cls.Variables.transaction_note.encode()
@@ -64,7 +79,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -74,7 +89,8 @@ class ApplicationManager:
                  address: str,
                  app_id: int,
                  app_args,
-                 sign_transaction: str = None):
+                 sign_transaction: str = None,
+                 params: transaction.SuggestedParams = None):
         """
         Perform a NoOp transaction:
         Generic application calls to execute the ApprovalProgram.
@@ -83,13 +99,14 @@ class ApplicationManager:
         :param app_id:
         :param app_args:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         :return:
         """
-        utils.console_log("Calling Application......", "green")
+        logger.debug("Calling Application......")
         # declare sender
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -104,7 +121,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -116,7 +133,8 @@ class ApplicationManager:
                    approval_program,
                    clear_program,
                    app_args,
-                   sign_transaction: str = None):
+                   sign_transaction: str = None,
+                   params: transaction.SuggestedParams = None):
         """
         Perform an ApplicationCreate transaction:
         Transaction to instantiate a new application
@@ -127,12 +145,13 @@ class ApplicationManager:
         :param clear_program:
         :param app_args:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         :return:
         """
-        utils.console_log("Deploying Application......", "green")
+        logger.debug("Deploying Application......")
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -149,7 +168,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -158,7 +177,8 @@ class ApplicationManager:
                    algod_client: algod.AlgodClient,
                    address: str,
                    app_id: int,
-                   sign_transaction: str = None):
+                   sign_transaction: str = None,
+                   params: transaction.SuggestedParams = None):
         """
         Perform a OptIn transaction:
         Accounts use this transaction to begin participating in a smart contract.
@@ -167,11 +187,12 @@ class ApplicationManager:
         :param address:
         :param app_id:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         """
-        utils.console_log("OptIn from account: {}".format(address), "green")
+        logger.debug("OptIn from account: %s", address)
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -184,7 +205,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -193,7 +214,8 @@ class ApplicationManager:
                    algod_client: algod.AlgodClient,
                    address: str,
                    app_id: int,
-                   sign_transaction: str = None):
+                   sign_transaction: str = None,
+                   params: transaction.SuggestedParams = None):
         """
         Perform a DeleteApplication transaction:
         Transaction to delete the application.
@@ -201,11 +223,12 @@ class ApplicationManager:
         :param address:
         :param app_id:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         """
-        utils.console_log("Deleting Application......", "green")
+        logger.debug("Deleting Application......")
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -218,7 +241,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -227,7 +250,8 @@ class ApplicationManager:
                   algod_client: algod.AlgodClient,
                   address: str,
                   app_id: int,
-                  sign_transaction: str = None):
+                  sign_transaction: str = None,
+                  params: transaction.SuggestedParams = None):
         """
         Perform a ClearState transaction:
         Similar to CloseOut, but the transaction will always clear a contract from the account’s balance record whether the
@@ -236,11 +260,12 @@ class ApplicationManager:
         :param address:
         :param app_id:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         """
-        utils.console_log("Clearing Application from account {}".format(address), "green")
+        logger.debug("Clearing Application from account %s", address)
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -253,7 +278,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -262,7 +287,8 @@ class ApplicationManager:
                       algod_client: algod.AlgodClient,
                       address: str,
                       app_id: int,
-                      sign_transaction: str = None):
+                      sign_transaction: str = None,
+                      params: transaction.SuggestedParams = None):
         """
         Perform a CloseOut transaction:
         Accounts use this transaction to close out their participation in the contract.
@@ -271,11 +297,12 @@ class ApplicationManager:
         :param address:
         :param app_id:
         :param sign_transaction:
+        :param params: suggested params to use, shared node params if not given
         """
-        utils.console_log("Clearing Application from account {}".format(address), "green")
+        logger.debug("Clearing Application from account %s", address)
 
         # get node suggested parameters
-        params = algod_client.suggested_params()
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -288,7 +315,7 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
@@ -299,7 +326,8 @@ class ApplicationManager:
                 receiver_address: str,
                 amount: int,
                 sign_transaction: str = None,
-                close_remainder_to: str = None):
+                close_remainder_to: str = None,
+                params: transaction.SuggestedParams = None):
         """
         Creates a payment transaction in ALGOs.
         :param algod_client:
@@ -309,11 +337,11 @@ class ApplicationManager:
         :param sign_transaction:
         :param close_remainder_to: When set, it indicates that the transaction is requesting that the Sender account
         should be closed, and all remaining funds, after the fee and amount are paid, be transferred to this address.
+        :param params: suggested params to use, shared node params if not given
         :return:
         """
-        utils.console_log("Performing a payment from account {} to account {}".format(sender_address, receiver_address),
-                          "green")
-        params = algod_client.suggested_params()
+        logger.debug("Performing a payment from account %s to account %s", sender_address, receiver_address)
+        params = cls.get_suggested_params(algod_client) if params is None else copy.copy(params)
         params.flat_fee = True
         params.fee = cls.Variables.fees
 
@@ -328,10 +356,37 @@ class ApplicationManager:
             txn = txn.sign(sign_transaction)
             signed = True
 
-        algo_helper.get_transaction_id(txn=txn, is_signed=signed)
+        algo_helper.log_transaction_id(txn=txn, is_signed=signed)
 
         return txn
 
+    @classmethod
+    def submit_transaction(cls,
+                           algod_client: algod.AlgodClient,
+                           txn: SignedTransaction):
+        """
+        Submit a transaction without waiting for its confirmation
+        :param algod_client:
+        :param txn:
+        :return: a Future resolved with the confirmation info once confirmed, see ConfirmationTracker.track
+        """
+        tx_id = algod_client.send_transaction(txn)
+        return ConfirmationTracker.for_client(algod_client).track(tx_id)
+
+    @classmethod
+    def submit_group_transactions(cls,
+                                  algod_client: algod.AlgodClient,
+                                  txns: [SignedTransaction]):
+        """
+        Submit an atomic group without waiting for its confirmation
+        :param algod_client:
+        :param txns:
+        :return: a Future resolved with the confirmation info of the first transaction once confirmed,
+            see ConfirmationTracker.track
+        """
+        tx_id = algod_client.send_transactions(txns)
+        return ConfirmationTracker.for_client(algod_client).track(tx_id)
+
     @classmethod
     def send_transaction(cls,
                          algod_client: algod.AlgodClient,
@@ -341,17 +396,18 @@ class ApplicationManager:
         :param algod_client:
         :param txn:
         :param txn_debug:
+        :return: pending transaction info of the confirmed transaction
         """
-        # submit transaction
-        tx_id = algod_client.send_transaction(txn)
-
-        # wait for confirmation
-        confirmed_txn = transaction.wait_for_confirmation(algod_client, tx_id)
-        print("Transaction with id {} completed".format(tx_id))
+        # submit transaction and wait for confirmation
+        pending_txn = cls.submit_transaction(algod_client, txn)
+        pending_txn.result(timeout=ConfirmationTracker.Variables.timeout_seconds)
+        # the tracker only knows the confirmation round, read the full pending transaction info
+        confirmed_txn = algod_client.pending_transaction_info(pending_txn.tx_id)
+        logger.debug("Transaction with id %s completed", pending_txn.tx_id)
         if txn_debug:
-            print("Transaction information: {}".format(json.dumps(confirmed_txn, indent=4)))
+            logger.info("Transaction information: %s", LazyJson(confirmed_txn))
 
-        return algod_client.pending_transaction_info(tx_id)
+        return confirmed_txn
 
     @classmethod
     def send_group_transactions(cls,
@@ -362,14 +418,15 @@ class ApplicationManager:
         :param algod_client:
         :param txns:
         :param txn_debug:
+        :return: pending transaction info of the first transaction of the confirmed group
         """
-        # Atomic transfer
-        tx_id = algod_client.send_transactions(txns)
-
-        # wait for confirmation
-        confirmed_txn = transaction.wait_for_confirmation(algod_client, tx_id)
-        print("Transactions with id {} completed".format(tx_id))
+        # Atomic transfer, wait for confirmation
+        pending_txn = cls.submit_group_transactions(algod_client, txns)
+        pending_txn.result(timeout=ConfirmationTracker.Variables.timeout_seconds)
+        # the tracker only knows the confirmation round, read the full pending transaction info
+        confirmed_txn = algod_client.pending_transaction_info(pending_txn.tx_id)
+        logger.debug("Transactions with id %s completed", pending_txn.tx_id)
         if txn_debug:
-            print("Transactions information: {}".format(json.dumps(confirmed_txn, indent=4)))
+            logger.info("Transactions information: %s", LazyJson(confirmed_txn))
 
-        return algod_client.pending_transaction_info(tx_id)
+        return confirmed_txn
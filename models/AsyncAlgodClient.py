@@ -0,0 +1,142 @@
+# asyncio client for the algod REST API
+# requests share a pooled aiohttp session, connections are kept alive between calls
+
+import base64
+import json
+
+import aiohttp
+from algosdk import encoding, error
+from algosdk.future import transaction
+
+from constants import Constants
+
+
+class AsyncAlgodClient:
+    class Variables:
+        # max number of simultaneous connections to the node
+        connection_limit = 100
+        keepalive_timeout = 30
+        api_prefix = "/v2"
+
+    def __init__(self,
+                 algod_token: str,
+                 algod_address: str,
+                 headers: dict = None,
+                 connection_limit: int = None):
+        self.algod_token = algod_token
+        self.algod_address = algod_address.rstrip("/")
+        self.headers = headers
+        self.connection_limit = connection_limit if connection_limit is not None \
+            else self.Variables.connection_limit
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        """
+        Get the shared session, created on first use inside the running event loop
+        :return:
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.connection_limit,
+                                             keepalive_timeout=self.Variables.keepalive_timeout)
+            header = {"User-Agent": "py-algorand-sdk", "X-Algo-API-Token": self.algod_token}
+            if self.headers:
+                header.update(self.headers)
+            self.session = aiohttp.ClientSession(connector=connector, headers=header)
+        return self.session
+
+    async def close(self):
+        """
+        Close the pooled connections
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def algod_request(self, method: str, requrl: str, params: dict = None, data: bytes = None,
+                            headers: dict = None, response_format: str = "json"):
+        """
+        Execute a request on the node
+        :param method:
+        :param requrl:
+        :param params:
+        :param data:
+        :param headers:
+        :param response_format: "json" to get the decoded body, otherwise the raw bytes
+        :return:
+        """
+        url = self.algod_address + self.Variables.api_prefix + requrl
+        async with self._get_session().request(method, url, params=params, data=data, headers=headers) as resp:
+            body = await resp.read()
+            if resp.status >= 400:
+                message = body.decode("utf-8", errors="replace")
+                try:
+                    message = json.loads(message)["message"]
+                except Exception:
+                    pass
+                raise error.AlgodHTTPError(message, resp.status)
+            if response_format == "json":
+                return json.loads(body)
+            return body
+
+    async def status(self):
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int):
+        return await self.algod_request("GET", "/status/wait-for-block-after/{}".format(block_num))
+
+    async def suggested_params(self):
+        """
+        Get the suggested transaction parameters
+        :return:
+        """
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def compile(self, source: str):
+        return await self.algod_request("POST", "/teal/compile", data=source.encode("utf-8"),
+                                        headers={"Content-Type": "application/x-binary"})
+
+    async def send_transaction(self, txn):
+        return await self.send_transactions([txn])
+
+    async def send_transactions(self, txns: list):
+        """
+        Broadcast a list of signed transactions
+        :param txns:
+        :return: id of the first transaction
+        """
+        serialized = b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        res = await self.algod_request("POST", "/transactions", data=serialized,
+                                       headers={"Content-Type": "application/x-binary"})
+        return res["txId"]
+
+    async def pending_transaction_info(self, tx_id: str):
+        return await self.algod_request("GET", "/transactions/pending/{}".format(tx_id))
+
+    async def application_info(self, app_id: int):
+        return await self.algod_request("GET", "/applications/{}".format(app_id))
+
+    async def account_info(self, address: str):
+        return await self.algod_request("GET", "/accounts/{}".format(address))
+
+    @classmethod
+    def from_constants(cls):
+        """
+        Instantiate a client with the connection parameters from Constants
+        :return:
+        """
+        return cls(Constants.algod_token, Constants.algod_address)
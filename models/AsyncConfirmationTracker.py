@@ -0,0 +1,136 @@
+# asyncio version of the ConfirmationTracker
+# a single task per client follows the rounds and resolves all the pending transactions together
+
+import asyncio
+
+from algosdk.error import AlgodHTTPError
+
+from constants import Constants
+from models.AsyncAlgodClient import AsyncAlgodClient
+from models.ConfirmationTracker import ConfirmationTimeoutError, TransactionRejectedError
+
+
+class AsyncConfirmationTracker:
+    class Variables:
+        # number of rounds to wait for a confirmation before giving up
+        timeout_rounds = Constants.confirmation_max_rounds
+        # consecutive node errors after which the pending transactions fail
+        max_node_errors = 5
+
+    def __init__(self, algod_client: AsyncAlgodClient, timeout_rounds: int = None, max_node_errors: int = None):
+        self.algod_client = algod_client
+        self.timeout_rounds = timeout_rounds if timeout_rounds is not None else self.Variables.timeout_rounds
+        self.max_node_errors = max_node_errors if max_node_errors is not None else self.Variables.max_node_errors
+        # tx_id -> [future, round at submission]
+        self.pending = {}
+        self.last_round = None
+        self.task = None
+
+    @classmethod
+    def for_client(cls, algod_client: AsyncAlgodClient):
+        """
+        Get the tracker shared by all the callers of the given client
+        :param algod_client:
+        :return:
+        """
+        tracker = getattr(algod_client, "confirmation_tracker", None)
+        if tracker is None:
+            tracker = cls(algod_client)
+            algod_client.confirmation_tracker = tracker
+        return tracker
+
+    def track(self, tx_id: str):
+        """
+        Track a submitted transaction
+        :param tx_id:
+        :return: a Future resolved with the pending transaction info once confirmed
+        """
+        if tx_id in self.pending:
+            return self.pending[tx_id][0]
+        future = asyncio.get_running_loop().create_future()
+        self.pending[tx_id] = [future, self.last_round]
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+        return future
+
+    async def wait(self, tx_id: str):
+        """
+        Wait for the confirmation of a submitted transaction
+        :param tx_id:
+        :return: the pending transaction info
+        """
+        return await self.track(tx_id)
+
+    async def _run(self):
+        """
+        Follow the rounds until there are no more pending transactions
+        """
+        node_errors = 0
+        while self.pending:
+            try:
+                if self.last_round is None:
+                    self.last_round = (await self.algod_client.status()).get("last-round")
+                pending = list(self.pending.items())
+                await asyncio.gather(*[self._check(tx_id, entry) for tx_id, entry in pending])
+                if not self.pending:
+                    break
+                # wait for the next round, all the pending transactions are checked once per round
+                self.last_round = (await self.algod_client.status_after_block(self.last_round)).get("last-round")
+                node_errors = 0
+            except Exception as e:
+                # node not reachable, retry after a block time until too many consecutive errors
+                node_errors += 1
+                if node_errors >= self.max_node_errors:
+                    self._fail_pending(e)
+                    break
+                await asyncio.sleep(Constants.block_speed)
+
+    def _fail_pending(self, error: Exception):
+        """
+        Fail all the pending transactions
+        :param error: last node error
+        """
+        for tx_id in list(self.pending):
+            self._resolve(tx_id, exception=ConfirmationTimeoutError(
+                "Transaction {} not confirmed, node not reachable: {}".format(tx_id, error)))
+
+    async def _check(self, tx_id: str, entry: list):
+        """
+        Check a pending transaction and resolve its future
+        :param tx_id:
+        :param entry:
+        """
+        future, submitted_round = entry
+        if submitted_round is None:
+            entry[1] = submitted_round = self.last_round
+
+        try:
+            txinfo = await self.algod_client.pending_transaction_info(tx_id)
+        except AlgodHTTPError as e:
+            self._resolve(tx_id, exception=e)
+            return
+
+        if txinfo.get("confirmed-round", 0) > 0:
+            self._resolve(tx_id, result=txinfo)
+        elif txinfo.get("pool-error"):
+            self._resolve(tx_id, exception=TransactionRejectedError(
+                "Transaction {} rejected: {}".format(tx_id, txinfo["pool-error"])))
+        elif self.last_round - submitted_round >= self.timeout_rounds:
+            self._resolve(tx_id, exception=ConfirmationTimeoutError(
+                "Transaction {} not confirmed after {} rounds".format(tx_id, self.timeout_rounds)))
+
+    def _resolve(self, tx_id: str, result=None, exception: Exception = None):
+        """
+        Remove a transaction from the pending ones and resolve its future
+        :param tx_id:
+        :param result:
+        :param exception:
+        """
+        entry = self.pending.pop(tx_id, None)
+        if entry is None or entry[0].done():
+            return
+        future = entry[0]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
@@ -0,0 +1,61 @@
+# asyncio version of the LocalStateReader
+# reads the local state of an application through the per-application account endpoint when the node supports it,
+# otherwise through the account info
+
+from algosdk.error import AlgodHTTPError
+
+from models.AsyncAlgodClient import AsyncAlgodClient
+from models.LocalStateReader import LocalStateReader
+from models.TripState import ParticipantState
+
+
+class AsyncLocalStateReader:
+    def __init__(self, algod_client: AsyncAlgodClient):
+        self.algod_client = algod_client
+        # None until the first request tells if the node serves /accounts/{address}/applications/{app_id}
+        self.per_app_endpoint = None
+
+    @classmethod
+    def for_client(cls, algod_client: AsyncAlgodClient):
+        """
+        Get the reader shared by all the callers of the given client
+        :param algod_client:
+        :return:
+        """
+        reader = getattr(algod_client, "local_state_reader", None)
+        if reader is None:
+            reader = cls(algod_client)
+            algod_client.local_state_reader = reader
+        return reader
+
+    async def read_participant(self, address: str, app_id: int):
+        """
+        Read the participant state of a trip from a user account
+        :param address:
+        :param app_id:
+        :return: ParticipantState, None if the account is not opted in or the state is empty
+        """
+        local_state = await self._lookup(address, app_id)
+        if local_state is None or "key-value" not in local_state:
+            return None
+        return ParticipantState.from_state(local_state["key-value"])
+
+    async def _lookup(self, address: str, app_id: int):
+        """
+        Get the raw local state entry of an application in a user account
+        :param address:
+        :param app_id:
+        :return:
+        """
+        if self.per_app_endpoint is not False:
+            try:
+                results = await self.algod_client.algod_request("GET", LocalStateReader.per_app_path(address, app_id))
+                self.per_app_endpoint = True
+                return results.get("app-local-state")
+            except AlgodHTTPError as e:
+                self.per_app_endpoint = LocalStateReader.check_per_app_error(e, self.per_app_endpoint)
+                if self.per_app_endpoint:
+                    return None
+
+        results = await self.algod_client.account_info(address)
+        return LocalStateReader.index_account_apps(results).get(app_id)
@@ -0,0 +1,302 @@
+# asyncio version of the Trip API
+# all the node I/O goes through an AsyncAlgodClient, so many trips can be driven concurrently by a single process
+# the transactions are built by TripBase, shared with Trip
+
+import asyncio
+import base64
+
+from algosdk import logic as algo_logic
+
+from constants import Constants
+from helpers import algo_helper, teal_assembler
+from models.AccountRegistry import AccountRegistry
+from models.AsyncAlgodClient import AsyncAlgodClient
+from models.AsyncConfirmationTracker import AsyncConfirmationTracker
+from models.AsyncLocalStateReader import AsyncLocalStateReader
+from models.ContractArtifacts import ContractArtifacts
+from models.ProgramCache import ProgramCache
+from models.TripBase import TripBase
+from models.TripState import TripState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncTrip(TripBase):
+    def __init__(self,
+                 algod_client: AsyncAlgodClient,
+                 app_id: int = None,
+                 program_cache: ProgramCache = None,
+                 account_registry: AccountRegistry = None):
+        super().__init__(algod_client, app_id=app_id, program_cache=program_cache,
+                         account_registry=account_registry)
+        self.confirmation_tracker = AsyncConfirmationTracker.for_client(algod_client)
+        self.local_state_reader = AsyncLocalStateReader.for_client(algod_client)
+
+    async def get_compiled_programs(self):
+        """
+        Get the approval and clear state bytecode
+        The artifacts built by compile_contract.py are used when present, checked against the programs in .env,
+        otherwise the pyteal contract is compiled
+        :return: approval program, clear state program
+        """
+        if ContractArtifacts.exists():
+            artifacts = ContractArtifacts.load()
+            return artifacts.get_program("approval", self.approval_program_hash), \
+                artifacts.get_program("clear_state", self.clear_state_program_hash)
+
+        approval_program, clear_program = self.get_contract_sources()
+        return await self.compile_program(approval_program), await self.compile_program(clear_program)
+
+    async def compile_program(self, source_code: str):
+        """
+        Compile a program with the configured compile backend, the local assembler uses the node as fallback
+        The node is called through the async client, see Constants.compile_backend
+        :param source_code:
+        :return:
+        """
+        program = self.program_cache.get(source_code)
+        if program is not None:
+            return program
+
+        if Constants.compile_backend != "algod":
+            try:
+                return algo_helper.compile_program(None, source_code, cache=self.program_cache)
+            except teal_assembler.TealAssemblyError as e:
+                logger.warning("Local assembler failed, compiling with algod: %s", e)
+
+        compile_response = await self.algod_client.compile(source_code)
+        program = base64.b64decode(compile_response['result'])
+        self.program_cache.put(source_code, program)
+        return program
+
+    async def get_escrow_bytes(self):
+        """
+        Get escrow contract compiled program
+        :return:
+        """
+        escrow_bytes = self.get_cached_escrow_bytes()
+        if escrow_bytes is not None:
+            return escrow_bytes
+
+        escrow_bytes = await self.compile_program(self.get_escrow_source())
+        self.escrow_program = (self.app_id, escrow_bytes)
+        return escrow_bytes
+
+    async def get_escrow_address(self):
+        """
+        Return the escrow address
+        :return:
+        """
+        return algo_logic.address(await self.get_escrow_bytes())
+
+    async def send_transactions(self, txns: list):
+        """
+        Submit a transaction or an atomic group and wait for its confirmation
+        :param txns:
+        :return: the pending transaction info of the first transaction
+        """
+        tx_id = await self.algod_client.send_transactions(txns)
+        return await self.confirmation_tracker.wait(tx_id)
+
+    async def read_global_state(self):
+        """
+        Read the app global state
+        :return: trip state, creator, approval program, clear state program
+        """
+        return TripState.from_application_info(await self.algod_client.application_info(self.app_id))
+
+    async def read_local_state(self, address: str):
+        """
+        Read the app local state of an account
+        :param address:
+        :return: ParticipantState, None if the account is not opted in
+        """
+        return await self.local_state_reader.read_participant(address, self.app_id)
+
+    async def read_verified_global_state(self):
+        """
+        Read the app global state and check the app programs
+        :return: trip state
+        """
+        trip_state, _, approval_program, clear_state_program = await self.read_global_state()
+        self.verify_programs(approval_program=approval_program, clear_state_program=clear_state_program)
+        return trip_state
+
+    async def create_app(self,
+                         creator_private_key: str,
+                         trip_creator_name: str,
+                         trip_start_address: str,
+                         trip_end_address: str,
+                         trip_start_date: str,
+                         trip_end_date: str,
+                         trip_cost: int,
+                         trip_available_seats: int):
+        """
+        Create the Smart Contract dApp and start the trip
+        :param creator_private_key:
+        :param trip_creator_name:
+        :param trip_start_address:
+        :param trip_end_address:
+        :param trip_start_date:
+        :param trip_end_date:
+        :param trip_cost:
+        :param trip_available_seats:
+        :return:
+        """
+        approval_program_compiled, clear_state_program_compiled = await self.get_compiled_programs()
+
+        try:
+            status, params = await asyncio.gather(self.algod_client.status(),
+                                                  self.algod_client.suggested_params())
+            txn = self.build_create_txn(creator_private_key=creator_private_key,
+                                        trip_creator_name=trip_creator_name,
+                                        trip_start_address=trip_start_address,
+                                        trip_end_address=trip_end_address,
+                                        trip_start_date=trip_start_date,
+                                        trip_end_date=trip_end_date,
+                                        trip_cost=trip_cost,
+                                        trip_available_seats=trip_available_seats,
+                                        approval_program=approval_program_compiled,
+                                        clear_state_program=clear_state_program_compiled,
+                                        last_round=status["last-round"],
+                                        params=params)
+
+            txn_response = await self.send_transactions([txn])
+            self.app_id = txn_response['application-index']
+            logger.info("Application Created. New app-id: %s", self.app_id)
+        except Exception as e:
+            logger.error("Error during create_app call: %s", e)
+            return False
+
+        return self.app_id
+
+    async def initialize_escrow(self, creator_private_key: str):
+        """
+        Init an escrow contract
+        :param creator_private_key:
+        :return:
+        """
+        try:
+            escrow_address, params = await asyncio.gather(self.get_escrow_address(),
+                                                          self.algod_client.suggested_params())
+            txn = self.build_initialize_escrow_txn(creator_private_key, escrow_address, params=params)
+            await self.send_transactions([txn])
+            logger.info("Escrow initialized for Application with app-id %s with address: %s",
+                        self.app_id, escrow_address)
+        except Exception as e:
+            logger.error("Error during initialize_escrow call: %s", e)
+            return False
+
+    async def fund_escrow(self, creator_private_key: str):
+        """
+        Fund the escrow contract
+        :param creator_private_key:
+        :return:
+        """
+        try:
+            (trip_state, _, _, _), params = await asyncio.gather(self.read_global_state(),
+                                                                   self.algod_client.suggested_params())
+            group = self.build_fund_escrow_group(creator_private_key, trip_state, params=params)
+            await self.send_transactions(group)
+            logger.info("Escrow funded with address: %s", trip_state.escrow_address)
+        except Exception as e:
+            logger.error("Error during fund_escrow: %s", e)
+            return False
+
+    async def participate(self, user_private_key: str, user_name: str):
+        """
+        Add a user to the trip
+        Perform a payment transaction from the user to the escrow
+        Perform a check transaction from the verifier
+        :param user_private_key:
+        :param user_name:
+        """
+        address = self.account_registry.address_of(user_private_key)
+        local_state, params = await asyncio.gather(self.read_local_state(address),
+                                                   self.algod_client.suggested_params())
+        if local_state is None:
+            try:
+                # opt in to write local state
+                await self.send_transactions([self.build_opt_in_txn(user_private_key, params=params)])
+                logger.info("OptIn to Application with app-id: %s", self.app_id)
+            except Exception as e:
+                logger.error("Error during optin call: %s", e)
+
+        try:
+            trip_state = await self.read_verified_global_state()
+            await self.send_transactions(self.build_participation_group(user_private_key, trip_state, params=params))
+            logger.info("Participated to Application with app-id: %s", self.app_id)
+        except Exception as e:
+            logger.error("Error during participation call: %s", e)
+            return False
+
+    async def cancel_participation(self,
+                                   creator_private_key: str,
+                                   user_private_key: str,
+                                   user_name: str):
+        """
+        Cancel user participation to the trip
+        Perform a payment refund transaction from the escrow to the user
+        Perform a check transaction from the verifier
+        :param creator_private_key:
+        :param user_private_key:
+        :param user_name:
+        """
+        try:
+            trip_state, params, escrow_bytes = await asyncio.gather(
+                self.read_verified_global_state(), self.algod_client.suggested_params(), self.get_escrow_bytes())
+            group = self.build_cancel_participation_group(user_private_key, trip_state, escrow_bytes, params=params)
+            await self.send_transactions(group)
+            logger.info("Participation canceled to Application with app-id: %s", self.app_id)
+        except Exception as e:
+            logger.error("Error during participation cancel call: %s", e)
+            return False
+
+    async def start_trip(self, creator_private_key: str):
+        """
+        Start a trip and transfer founding to the creator
+        Perform a payment refund transaction from the escrow to the creator
+        Perform a check transaction from the verifier
+        :param creator_private_key:
+        """
+        try:
+            trip_state, params, escrow_bytes = await asyncio.gather(
+                self.read_verified_global_state(), self.algod_client.suggested_params(), self.get_escrow_bytes())
+            await self.send_transactions(self.build_start_group(creator_private_key, trip_state, escrow_bytes,
+                                                                params=params))
+        except Exception as e:
+            logger.error("Error during start_trip call: %s", e)
+            return False
+
+    async def close_trip(self, creator_private_key: str, participating_users: [dict]):
+        """
+        Close the trip and delete the Smart Contract dApp
+        :param participating_users:
+        :param creator_private_key:
+        :return:
+        """
+        try:
+            params = await self.algod_client.suggested_params()
+            await self.send_transactions([self.build_delete_txn(creator_private_key, params=params)])
+            logger.info("Deleted Application with app-id: %s", self.app_id)
+        except Exception as e:
+            logger.error("Error during delete_app call: %s", e)
+            return False
+
+        async def clear_user(test_user):
+            entry = self.account_registry.resolve(test_user)
+            local_state = await self.read_local_state(entry.address)
+            if local_state is None:
+                return True
+            try:
+                # clear application from user account
+                await self.send_transactions([self.build_clear_txn(entry.private_key, params=params)])
+                logger.info("Cleared app-id: %s", self.app_id)
+                return True
+            except Exception as e:
+                logger.error("Error during clear_app call: %s", e)
+                return False
+
+        results = await asyncio.gather(*[clear_user(test_user) for test_user in participating_users])
+        return all(results)
@@ -0,0 +1,222 @@
+# class to track the confirmation of submitted transactions
+# a single background thread follows the rounds and resolves all the pending transactions together,
+# looking for them in the contents of each new block
+
+import time
+import weakref
+from concurrent.futures import Future
+from threading import Lock, Thread
+
+from algosdk.v2client import algod
+
+from constants import Constants
+from helpers import algo_helper
+from models.LocalStateReader import LocalStateReader
+from models.SuggestedParamsProvider import SuggestedParamsProvider
+
+
+class ConfirmationTimeoutError(Exception):
+    pass
+
+
+class TransactionRejectedError(Exception):
+    pass
+
+
+class ConfirmationTracker:
+    class Variables:
+        # number of rounds to wait for a confirmation before giving up
+        timeout_rounds = Constants.confirmation_max_rounds
+        # seconds to wait for a confirmation before giving up, the rounds are not observed while the node is down
+        timeout_seconds = Constants.confirmation_max_rounds * Constants.block_speed
+        # consecutive node errors after which all the pending transactions fail
+        max_node_errors = 5
+
+    trackers = weakref.WeakKeyDictionary()
+    trackers_lock = Lock()
+
+    def __init__(self,
+                 algod_client: algod.AlgodClient,
+                 timeout_rounds: int = None,
+                 timeout_seconds: float = None,
+                 max_node_errors: int = None):
+        # the trackers are kept by client in a WeakKeyDictionary, the client must not be referenced strongly
+        self.client_ref = weakref.ref(algod_client)
+        self.timeout_rounds = timeout_rounds if timeout_rounds is not None else self.Variables.timeout_rounds
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else self.Variables.timeout_seconds
+        self.max_node_errors = max_node_errors if max_node_errors is not None else self.Variables.max_node_errors
+        # tx_id -> (future, round at submission, deadline)
+        self.pending = {}
+        self.last_round = None
+        self.thread = None
+        self.lock = Lock()
+        # the rounds seen by the tracker move the first valid round of the next transactions
+        # and expire the account indexes cached by the local state reader
+        self.params_provider = SuggestedParamsProvider.for_client(algod_client)
+        self.local_state_reader = LocalStateReader.for_client(algod_client)
+
+    @property
+    def algod_client(self):
+        return self.client_ref()
+
+    @classmethod
+    def for_client(cls, algod_client: algod.AlgodClient):
+        """
+        Get the tracker shared by all the callers of the given algod client
+        :param algod_client:
+        :return:
+        """
+        with cls.trackers_lock:
+            tracker = cls.trackers.get(algod_client)
+            if tracker is None:
+                tracker = cls(algod_client)
+                cls.trackers[algod_client] = tracker
+            return tracker
+
+    def track(self, tx_id: str):
+        """
+        Track a submitted transaction
+        :param tx_id:
+        :return: a Future resolved with the confirmation info once confirmed: confirmed-round, pool-error and
+            application-index of a created app, not the full pending transaction info
+        """
+        with self.lock:
+            if tx_id in self.pending:
+                return self.pending[tx_id][0]
+            future = Future()
+            future.tx_id = tx_id
+            self.pending[tx_id] = (future, self.last_round, time.monotonic() + self.timeout_seconds)
+            if self.thread is None:
+                self.thread = Thread(target=self._run, name="confirmation-tracker", daemon=True)
+                self.thread.start()
+        return future
+
+    def _run(self):
+        """
+        Follow the rounds until there are no more pending transactions
+        """
+        # keeps the client alive while transactions are pending
+        algod_client = self.algod_client
+        check_pool = True
+        node_errors = 0
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+                # transactions tracked since the last check could be confirmed in an already inspected block
+                pending = [tx_id for tx_id, (_, submitted_round, _) in self.pending.items()
+                           if check_pool or submitted_round is None]
+
+            try:
+                if algod_client is None:
+                    raise ReferenceError("The algod client of the tracker was garbage collected")
+                if self.last_round is None:
+                    self.last_round = algod_client.status().get("last-round")
+                    self._observe_round(self.last_round)
+                if pending:
+                    self._check_pool(pending)
+                    self._check_timeouts()
+                    if not self.pending:
+                        continue
+
+                # wait for the next round, all the pending transactions are checked once per round
+                new_round = algod_client.status_after_block(self.last_round).get("last-round")
+                check_pool = not self._check_blocks(self.last_round + 1, new_round)
+                self.last_round = new_round
+                self._observe_round(new_round)
+                node_errors = 0
+                self._check_timeouts()
+            except Exception as e:
+                # node not reachable, retry after a block time until too many consecutive errors
+                check_pool = True
+                node_errors += 1
+                if node_errors >= self.max_node_errors:
+                    node_errors = 0
+                    self._fail_pending(e)
+                    continue
+                self._check_timeouts()
+                time.sleep(Constants.block_speed)
+
+    def _observe_round(self, round_number: int):
+        self.params_provider.observe_round(round_number)
+        self.local_state_reader.observe_round(round_number)
+
+    def _fail_pending(self, error: Exception):
+        """
+        Fail all the pending transactions
+        :param error: last node error
+        """
+        with self.lock:
+            tx_ids = list(self.pending)
+        for tx_id in tx_ids:
+            self._resolve(tx_id, exception=ConfirmationTimeoutError(
+                "Transaction {} not confirmed, node not reachable: {}".format(tx_id, error)))
+
+    def _check_blocks(self, first_round: int, last_round: int):
+        """
+        Resolve the pending transactions confirmed in the given rounds
+        :param first_round:
+        :param last_round:
+        :return: False if the blocks are not available
+        """
+        for round_number in range(first_round, last_round + 1):
+            confirmed = algo_helper.get_block_transactions(self.algod_client, round_number)
+            if confirmed is None:
+                return False
+            with self.lock:
+                found = [tx_id for tx_id in self.pending if tx_id in confirmed]
+            for tx_id in found:
+                self._resolve(tx_id, result=confirmed[tx_id])
+        return True
+
+    def _check_pool(self, tx_ids: [str]):
+        """
+        Check the pending transactions in the transactions pool
+        :param tx_ids:
+        """
+        for tx_id, txinfo in algo_helper.check_pending_transactions(self.algod_client, tx_ids).items():
+            if isinstance(txinfo, Exception):
+                self._resolve(tx_id, exception=txinfo)
+            elif txinfo.get("confirmed-round", 0) > 0:
+                self._resolve(tx_id, result=txinfo)
+            elif txinfo.get("pool-error"):
+                self._resolve(tx_id, exception=TransactionRejectedError(
+                    "Transaction {} rejected: {}".format(tx_id, txinfo["pool-error"])))
+
+    def _check_timeouts(self):
+        """
+        Fail the transactions not confirmed after timeout_rounds or timeout_seconds
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.last_round is not None:
+                for tx_id, (future, submitted_round, deadline) in list(self.pending.items()):
+                    if submitted_round is None:
+                        self.pending[tx_id] = (future, self.last_round, deadline)
+            expired = [tx_id for tx_id, (_, submitted_round, deadline) in self.pending.items()
+                       if now >= deadline or (submitted_round is not None
+                                              and self.last_round - submitted_round >= self.timeout_rounds)]
+        for tx_id in expired:
+            self._resolve(tx_id, exception=ConfirmationTimeoutError(
+                "Transaction {} not confirmed after {} rounds or {} seconds".format(tx_id, self.timeout_rounds,
+                                                                                   self.timeout_seconds)))
+
+    def _resolve(self, tx_id: str, result=None, exception: Exception = None):
+        """
+        Remove a transaction from the pending ones and resolve its future
+        :param tx_id:
+        :param result:
+        :param exception:
+        """
+        with self.lock:
+            entry = self.pending.pop(tx_id, None)
+        if entry is None:
+            # already resolved
+            return
+        future = entry[0]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            self._observe_round(result.get("confirmed-round"))
+            future.set_result(result)
@@ -0,0 +1,116 @@
+# class to load the contract programs built by compile_contract.py
+# the build writes the TEAL sources, the compiled bytecode and a manifest with the bytecode hashes,
+# deployments load the bytecode from there instead of running the pyteal compiler
+
+import base64
+import hashlib
+import json
+import os
+from threading import Lock
+
+from constants import Constants
+
+
+class ArtifactError(Exception):
+    pass
+
+
+class ContractArtifacts:
+    class Variables:
+        manifest_file = "manifest.json"
+        manifest_version = 1
+
+    loaded = {}
+    loaded_lock = Lock()
+
+    def __init__(self, directory: str, manifest: dict, programs: dict):
+        self.directory = directory
+        self.manifest = manifest
+        # program name -> bytecode
+        self.programs = programs
+
+    @classmethod
+    def exists(cls, directory: str = None):
+        directory = directory if directory is not None else Constants.compiled_dir
+        return os.path.isfile(os.path.join(directory, cls.Variables.manifest_file))
+
+    @classmethod
+    def load(cls, directory: str = None):
+        """
+        Load the artifacts of a build directory, memoized until the manifest changes
+        :param directory: defaults to Constants.compiled_dir
+        :return:
+        """
+        directory = directory if directory is not None else Constants.compiled_dir
+        manifest_path = os.path.join(directory, cls.Variables.manifest_file)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            raise ArtifactError("No contract artifacts in {}, run compile_contract.py".format(directory))
+
+        with cls.loaded_lock:
+            cached = cls.loaded.get(directory)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") != cls.Variables.manifest_version:
+                raise ArtifactError("Unsupported manifest version: {}".format(manifest.get("version")))
+
+            programs = {}
+            for name, entry in manifest["programs"].items():
+                with open(os.path.join(directory, entry["bytecode"]), "rb") as f:
+                    program = f.read()
+                if hashlib.sha256(program).hexdigest() != entry["sha256"]:
+                    raise ArtifactError("Bytecode of the {} program does not match the manifest".format(name))
+                programs[name] = program
+
+            artifacts = cls(directory, manifest, programs)
+            cls.loaded[directory] = (mtime, artifacts)
+            return artifacts
+
+    @classmethod
+    def write(cls, directory: str, teal_version: int, programs: dict):
+        """
+        Write the artifacts of a build
+        :param directory:
+        :param teal_version:
+        :param programs: program name -> (TEAL source, bytecode)
+        :return: the manifest
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest = {"version": cls.Variables.manifest_version, "teal_version": teal_version, "programs": {}}
+        for name, (source, program) in programs.items():
+            teal_file = "carsharing_{}.teal".format(name)
+            bytecode_file = "carsharing_{}.bin".format(name)
+            with open(os.path.join(directory, teal_file), "w") as f:
+                f.write(source)
+            with open(os.path.join(directory, bytecode_file), "wb") as f:
+                f.write(program)
+            manifest["programs"][name] = {
+                "teal": teal_file,
+                "bytecode": bytecode_file,
+                "sha256": hashlib.sha256(program).hexdigest(),
+                # same encoding as the programs returned by the node and stored in .env
+                "base64": base64.b64encode(program).decode("ascii"),
+            }
+        # the manifest is written last, a build interrupted before it is not picked up
+        with open(os.path.join(directory, cls.Variables.manifest_file), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        return manifest
+
+    def get_program(self, name: str, expected: str = None):
+        """
+        Get a compiled program
+        :param name: "approval" or "clear_state"
+        :param expected: expected program in base64, as APPROVAL_PROGRAM / CLEAR_STATE_PROGRAM
+        :return: bytecode
+        """
+        program = self.programs.get(name)
+        if program is None:
+            raise ArtifactError("No {} program in {}".format(name, self.directory))
+        if expected is not None and self.manifest["programs"][name]["base64"] != expected:
+            raise ArtifactError("The {} program in {} does not match the expected program".format(name,
+                                                                                                 self.directory))
+        return program
@@ -0,0 +1,261 @@
+# class to start the trips at their departure round
+# the pending departures are kept in a priority queue ordered by departure round, on each new round
+# the start groups of all the due trips are submitted together and confirmed in the same rounds,
+# a rejected start is queued again for the next round
+
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from threading import Event, Lock, Thread
+
+from algosdk.v2client import algod
+
+from constants import Constants
+from models.ApplicationManager import ApplicationManager
+from models.TripState import TripState
+from smart_contracts.carsharing_interface import AppState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Departure:
+    __slots__ = ("trip", "creator_private_key", "departure_round", "lock", "next_round", "attempts", "last_error")
+
+    def __init__(self, trip, creator_private_key: str, departure_round: int, lock=None):
+        self.trip = trip
+        self.creator_private_key = creator_private_key
+        self.departure_round = departure_round
+        # lock of the creator operations of the trip, taken while the start group is built and submitted
+        self.lock = lock
+        # round of the next attempt
+        self.next_round = departure_round
+        self.attempts = 0
+        self.last_error = None
+
+    @property
+    def app_id(self):
+        return self.trip.app_id
+
+    def __repr__(self):
+        return "Departure(app_id={}, departure_round={}, next_round={}, attempts={})".format(
+            self.app_id, self.departure_round, self.next_round, self.attempts)
+
+
+class DepartureScheduler:
+    class Variables:
+        # max number of start attempts of a trip before giving up
+        max_attempts = 5
+        # max number of trips read and submitted at the same time
+        max_workers = 16
+
+    def __init__(self,
+                 algod_client: algod.AlgodClient,
+                 on_started=None,
+                 on_failed=None,
+                 max_attempts: int = None,
+                 max_workers: int = None):
+        """
+        :param algod_client:
+        :param on_started: called with the Departure of each started trip, from the scheduler thread
+        :param on_failed: called with the Departure of each trip given up after max_attempts
+        :param max_attempts:
+        :param max_workers:
+        """
+        self.algod_client = algod_client
+        self.on_started = on_started
+        self.on_failed = on_failed
+        self.max_attempts = max_attempts if max_attempts is not None else self.Variables.max_attempts
+        self.max_workers = max_workers if max_workers is not None else self.Variables.max_workers
+        # created on first use and again after stop()
+        self.executor = None
+        # app_id -> Departure
+        self.departures = {}
+        # (next_round, sequence, Departure), entries of cancelled or rescheduled departures are skipped when popped
+        self.queue = []
+        self.sequence = itertools.count()
+        self.lock = Lock()
+        self.last_round = None
+        self.thread = None
+        self.stopped = Event()
+
+    def schedule(self, trip, creator_private_key: str, departure_round: int, lock=None):
+        """
+        Schedule the start of a trip, replacing its previous schedule
+        :param trip: Trip
+        :param creator_private_key:
+        :param departure_round:
+        :param lock: lock of the creator operations of the trip, if any
+        :return: Departure
+        """
+        departure = Departure(trip, creator_private_key, departure_round, lock)
+        with self.lock:
+            self.departures[trip.app_id] = departure
+            self._push(departure)
+        return departure
+
+    def cancel(self, app_id: int):
+        """
+        Cancel the start of a trip
+        :param app_id:
+        :return: the cancelled Departure, None if not scheduled
+        """
+        with self.lock:
+            return self.departures.pop(app_id, None)
+
+    def get_departures(self):
+        """
+        Get the pending departures, the earliest first
+        :return: list of Departure
+        """
+        with self.lock:
+            return sorted(self.departures.values(), key=lambda departure: departure.next_round)
+
+    def _is_scheduled(self, departure: Departure):
+        with self.lock:
+            return self.departures.get(departure.app_id) is departure
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="departures")
+            return self.executor
+
+    def _push(self, departure: Departure):
+        heapq.heappush(self.queue, (departure.next_round, next(self.sequence), departure))
+
+    def _pop_due(self, round_number: int):
+        """
+        Pop the departures due at a round
+        :param round_number:
+        :return: list of Departure
+        """
+        due = []
+        with self.lock:
+            while self.queue and self.queue[0][0] <= round_number:
+                next_round, _, departure = heapq.heappop(self.queue)
+                if self.departures.get(departure.app_id) is departure and departure.next_round == next_round:
+                    due.append(departure)
+        return due
+
+    def start(self):
+        """
+        Follow the rounds in a background thread
+        """
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = Thread(target=self._run, name="departure-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop following the rounds, the current wait for a new block is not interrupted
+        The scheduler can be started again
+        :param timeout:
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                if self.last_round is None:
+                    self.last_round = self.algod_client.status().get("last-round")
+                else:
+                    self.last_round = self.algod_client.status_after_block(self.last_round).get("last-round")
+                self.on_round(self.last_round)
+            except Exception as e:
+                # node not reachable, retry after a block time
+                logger.warning("Departure scheduler error: %s", e)
+                self.stopped.wait(Constants.block_speed)
+
+    def on_round(self, round_number: int):
+        """
+        Start the trips due at a round, all their start groups are submitted before waiting for the confirmations
+        :param round_number: last round of the node
+        :return: dict of app_id -> True if started, False if rescheduled or given up
+        """
+        due = self._pop_due(round_number)
+        if not due:
+            return {}
+
+        # reading the states and submitting the groups run concurrently, the confirmations are then
+        # resolved together by the ConfirmationTracker
+        submissions = list(self._get_executor().map(self._submit, due))
+        results = {}
+        for departure, pending_txn in submissions:
+            if isinstance(pending_txn, Exception):
+                results[departure.app_id] = self._rejected(departure, pending_txn, round_number)
+                continue
+            try:
+                if pending_txn is not None:
+                    pending_txn.result()
+            except Exception as e:
+                results[departure.app_id] = self._rejected(departure, e, round_number)
+                continue
+            results[departure.app_id] = self._started(departure)
+
+        logger.info("Round %s: %s of %s trips started", round_number, sum(results.values()), len(results))
+        return results
+
+    def _submit(self, departure: Departure):
+        """
+        Build and submit the start group of a trip, under the lock of the trip operations
+        :param departure:
+        :return: (departure, pending group future, None if the trip is already finished or no longer scheduled,
+            or the exception)
+        """
+        try:
+            with departure.lock if departure.lock is not None else nullcontext():
+                # cancelled while waiting for the lock, e.g. by a close of the trip
+                if not self._is_scheduled(departure):
+                    return departure, None
+                trip_state, _, approval_program, clear_state_program = TripState.read(self.algod_client,
+                                                                                      departure.app_id)
+                if trip_state.app_state == AppState.finished:
+                    return departure, None
+                departure.trip.verify_programs(approval_program=approval_program,
+                                               clear_state_program=clear_state_program)
+                group = departure.trip.build_start_group(departure.creator_private_key, trip_state,
+                                                         departure.trip.escrow_bytes)
+                return departure, ApplicationManager.submit_group_transactions(self.algod_client, group)
+        except Exception as e:
+            return departure, e
+
+    def _started(self, departure: Departure):
+        with self.lock:
+            if self.departures.get(departure.app_id) is not departure:
+                # cancelled or rescheduled in the meantime, the start is no longer ours to report
+                return False
+            del self.departures[departure.app_id]
+        logger.info("Trip %s started", departure.app_id)
+        if self.on_started is not None:
+            self.on_started(departure)
+        return True
+
+    def _rejected(self, departure: Departure, error: Exception, round_number: int):
+        departure.attempts += 1
+        departure.last_error = str(error)
+        with self.lock:
+            if self.departures.get(departure.app_id) is not departure:
+                # cancelled or rescheduled in the meantime
+                return False
+            if departure.attempts < self.max_attempts:
+                departure.next_round = round_number + 1
+                self._push(departure)
+                logger.warning("Start of trip %s rejected, retrying on round %s: %s", departure.app_id,
+                               departure.next_round, error)
+                return False
+            del self.departures[departure.app_id]
+        logger.error("Start of trip %s given up after %s attempts: %s", departure.app_id, departure.attempts, error)
+        if self.on_failed is not None:
+            self.on_failed(departure)
+        return False
@@ -1,33 +1,107 @@
 # class to manage algorand indexer
 
-from algosdk.v2client import indexer
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+
+from models.InstrumentedClient import InstrumentedIndexerClient
+from models.NodeMetrics import MetricsSink
 
 
 class IndexerHelper:
+    class Variables:
+        # number of transactions requested per indexer page
+        page_size = 1000
+        # max number of simultaneous application lookups
+        max_workers = 16
+        # number of cached applications above which the entries of past rounds are dropped
+        cache_size = 1024
+
     indexerObj = None
 
-    def __init__(self, host="http://localhost:8980", token=""):
-        self.indexerObj = indexer.IndexerClient(indexer_token=token, indexer_address=host)
+    def __init__(self, host="http://localhost:8980", token="", metrics_sink: MetricsSink = None):
+        """
+        :param host:
+        :param token:
+        :param metrics_sink: receiver of the request metrics, see NodeMetrics
+        """
+        self.indexerObj = InstrumentedIndexerClient(indexer_token=token, indexer_address=host,
+                                                    metrics_sink=metrics_sink)
+        self.executor = None
+        # (app_id, include_all) -> future of the running lookup
+        self.pending_applications = {}
+        # (app_id, include_all) -> (current round of the response, response), valid until a newer round is observed
+        self.applications_cache = {}
+        # newest indexer round observed in the responses or given to observe_round
+        self.last_round = 0
+        self.lock = Lock()
+
+    def observe_round(self, round_number: int):
+        """
+        Notify a round reached by the indexer, the applications cached at older rounds are looked up again
+        :param round_number:
+        """
+        with self.lock:
+            self.last_round = max(self.last_round, round_number or 0)
+
+    def close(self):
+        """
+        Stop the lookup workers once the running lookups are done, new lookups start new workers
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
 
-    def get_app_ids_from_transactions_note(self, note):
+    def get_app_ids_from_transactions_note(self, note, min_round=None, max_round=None):
         """
         Get application ids from transaction with given note
         :param note:
+        :param min_round:
+        :param max_round:
         :return:
         """
-        note_prefix = note.encode()
-
-        # instantiate indexer client
-        response = self.indexerObj.search_transactions(note_prefix=note_prefix, txn_type="appl")
-        # print("note_prefix = " + json.dumps(response, indent=2, sort_keys=True))
-        transactions = response['transactions'] if "transactions" in response else []
+        return list(self.iter_app_ids_from_transactions_note(note, min_round=min_round, max_round=max_round))
 
-        ids = []
-        for transaction in transactions:
+    def iter_app_ids_from_transactions_note(self, note, min_round=None, max_round=None, page_size=None):
+        """
+        Yield the ids of the applications created by transactions with given note, following the indexer pagination
+        :param note:
+        :param min_round:
+        :param max_round:
+        :param page_size:
+        :return:
+        """
+        for transaction in self.iter_transactions_note(note, min_round=min_round, max_round=max_round,
+                                                       page_size=page_size):
             id = self._get_app_id_from_transaction(transaction)
             if id is not None:
-                ids.append(id)
-        return ids
+                yield id
+
+    def iter_transactions_note(self, note, min_round=None, max_round=None, page_size=None):
+        """
+        Yield the application transactions with given note, one indexer page is requested at a time
+        :param note:
+        :param min_round:
+        :param max_round:
+        :param page_size:
+        :return:
+        """
+        note_prefix = note.encode()
+        limit = page_size if page_size is not None else self.Variables.page_size
+
+        next_page = None
+        while True:
+            response = self.indexerObj.search_transactions(note_prefix=note_prefix, txn_type="appl", limit=limit,
+                                                           next_page=next_page, min_round=min_round,
+                                                           max_round=max_round)
+            self.observe_round(response.get("current-round"))
+            transactions = response['transactions'] if "transactions" in response else []
+            yield from transactions
+
+            # the indexer may return less than the requested limit on pages that are not the last one
+            next_page = response.get("next-token")
+            if not next_page or not transactions:
+                return
 
     @staticmethod
     def _get_app_id_from_transaction(transaction):
@@ -36,9 +110,66 @@ class IndexerHelper:
         :param transaction:
         :return:
         """
-        print(transaction)
         return transaction["created-application-index"] if "created-application-index" in transaction else None
 
     def get_application_from_id(self, appid):
         response = self.indexerObj.search_applications(application_id=appid)
         return response
+
+    def get_applications_from_ids(self, app_ids, include_all=False, return_exceptions=False):
+        """
+        Get many applications concurrently
+        Lookups for the same id share a single request, responses are reused until a newer indexer round is
+        observed, from another response or through observe_round
+        :param app_ids:
+        :param include_all: include the deleted applications
+        :param return_exceptions: return the error of a failed lookup as its response instead of raising it
+        :return: dict of app id -> indexer application response
+        """
+        futures = {app_id: self._lookup_application(app_id, include_all) for app_id in dict.fromkeys(app_ids)}
+        if not return_exceptions:
+            return {app_id: future.result() for app_id, future in futures.items()}
+        return {app_id: future.exception() or future.result() for app_id, future in futures.items()}
+
+    def _lookup_application(self, app_id, include_all):
+        """
+        Get a future of an application lookup, from the cache or the running requests when possible
+        :param app_id:
+        :param include_all:
+        :return:
+        """
+        key = (app_id, include_all)
+        with self.lock:
+            cached = self.applications_cache.get(key)
+            if cached is not None and cached[0] >= self.last_round:
+                future = Future()
+                future.set_result(cached[1])
+                return future
+
+            future = self.pending_applications.get(key)
+            if future is None:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.Variables.max_workers)
+                future = self.executor.submit(self._fetch_application, key)
+                self.pending_applications[key] = future
+            return future
+
+    def _fetch_application(self, key):
+        """
+        Request an application from the indexer and cache the response
+        :param key: (app_id, include_all)
+        :return:
+        """
+        try:
+            response = self.indexerObj.applications(key[0], include_all=key[1])
+            round_number = response.get("current-round", 0)
+            with self.lock:
+                self.last_round = max(self.last_round, round_number)
+                if len(self.applications_cache) >= self.Variables.cache_size:
+                    self.applications_cache = {k: v for k, v in self.applications_cache.items()
+                                               if v[0] >= self.last_round}
+                self.applications_cache[key] = (round_number, response)
+            return response
+        finally:
+            with self.lock:
+                self.pending_applications.pop(key, None)
@@ -0,0 +1,214 @@
+# algod and indexer clients recording every request to a MetricsSink
+# the SDK parses the responses before returning them, so the instrumented clients make the requests themselves,
+# as the SDK does, and count the bytes of the responses while the SDK parsing reads them
+
+import json
+import re
+import time
+import urllib.error
+from urllib import parse
+from urllib.request import Request, urlopen
+
+from algosdk import constants, error
+from algosdk.v2client import algod, indexer
+
+from models.NodeMetrics import MetricsSink, RequestRecord
+
+# path segments replaced in the endpoint names, so the metrics are per endpoint and not per account or app
+_endpoint_patterns = [
+    (re.compile(r"^[A-Z2-7]{58}$"), "{address}"),
+    (re.compile(r"^[A-Z2-7]{52}$"), "{txid}"),
+    (re.compile(r"^\d+$"), "{id}"),
+]
+
+
+def endpoint_name(method: str, requrl: str):
+    """
+    Get the endpoint name of a request
+    :param method:
+    :param requrl: path as given to the SDK request method, without query
+    :return:
+    """
+    segments = []
+    for segment in requrl.split("/"):
+        for pattern, placeholder in _endpoint_patterns:
+            if pattern.match(segment):
+                segment = placeholder
+                break
+        segments.append(segment)
+    return "{} {}".format(method, "/".join(segments))
+
+
+class _RequestProbe:
+    __slots__ = ("status", "bytes_received")
+
+    def __init__(self):
+        self.status = None
+        self.bytes_received = 0
+
+
+class _CountingResponse:
+    """
+    Response wrapper counting the bytes read by the SDK
+    """
+
+    def __init__(self, response, probe: _RequestProbe):
+        self.response = response
+        self.probe = probe
+
+    def read(self, *args):
+        data = self.response.read(*args)
+        self.probe.bytes_received += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+
+def _build_request(address: str, auth_header: str, token: str, method: str, requrl: str, params, data,
+                   client_headers, headers):
+    """
+    Build the request of an SDK client call, as the SDK request methods do
+    :param token: None if the client sends no token
+    :return: urllib Request
+    """
+    header = {"User-Agent": "py-algorand-sdk"}
+    if client_headers:
+        header.update(client_headers)
+    if headers:
+        header.update(headers)
+    if requrl not in constants.no_auth and token is not None:
+        header.update({auth_header: token})
+
+    if requrl not in constants.unversioned_paths:
+        requrl = algod.api_version_path_prefix + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return Request(address + requrl, headers=header, method=method, data=data)
+
+
+def _open(request: Request, probe: _RequestProbe):
+    """
+    Open a request, recording its status and counting the bytes read from the response
+    :param request:
+    :param probe:
+    :return: the response
+    :raise urllib.error.HTTPError: with the body already read, as (status, message)
+    """
+    try:
+        response = urlopen(request)
+    except urllib.error.HTTPError as e:
+        probe.status = e.code
+        body = e.read()
+        probe.bytes_received += len(body)
+        message = body.decode("utf-8")
+        try:
+            message = json.loads(message)["message"]
+        except Exception:
+            pass
+        e.message = message
+        raise
+    probe.status = response.status
+    return _CountingResponse(response, probe)
+
+
+def _measure(sink: MetricsSink, client: str, method: str, requrl: str, data, request):
+    """
+    Run a request and record it
+    :param sink:
+    :param client: "algod" or "indexer"
+    :param method:
+    :param requrl:
+    :param data: request body
+    :param request: function making the request, called with the _RequestProbe of the request
+    :return: response of the request
+    """
+    probe = _RequestProbe()
+    error_name = None
+    start = time.perf_counter()
+    try:
+        return request(probe)
+    except Exception as e:
+        error_name = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        try:
+            sink.record(RequestRecord(client, endpoint_name(method, requrl), seconds, probe.status, error_name,
+                                      len(data) if data else 0, probe.bytes_received))
+        except Exception:
+            # a failing sink must not fail the request
+            pass
+
+
+class InstrumentedAlgodClient(algod.AlgodClient):
+    def __init__(self, algod_token: str, algod_address: str, headers: dict = None, metrics_sink: MetricsSink = None):
+        """
+        :param algod_token:
+        :param algod_address:
+        :param headers:
+        :param metrics_sink: receiver of the request records, the client is not instrumented if None
+        """
+        super().__init__(algod_token, algod_address, headers)
+        self.metrics_sink = metrics_sink
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        if self.metrics_sink is None:
+            return super().algod_request(method, requrl, params, data, headers, response_format)
+        return _measure(self.metrics_sink, "algod", method, requrl, data,
+                        lambda probe: self._request(probe, method, requrl, params, data, headers, response_format))
+
+    def _request(self, probe: _RequestProbe, method, requrl, params, data, headers, response_format):
+        """
+        Same as AlgodClient.algod_request, reading the response through the probe
+        """
+        request = _build_request(self.algod_address, constants.algod_auth_header, self.algod_token, method, requrl,
+                                 params, data, self.headers, headers)
+        try:
+            response = _open(request, probe)
+        except urllib.error.HTTPError as e:
+            raise error.AlgodHTTPError(e.message, e.code)
+        if response_format == "json":
+            try:
+                return json.load(response)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return response.read()
+
+
+class InstrumentedIndexerClient(indexer.IndexerClient):
+    def __init__(self, indexer_token: str, indexer_address: str, headers: dict = None,
+                 metrics_sink: MetricsSink = None):
+        """
+        :param indexer_token:
+        :param indexer_address:
+        :param headers:
+        :param metrics_sink: receiver of the request records, the client is not instrumented if None
+        """
+        super().__init__(indexer_token, indexer_address, headers)
+        self.metrics_sink = metrics_sink
+
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None):
+        if self.metrics_sink is None:
+            return super().indexer_request(method, requrl, params, data, headers)
+        return _measure(self.metrics_sink, "indexer", method, requrl, data,
+                        lambda probe: self._request(probe, method, requrl, params, data, headers))
+
+    def _request(self, probe: _RequestProbe, method, requrl, params, data, headers):
+        """
+        Same as IndexerClient.indexer_request, reading the response through the probe
+        """
+        request = _build_request(self.indexer_address, constants.indexer_auth_header, self.indexer_token or None, method,
+                                 requrl, params, data, self.headers, headers)
+        try:
+            response = _open(request, probe)
+        except urllib.error.HTTPError as e:
+            raise error.IndexerHTTPError(e.message)
+        return _sort_dict(json.loads(response.read().decode("utf-8")))
+
+
+def _sort_dict(dictionary: dict):
+    """
+    Sort the keys of a response recursively, as IndexerClient.indexer_request does
+    """
+    return {k: _sort_dict(v) if isinstance(v, dict) else v for k, v in sorted(dictionary.items())}
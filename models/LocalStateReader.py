@@ -0,0 +1,194 @@
+# class to read the local state of an application from user accounts
+# uses the per-application account endpoint when the node supports it,
+# otherwise caches a per-address index of app id -> local state for the current round,
+# the rounds reached by the node are observed by the ConfirmationTracker
+
+import weakref
+from threading import Lock
+
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+from helpers import algo_helper
+from models.TripState import ParticipantState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class LocalStateReader:
+    readers = weakref.WeakKeyDictionary()
+    readers_lock = Lock()
+
+    def __init__(self, algod_client: algod.AlgodClient):
+        # the readers are kept by client in a WeakKeyDictionary, the client must not be referenced strongly
+        self.client_ref = weakref.ref(algod_client)
+        # None until the first request tells if the node serves /accounts/{address}/applications/{app_id}
+        self.per_app_endpoint = None
+        # address -> (round, {app_id: local state}), valid until a newer round is observed
+        self.accounts = {}
+        # last known round of the node
+        self.last_round = None
+        self.lock = Lock()
+
+    @property
+    def algod_client(self):
+        algod_client = self.client_ref()
+        if algod_client is None:
+            raise ReferenceError("The algod client of the reader was garbage collected")
+        return algod_client
+
+    @classmethod
+    def for_client(cls, algod_client: algod.AlgodClient):
+        """
+        Get the reader shared by all the callers of the given algod client
+        :param algod_client:
+        :return:
+        """
+        with cls.readers_lock:
+            reader = cls.readers.get(algod_client)
+            if reader is None:
+                reader = cls(algod_client)
+                cls.readers[algod_client] = reader
+            return reader
+
+    def read(self, address: str, app_id: int, show: bool = False):
+        """
+        Read the local state of an application from a user account
+        :param address:
+        :param app_id:
+        :param show:
+        :return: the formatted local state, None if the account is not opted in or the state is empty
+        """
+        return self._format(self._lookup(address, app_id), show)
+
+    def read_participant(self, address: str, app_id: int):
+        """
+        Read the participant state of a trip from a user account
+        :param address:
+        :param app_id:
+        :return: ParticipantState, None if the account is not opted in or the state is empty
+        """
+        return self.read_opt_in(address, app_id)[1]
+
+    def read_opt_in(self, address: str, app_id: int):
+        """
+        Read if a user account is opted in to an application, and its participant state
+        The opt-in writes no local state, an opted in account has no participant state until it participates
+        :param address:
+        :param app_id:
+        :return: True if the account is opted in, ParticipantState or None if the state is empty
+        """
+        local_state = self._lookup(address, app_id)
+        if local_state is None:
+            return False, None
+        if "key-value" not in local_state:
+            return True, None
+        return True, ParticipantState.from_state(local_state["key-value"])
+
+    def _lookup(self, address: str, app_id: int):
+        """
+        Get the raw local state entry of an application in a user account
+        :param address:
+        :param app_id:
+        :return:
+        """
+        if self.per_app_endpoint is not False:
+            try:
+                results = self.algod_client.algod_request("GET", self.per_app_path(address, app_id))
+                self.per_app_endpoint = True
+                return results.get("app-local-state")
+            except AlgodHTTPError as e:
+                self.per_app_endpoint = self.check_per_app_error(e, self.per_app_endpoint)
+                if self.per_app_endpoint:
+                    return None
+
+        return self._get_account_apps(address).get(app_id)
+
+    @staticmethod
+    def per_app_path(address: str, app_id: int):
+        """
+        Path of the per-application account endpoint
+        :param address:
+        :param app_id:
+        :return:
+        """
+        return "/accounts/{}/applications/{}".format(address, app_id)
+
+    @staticmethod
+    def check_per_app_error(error: AlgodHTTPError, per_app_endpoint: bool):
+        """
+        Tell from an error of the per-application endpoint if the node serves it
+        :param error:
+        :param per_app_endpoint: None if not known yet
+        :return: True if the account is just not opted in, False if the route is not available on the node
+        """
+        if error.code != 404:
+            raise error
+        # a generic "Not Found" means the route itself is not available on this node
+        return bool(per_app_endpoint or str(error) != "Not Found")
+
+    @staticmethod
+    def index_account_apps(account_info: dict):
+        """
+        Index the local states of an account info by app id
+        :param account_info:
+        :return:
+        """
+        return {local_state["id"]: local_state for local_state in account_info.get("apps-local-state", [])}
+
+    def observe_round(self, round_number: int):
+        """
+        Notify a round reached by the node, the account indexes read at older rounds are read again
+        :param round_number: last round of the node or confirmed round of a transaction
+        """
+        if round_number is None:
+            return
+        with self.lock:
+            if self.last_round is None or round_number > self.last_round:
+                self.last_round = round_number
+
+    def invalidate(self, address: str = None):
+        """
+        Drop the cached local states of an address, or of all the addresses
+        :param address:
+        """
+        with self.lock:
+            if address is None:
+                self.accounts.clear()
+            else:
+                self.accounts.pop(address, None)
+
+    def _get_account_apps(self, address: str):
+        """
+        Get the index of app id -> local state of an account, valid until a newer round is observed
+        :param address:
+        :return:
+        """
+        with self.lock:
+            cached = self.accounts.get(address)
+            if cached is not None and cached[0] is not None and \
+                    (self.last_round is None or cached[0] >= self.last_round):
+                return cached[1]
+
+        results = self.algod_client.account_info(address)
+        apps = self.index_account_apps(results)
+        self.observe_round(results.get("round"))
+        with self.lock:
+            self.accounts[address] = (results.get("round"), apps)
+        return apps
+
+    @staticmethod
+    def _format(local_state: dict, show: bool):
+        """
+        Format a local state entry
+        :param local_state:
+        :param show:
+        :return:
+        """
+        if local_state is None or "key-value" not in local_state:
+            return None
+        output = algo_helper.format_state(local_state["key-value"])
+        if show:
+            logger.info("Local State:\n%s", output, extra={'color': 'blue'})
+        return output
@@ -0,0 +1,261 @@
+# metrics of the requests to the algod and indexer nodes
+# the instrumented clients (see InstrumentedClient) hand a RequestRecord for every call to a sink:
+# kept in memory, written as a Prometheus text file or passed to a callback
+
+import atexit
+import bisect
+import os
+import tempfile
+from threading import Condition, Event, Lock, Thread
+
+from constants import Constants
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class RequestRecord:
+    __slots__ = ("client", "endpoint", "seconds", "status", "error", "bytes_sent", "bytes_received")
+
+    def __init__(self, client: str, endpoint: str, seconds: float, status: int = None, error: str = None,
+                 bytes_sent: int = 0, bytes_received: int = 0):
+        # "algod" or "indexer"
+        self.client = client
+        # method and path with the ids replaced by placeholders, e.g. "GET /accounts/{address}"
+        self.endpoint = endpoint
+        self.seconds = seconds
+        # HTTP status, None if no response was received
+        self.status = status
+        # exception class name of a failed request
+        self.error = error
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+
+    def __repr__(self):
+        return "RequestRecord(client={}, endpoint={}, seconds={:.4f}, status={}, error={})".format(
+            self.client, self.endpoint, self.seconds, self.status, self.error)
+
+
+class EndpointStats:
+    __slots__ = ("count", "errors", "seconds_sum", "buckets", "bytes_sent", "bytes_received")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.seconds_sum = 0.0
+        # requests per latency bucket, not cumulative, the last one is +Inf
+        self.buckets = [0] * (bucket_count + 1)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class MetricsSink:
+    """
+    Receiver of the request records, the base sink discards them
+    """
+
+    def record(self, request: RequestRecord):
+        pass
+
+
+class CallbackMetricsSink(MetricsSink):
+    def __init__(self, callback):
+        """
+        :param callback: called with each RequestRecord, from the thread that made the request
+        """
+        self.callback = callback
+
+    def record(self, request: RequestRecord):
+        self.callback(request)
+
+
+class InMemoryMetricsSink(MetricsSink):
+    class Variables:
+        # upper bounds in seconds of the latency histogram buckets
+        latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, latency_buckets: tuple = None):
+        self.latency_buckets = tuple(latency_buckets if latency_buckets is not None
+                                     else self.Variables.latency_buckets)
+        # (client, endpoint) -> EndpointStats
+        self.endpoints = {}
+        self.lock = Lock()
+
+    def record(self, request: RequestRecord):
+        bucket = bisect.bisect_left(self.latency_buckets, request.seconds)
+        key = (request.client, request.endpoint)
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats(len(self.latency_buckets))
+            stats.count += 1
+            stats.seconds_sum += request.seconds
+            stats.buckets[bucket] += 1
+            stats.bytes_sent += request.bytes_sent
+            stats.bytes_received += request.bytes_received
+            if request.error is not None:
+                stats.errors += 1
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def snapshot(self):
+        """
+        Get the stats of the endpoints, the most requested first
+        :return: list of dict
+        """
+        with self.lock:
+            items = [(key, stats.count, stats.errors, stats.seconds_sum, list(stats.buckets), stats.bytes_sent,
+                      stats.bytes_received) for key, stats in self.endpoints.items()]
+        snapshot = [{
+            'client': client,
+            'endpoint': endpoint,
+            'count': count,
+            'errors': errors,
+            'seconds_sum': seconds_sum,
+            'buckets': dict(zip([str(bound) for bound in self.latency_buckets] + ["+Inf"], buckets)),
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+        } for (client, endpoint), count, errors, seconds_sum, buckets, bytes_sent, bytes_received in items]
+        snapshot.sort(key=lambda stats: stats['count'], reverse=True)
+        return snapshot
+
+
+def _label(value: str):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class PrometheusFileSink(InMemoryMetricsSink):
+    class Variables(InMemoryMetricsSink.Variables):
+        # min seconds between two writes of the file triggered by the requests
+        write_interval = 15.0
+        metric_prefix = "carsharing_node_request"
+
+    def __init__(self, path: str, write_interval: float = None, latency_buckets: tuple = None):
+        """
+        The file is written by a background thread, at most once per write_interval, with all the requests
+        recorded in the meantime, the requests never wait for the file
+        :param path: text file read by the node exporter textfile collector
+        :param write_interval:
+        :param latency_buckets:
+        """
+        super().__init__(latency_buckets)
+        self.path = path
+        self.write_interval = write_interval if write_interval is not None else self.Variables.write_interval
+        self.write_lock = Lock()
+        # requests recorded since the last write
+        self.dirty = False
+        self.condition = Condition()
+        self.writer = None
+        self.closed = Event()
+        atexit.register(self.close)
+
+    def record(self, request: RequestRecord):
+        super().record(request)
+        if self.dirty:
+            return
+        with self.condition:
+            self.dirty = True
+            if self.writer is None and not self.closed.is_set():
+                self.writer = Thread(target=self._run, name="metrics-writer", daemon=True)
+                self.writer.start()
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closed.is_set():
+                    self.condition.wait()
+                if self.closed.is_set():
+                    return
+                self.dirty = False
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error writing the metrics file %s", self.path)
+            self.closed.wait(self.write_interval)
+
+    def flush(self):
+        """
+        Write the file now
+        """
+        with self.write_lock:
+            self._write()
+
+    def close(self, timeout: float = None):
+        """
+        Stop the writer thread and write the file a last time
+        :param timeout: max seconds to wait for a running write
+        """
+        with self.condition:
+            self.closed.set()
+            self.condition.notify()
+            writer = self.writer
+        if writer is not None:
+            writer.join(timeout)
+        self.flush()
+
+    def render(self):
+        """
+        Format the metrics in the Prometheus text exposition format
+        :return:
+        """
+        prefix = self.Variables.metric_prefix
+        with self.lock:
+            endpoints = sorted((key, stats.count, stats.errors, stats.seconds_sum, list(stats.buckets),
+                                stats.bytes_sent, stats.bytes_received) for key, stats in self.endpoints.items())
+
+        lines = ["# HELP {}_duration_seconds Latency of the requests to the node".format(prefix),
+                 "# TYPE {}_duration_seconds histogram".format(prefix)]
+        bounds = [repr(bound) for bound in self.latency_buckets] + ["+Inf"]
+        for (client, endpoint), count, _, seconds_sum, buckets, _, _ in endpoints:
+            labels = 'client="{}",endpoint="{}"'.format(_label(client), _label(endpoint))
+            cumulative = 0
+            for bound, bucket in zip(bounds, buckets):
+                cumulative += bucket
+                lines.append('{}_duration_seconds_bucket{{{},le="{}"}} {}'.format(prefix, labels, bound, cumulative))
+            lines.append("{}_duration_seconds_sum{{{}}} {}".format(prefix, labels, repr(seconds_sum)))
+            lines.append("{}_duration_seconds_count{{{}}} {}".format(prefix, labels, count))
+
+        lines += ["# HELP {}_errors_total Requests to the node that failed".format(prefix),
+                  "# TYPE {}_errors_total counter".format(prefix)]
+        for (client, endpoint), _, errors, _, _, _, _ in endpoints:
+            lines.append('{}_errors_total{{client="{}",endpoint="{}"}} {}'.format(prefix, _label(client),
+                                                                                  _label(endpoint), errors))
+
+        lines += ["# HELP {}_bytes_total Body bytes exchanged with the node".format(prefix),
+                  "# TYPE {}_bytes_total counter".format(prefix)]
+        for (client, endpoint), _, _, _, _, bytes_sent, bytes_received in endpoints:
+            for direction, size in (("sent", bytes_sent), ("received", bytes_received)):
+                lines.append('{}_bytes_total{{client="{}",endpoint="{}",direction="{}"}} {}'.format(
+                    prefix, _label(client), _label(endpoint), direction, size))
+        return "\n".join(lines) + "\n"
+
+    def _write(self):
+        # written to a temporary file and renamed, the collector never reads a partial file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+default_sink = None
+default_sink_lock = Lock()
+
+
+def get_default_sink():
+    """
+    Get the process-wide sink configured in Constants, a Prometheus file if Constants.metrics_file is set
+    :return: MetricsSink, None if the metrics are disabled
+    """
+    global default_sink
+    with default_sink_lock:
+        if default_sink is None and Constants.metrics_file is not None:
+            default_sink = PrometheusFileSink(Constants.metrics_file)
+        return default_sink
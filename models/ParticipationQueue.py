@@ -0,0 +1,247 @@
+# class to submit the participations to a trip
+# participations are admitted against a locally tracked seat count, so no more groups than the available seats
+# are in flight at the same time, and only the rejections that can succeed on a new attempt are retried
+
+import socket
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+from urllib.error import URLError
+
+from algosdk.error import AlgodHTTPError
+
+from constants import Constants
+from models.ApplicationManager import ApplicationManager
+from models.ConfirmationTracker import ConfirmationTimeoutError, TransactionRejectedError
+from models.SuggestedParamsProvider import SuggestedParamsProvider
+from models.TripState import TripState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class RejectionKind:
+    # no seats left, not retryable
+    seat_exhausted = "seat_exhausted"
+    # expired or duplicated transactions built with cached params, retryable with fresh params
+    stale_params = "stale_params"
+    # node not reachable or confirmation not observed, retryable
+    network = "network"
+    # rejected by the contract or the node for any other reason, not retryable
+    rejected = "rejected"
+
+    retryable = (stale_params, network)
+
+
+class ParticipationRejectedError(Exception):
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class SeatsExhaustedError(ParticipationRejectedError):
+    def __init__(self, message: str):
+        super().__init__(message, RejectionKind.seat_exhausted)
+
+
+def classify_rejection(exception: Exception):
+    """
+    Classify the error raised by a transaction submission
+    :param exception:
+    :return: RejectionKind
+    """
+    if isinstance(exception, (URLError, ConnectionError, socket.timeout, ConfirmationTimeoutError)):
+        return RejectionKind.network
+    if isinstance(exception, (AlgodHTTPError, TransactionRejectedError)):
+        message = str(exception)
+        if "txn dead" in message or "already in ledger" in message or "below threshold" in message:
+            return RejectionKind.stale_params
+        if isinstance(exception, AlgodHTTPError) and exception.code is not None and exception.code >= 500:
+            return RejectionKind.network
+    return RejectionKind.rejected
+
+
+class ParticipationQueue:
+    class Variables:
+        # max number of submissions of the same participation
+        max_attempts = 3
+        # max number of participations handled at the same time
+        max_workers = 10
+
+    # algod client -> {app id -> queue}, the queues only reference the trips while a participation runs
+    queues = weakref.WeakKeyDictionary()
+    queues_lock = Lock()
+
+    def __init__(self, app_id: int, max_attempts: int = None, max_workers: int = None):
+        self.app_id = app_id
+        self.max_attempts = max_attempts if max_attempts is not None else self.Variables.max_attempts
+        self.executor = ThreadPoolExecutor(max_workers=max_workers if max_workers is not None
+                                           else self.Variables.max_workers)
+        # seats not taken by a confirmed participation, None until read from the trip state
+        self.available_seats = None
+        # participations submitted and not yet confirmed or rejected
+        self.in_flight = 0
+        # participations confirmed by the queue, tells if a trip state read is older than the local seat count
+        self.confirmations = 0
+        self.condition = Condition()
+
+    @classmethod
+    def for_trip(cls, trip):
+        """
+        Get the queue shared by all the participations to the same app through the same algod client
+        :param trip:
+        :return:
+        """
+        with cls.queues_lock:
+            queues = cls.queues.setdefault(trip.algod_client, {})
+            queue = queues.get(trip.app_id)
+            if queue is None:
+                queue = cls(trip.app_id)
+                queues[trip.app_id] = queue
+            return queue
+
+    @classmethod
+    def discard(cls, trip):
+        """
+        Close the queue of a trip, once the app is deleted
+        :param trip:
+        """
+        with cls.queues_lock:
+            queue = cls.queues.get(trip.algod_client, {}).pop(trip.app_id, None)
+        if queue is not None:
+            queue.close()
+
+    def close(self):
+        """
+        Stop the workers of the queue once the submitted participations are done
+        """
+        self.executor.shutdown(wait=False)
+
+    def submit(self, trip, user_private_key: str):
+        """
+        Queue the participation of a user
+        :param trip: Trip of the queue app
+        :param user_private_key:
+        :return: a Future resolved with True once the participation is confirmed, or raising
+            ParticipationRejectedError
+        """
+        return self.executor.submit(self._participate, trip, user_private_key)
+
+    @staticmethod
+    def _read_trip_state(trip):
+        trip_state, _, approval_program, clear_state_program = TripState.read(trip.algod_client, trip.app_id)
+        trip.verify_programs(approval_program=approval_program, clear_state_program=clear_state_program)
+        return trip_state
+
+    def _admit(self, trip):
+        """
+        Wait for a seat not claimed by the participations in flight
+        The seat count is read again from the trip state on each admission, so the seats freed by the
+        cancellations are available again
+        :param trip:
+        :return: trip state to build the participation with
+        """
+        with self.condition:
+            confirmations = self.confirmations
+        trip_state = self._read_trip_state(trip)
+        with self.condition:
+            chain_seats = trip_state.available_seats or 0
+            if self.available_seats is None or confirmations == self.confirmations:
+                self.available_seats = chain_seats
+            else:
+                # a participation confirmed after the read is not in the read seat count
+                self.available_seats = min(self.available_seats, chain_seats)
+            while 0 < self.available_seats <= self.in_flight:
+                self.condition.wait()
+            if self.available_seats <= 0:
+                raise SeatsExhaustedError("No seats available for app-id {}".format(self.app_id))
+            self.in_flight += 1
+        return trip_state
+
+    def _release(self, confirmed: bool, available_seats: int = None):
+        """
+        Release the seat claimed by a participation
+        :param confirmed: the participation took the seat
+        :param available_seats: seat count read from the chain, replaces the local one
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if available_seats is not None:
+                self.available_seats = available_seats
+            elif confirmed:
+                self.available_seats -= 1
+            if confirmed:
+                self.confirmations += 1
+            self.condition.notify_all()
+
+    @staticmethod
+    def _opt_in(trip, user_private_key: str, address: str):
+        """
+        Opt in the user to write the local state
+        """
+        try:
+            ApplicationManager.submit_transaction(trip.algod_client,
+                                                  trip.build_opt_in_txn(user_private_key)).result()
+            logger.info("OptIn to Application with app-id: %s", trip.app_id)
+        except (AlgodHTTPError, TransactionRejectedError) as e:
+            # opted in by a concurrent call of the same user
+            if "already opted in" not in str(e):
+                raise
+        finally:
+            trip.local_state_reader.invalidate(address)
+
+    def _participate(self, trip, user_private_key: str):
+        address = trip.account_registry.address_of(user_private_key)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                opted_in, participant_state = trip.local_state_reader.read_opt_in(address, self.app_id)
+                if participant_state is not None and participant_state.is_participating == 1:
+                    return True
+                trip_state = self._admit(trip)
+            except ParticipationRejectedError:
+                raise
+            except Exception as e:
+                kind = classify_rejection(e)
+                if kind in RejectionKind.retryable and attempt < self.max_attempts:
+                    self._prepare_retry(trip, kind)
+                    continue
+                raise ParticipationRejectedError("Participation of {} failed: {}".format(address, e), kind)
+
+            try:
+                # opted in by a previous attempt whose participation group failed
+                if not opted_in:
+                    self._opt_in(trip, user_private_key, address)
+                group = trip.build_participation_group(user_private_key, trip_state)
+                ApplicationManager.submit_group_transactions(trip.algod_client, group).result()
+            except Exception as e:
+                kind = classify_rejection(e)
+                available_seats = None
+                if kind == RejectionKind.rejected:
+                    # the contract rejected the group, check if the seats ran out in the meantime
+                    try:
+                        available_seats = self._read_trip_state(trip).available_seats or 0
+                    except Exception:
+                        pass
+                    if available_seats == 0:
+                        kind = RejectionKind.seat_exhausted
+                self._release(confirmed=False, available_seats=available_seats)
+                if kind in RejectionKind.retryable and attempt < self.max_attempts:
+                    self._prepare_retry(trip, kind)
+                    continue
+                raise ParticipationRejectedError("Participation of {} rejected: {}".format(address, e), kind)
+
+            self._release(confirmed=True)
+            return True
+
+    @staticmethod
+    def _prepare_retry(trip, kind: str):
+        """
+        Prepare a new attempt of a retryable rejection
+        :param trip:
+        :param kind:
+        """
+        if kind == RejectionKind.stale_params:
+            SuggestedParamsProvider.for_client(trip.algod_client).invalidate()
+        else:
+            time.sleep(Constants.block_speed)
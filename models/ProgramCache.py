@@ -0,0 +1,111 @@
+# class to manage a content-addressed cache of compiled TEAL programs
+# compiled programs are kept in an in-process LRU in front of an on-disk store
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+
+from constants import Constants
+
+
+class ProgramCache:
+    shared_cache = None
+
+    def __init__(self, cache_dir: str = None, max_entries: int = 128):
+        self.cache_dir = cache_dir if cache_dir is not None else Constants.program_cache_dir
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the process-wide cache instance
+        :return:
+        """
+        if cls.shared_cache is None:
+            cls.shared_cache = cls()
+        return cls.shared_cache
+
+    @staticmethod
+    def get_key(source_code: str):
+        """
+        Get the cache key of a TEAL source: (source hash, TEAL version)
+        :param source_code:
+        :return:
+        """
+        match = re.match(r"\s*#pragma\s+version\s+(\d+)", source_code)
+        version = int(match.group(1)) if match else 1
+        source_hash = hashlib.sha256(source_code.encode()).hexdigest()
+        return source_hash, version
+
+    def _get_path(self, key):
+        """
+        Get the on-disk path of a cache entry
+        :param key:
+        :return:
+        """
+        source_hash, version = key
+        return os.path.join(self.cache_dir, "{}-v{}.bin".format(source_hash, version))
+
+    def get(self, source_code: str):
+        """
+        Get a compiled program from the cache, None if not cached
+        :param source_code:
+        :return:
+        """
+        key = self.get_key(source_code)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        path = self._get_path(key)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            program = f.read()
+
+        self._remember(key, program)
+        return program
+
+    def put(self, source_code: str, program: bytes):
+        """
+        Store a compiled program into the cache
+        :param source_code:
+        :param program:
+        """
+        key = self.get_key(source_code)
+        self._remember(key, program)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._get_path(key)
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp_path, "wb") as f:
+                f.write(program)
+            os.replace(tmp_path, path)
+        except OSError:
+            # the on-disk store is best effort, the in-process cache is still valid
+            pass
+
+    def clear(self):
+        """
+        Clear the in-process cache, on-disk entries are kept
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def _remember(self, key, program: bytes):
+        """
+        Store an entry into the in-process LRU
+        :param key:
+        :param program:
+        """
+        with self.lock:
+            self.entries[key] = program
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,110 @@
+# class to share node suggested parameters between transactions
+# only the parameters that do not change between rounds (genesis, fees, validity window length) are cached,
+# the validity window of each transaction starts from the last round known to the provider: the rounds
+# observed by the ConfirmationTracker, or the node round fetched again once it is older than a block time
+
+import copy
+import time
+import weakref
+from threading import Lock
+
+from algosdk.v2client import algod
+
+from constants import Constants
+
+
+class SuggestedParamsProvider:
+    class Variables:
+        # seconds after which the last known round is fetched again from the node
+        max_round_age = Constants.block_speed
+
+    providers = weakref.WeakKeyDictionary()
+    providers_lock = Lock()
+
+    def __init__(self, algod_client: algod.AlgodClient, max_round_age: float = None):
+        # the providers are kept by client in a WeakKeyDictionary, the client must not be referenced strongly
+        self.client_ref = weakref.ref(algod_client)
+        self.max_round_age = max_round_age if max_round_age is not None else self.Variables.max_round_age
+        # last fetched parameters, their first and last rounds are replaced for each transaction
+        self.params = None
+        self.validity_rounds = None
+        # last known round of the node and when it was known
+        self.last_round = None
+        self.round_time = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @classmethod
+    def for_client(cls, algod_client: algod.AlgodClient):
+        """
+        Get the provider shared by all the callers of the given algod client
+        :param algod_client:
+        :return:
+        """
+        with cls.providers_lock:
+            provider = cls.providers.get(algod_client)
+            if provider is None:
+                provider = cls(algod_client)
+                cls.providers[algod_client] = provider
+            return provider
+
+    def get(self):
+        """
+        Get the suggested parameters of a new transaction, valid from the last known round
+        The parameters are fetched from the node only if the last known round is older than max_round_age
+        :return:
+        """
+        with self.lock:
+            if self.params is None or time.monotonic() - self.round_time >= self.max_round_age:
+                self.misses += 1
+                self._fetch()
+            else:
+                self.hits += 1
+            params = copy.copy(self.params)
+            params.first = self.last_round
+            params.last = self.last_round + self.validity_rounds
+            return params
+
+    def _fetch(self):
+        algod_client = self.client_ref()
+        if algod_client is None:
+            raise ReferenceError("The algod client of the provider was garbage collected")
+        params = algod_client.suggested_params()
+        self.params = params
+        self.validity_rounds = params.last - params.first
+        self.last_round = max(params.first, self.last_round or 0)
+        self.round_time = time.monotonic()
+
+    def observe_round(self, round_number: int):
+        """
+        Notify a round reached by the node, the next transactions are valid from it
+        A transaction confirmed in a round moves the first valid round of the next ones, so two identical
+        transactions sent one after the other never share the same id
+        :param round_number: last round of the node or confirmed round of a transaction
+        """
+        if round_number is None:
+            return
+        with self.lock:
+            if self.params is not None and round_number >= self.last_round:
+                self.last_round = round_number
+                self.round_time = time.monotonic()
+
+    def invalidate(self):
+        """
+        Drop the cached parameters, next call will fetch them from the node
+        """
+        with self.lock:
+            self.params = None
+            self.round_time = None
+
+    @property
+    def stats(self):
+        """
+        Cache hit/miss counters
+        :return:
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -1,34 +1,51 @@
-from algosdk import account, transaction
+from concurrent.futures import ThreadPoolExecutor
+
 from algosdk import logic as algo_logic
-from algosdk.encoding import decode_address
 from algosdk.v2client import algod
-from pyteal import compileTeal, Mode
 
-from constants import get_env
 from helpers import algo_helper
+from models.AccountRegistry import AccountRegistry
 from models.ApplicationManager import ApplicationManager
-from smart_contracts.contract_carsharing import CarSharingContract
-from smart_contracts.contract_escrow import contract_escrow
-from utilities import utils
+from models.ContractArtifacts import ContractArtifacts
+from models.LocalStateReader import LocalStateReader
+from models.ParticipationQueue import ParticipationQueue, ParticipationRejectedError
+from models.ProgramCache import ProgramCache
+from models.TripBase import TripBase
+from models.TripState import TripState
+from smart_contracts.carsharing_interface import AppMethods
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
 
 
-class Trip:
+class Trip(TripBase):
     def __init__(self,
                  algod_client: algod.AlgodClient,
-                 app_id: int = None):
-        self.algod_client = algod_client
-        self.teal_version_stateful = 5
-        self.teal_version_stateless = 4
-        self.app_contract = CarSharingContract()
-        self.app_id = app_id
-
-        self.approval_program_hash = None
-        self.clear_state_program_hash = None
-        # read contract program from env
-        if get_env('APPROVAL_PROGRAM') is not None:
-            self.approval_program_hash = get_env('APPROVAL_PROGRAM')
-        if get_env('CLEAR_STATE_PROGRAM') is not None:
-            self.clear_state_program_hash = get_env('CLEAR_STATE_PROGRAM')
+                 app_id: int = None,
+                 program_cache: ProgramCache = None,
+                 account_registry: AccountRegistry = None):
+        super().__init__(algod_client, app_id=app_id, program_cache=program_cache,
+                         account_registry=account_registry)
+        self.local_state_reader = LocalStateReader.for_client(algod_client)
+
+    def get_compiled_programs(self):
+        """
+        Get the approval and clear state bytecode
+        The artifacts built by compile_contract.py are used when present, checked against the programs in .env,
+        otherwise the pyteal contract is compiled
+        :return: approval program, clear state program
+        """
+        if ContractArtifacts.exists():
+            artifacts = ContractArtifacts.load()
+            return artifacts.get_program("approval", self.approval_program_hash), \
+                artifacts.get_program("clear_state", self.clear_state_program_hash)
+
+        # compile program to TEAL assembly
+        approval_program, clear_program = self.get_contract_sources()
+
+        # compile program to binary
+        return algo_helper.compile_program(self.algod_client, approval_program, cache=self.program_cache), \
+            algo_helper.compile_program(self.algod_client, clear_program, cache=self.program_cache)
 
     @property
     def escrow_bytes(self):
@@ -36,16 +53,14 @@ class Trip:
         Get escrow contract compiled program
         :return:
         """
-        if self.app_id is None:
-            raise ValueError("App not deployed")
-
-        escrow_fund_program_compiled = compileTeal(
-            contract_escrow(app_id=self.app_id),
-            mode=Mode.Signature,
-            version=self.teal_version_stateless,
-        )
+        escrow_bytes = self.get_cached_escrow_bytes()
+        if escrow_bytes is not None:
+            return escrow_bytes
 
-        return algo_helper.compile_program(self.algod_client, escrow_fund_program_compiled)
+        escrow_bytes = algo_helper.compile_program(self.algod_client, self.get_escrow_source(),
+                                                   cache=self.program_cache)
+        self.escrow_program = (self.app_id, escrow_bytes)
+        return escrow_bytes
 
     @property
     def escrow_address(self):
@@ -76,54 +91,25 @@ class Trip:
         :param trip_available_seats:
         :return:
         """
-        # compile program to TEAL assembly
-        approval_program_compiled = compileTeal(
-            self.app_contract.approval_program(),
-            mode=Mode.Application,
-            version=self.teal_version_stateful,
-        )
-
-        clear_program_compiled = compileTeal(
-            self.app_contract.clear_program(),
-            mode=Mode.Application,
-            version=self.teal_version_stateful
-        )
-
-        # compile program to binary
-        approval_program_compiled = algo_helper.compile_program(self.algod_client, approval_program_compiled)
-        clear_state_program_compiled = algo_helper.compile_program(self.algod_client, clear_program_compiled)
+        approval_program_compiled, clear_state_program_compiled = self.get_compiled_programs()
 
-        trip_start_date_round = algo_helper.datetime_to_rounds(self.algod_client, trip_start_date)
-        trip_end_date_round = algo_helper.datetime_to_rounds(self.algod_client, trip_end_date)
-
-        app_args = [
-            trip_creator_name,
-            trip_start_address,
-            trip_end_address,
-            trip_start_date,
-            algo_helper.intToBytes(trip_start_date_round),
-            trip_end_date,
-            algo_helper.intToBytes(trip_end_date_round),
-            algo_helper.intToBytes(trip_cost),
-            algo_helper.intToBytes(trip_available_seats),
-        ]
-
-        address = algo_helper.get_address_from_private_key(creator_private_key)
         try:
-            txn = ApplicationManager.create_app(algod_client=self.algod_client,
-                                                address=address,
-                                                approval_program=approval_program_compiled,
-                                                clear_program=clear_state_program_compiled,
-                                                global_schema=self.app_contract.global_schema,
-                                                local_schema=self.app_contract.local_schema,
-                                                app_args=app_args,
-                                                sign_transaction=creator_private_key)
+            txn = self.build_create_txn(creator_private_key=creator_private_key,
+                                        trip_creator_name=trip_creator_name,
+                                        trip_start_address=trip_start_address,
+                                        trip_end_address=trip_end_address,
+                                        trip_start_date=trip_start_date,
+                                        trip_end_date=trip_end_date,
+                                        trip_cost=trip_cost,
+                                        trip_available_seats=trip_available_seats,
+                                        approval_program=approval_program_compiled,
+                                        clear_state_program=clear_state_program_compiled)
 
             txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
             self.app_id = txn_response['application-index']
-            utils.console_log("Application Created. New app-id: {}".format(self.app_id), "green")
+            logger.info("Application Created. New app-id: %s", self.app_id)
         except Exception as e:
-            utils.console_log("Error during create_app call: {}".format(e))
+            logger.error("Error during create_app call: %s", e)
             return False
 
         return self.app_id
@@ -134,24 +120,9 @@ class Trip:
         :param creator_private_key:
         :return:
         """
-        # compile program to TEAL assembly
-        approval_program_compiled = compileTeal(
-            self.app_contract.approval_program(),
-            mode=Mode.Application,
-            version=self.teal_version_stateful,
-        )
-
-        clear_program_compiled = compileTeal(
-            self.app_contract.clear_program(),
-            mode=Mode.Application,
-            version=self.teal_version_stateful
-        )
-
-        # compile program to binary
-        approval_program_compiled = algo_helper.compile_program(self.algod_client, approval_program_compiled)
-        clear_state_program_compiled = algo_helper.compile_program(self.algod_client, clear_program_compiled)
+        approval_program_compiled, clear_state_program_compiled = self.get_compiled_programs()
 
-        address = algo_helper.get_address_from_private_key(creator_private_key)
+        address = self.account_registry.address_of(creator_private_key)
         try:
             txn = ApplicationManager.update_app(algod_client=self.algod_client,
                                                 address=address,
@@ -162,9 +133,9 @@ class Trip:
                                                 sign_transaction=creator_private_key)
 
             txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-            utils.console_log("Updated Application with app-id: {}".format(self.app_id), "green")
+            logger.info("Updated Application with app-id: %s", self.app_id)
         except Exception as e:
-            utils.console_log("Error during create_app call: {}".format(e))
+            logger.error("Error during create_app call: %s", e)
             return False
 
         return self.app_id
@@ -194,7 +165,7 @@ class Trip:
         trip_end_date_round = algo_helper.datetime_to_rounds(self.algod_client, trip_end_date)
 
         app_args = [
-            self.app_contract.AppMethods.update_trip,
+            AppMethods.update_trip,
             trip_creator_name,
             trip_start_address,
             trip_end_address,
@@ -206,7 +177,7 @@ class Trip:
             algo_helper.intToBytes(trip_available_seats),
         ]
 
-        address = algo_helper.get_address_from_private_key(creator_private_key)
+        address = self.account_registry.address_of(creator_private_key)
         try:
             txn = ApplicationManager.call_app(algod_client=self.algod_client,
                                               address=address,
@@ -215,9 +186,9 @@ class Trip:
                                               sign_transaction=creator_private_key)
 
             txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-            utils.console_log("Updated Info for Application with app-id: {}".format(self.app_id), "green")
+            logger.info("Updated Info for Application with app-id: %s", self.app_id)
         except Exception as e:
-            utils.console_log("Error during update_trip_info call: {}".format(e))
+            logger.error("Error during update_trip_info call: %s", e)
             return False
 
         return self.app_id
@@ -228,24 +199,14 @@ class Trip:
         :param creator_private_key:
         :return:
         """
-        app_args = [
-            self.app_contract.AppMethods.initialize_escrow,
-            decode_address(self.escrow_address)
-        ]
-
         try:
-            address = algo_helper.get_address_from_private_key(creator_private_key)
-            txn = ApplicationManager.call_app(algod_client=self.algod_client,
-                                              address=address,
-                                              app_id=self.app_id,
-                                              app_args=app_args,
-                                              sign_transaction=creator_private_key)
+            txn = self.build_initialize_escrow_txn(creator_private_key, self.escrow_address)
 
             txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-            utils.console_log("Escrow initialized for Application with app-id {} with address: {}"
-                              .format(self.app_id, self.escrow_address), "green")
+            logger.info("Escrow initialized for Application with app-id %s with address: %s",
+                        self.app_id, self.escrow_address)
         except Exception as e:
-            utils.console_log("Error during initialize_escrow call: {}".format(e))
+            logger.error("Error during initialize_escrow call: %s", e)
             return False
 
     def fund_escrow(self, creator_private_key: str):
@@ -254,37 +215,15 @@ class Trip:
         :param creator_private_key:
         :return:
         """
-        address = account.address_from_private_key(creator_private_key)
-
-        app_args = [
-            self.app_contract.AppMethods.fund_escrow
-        ]
         try:
-            global_state, creator_address, _, _ = algo_helper.read_global_state(self.algod_client, self.app_id, False,
-                                                                                False)
-            escrow_address = algo_helper.BytesToAddress(global_state.get("escrow_address"))
-
-            call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
-                                                   address=address,
-                                                   app_id=self.app_id,
-                                                   app_args=app_args)
-
-            payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
-                                                     sender_address=address,
-                                                     receiver_address=escrow_address,
-                                                     amount=ApplicationManager.Variables.escrow_min_balance)
-            # Atomic transfer
-            gid = transaction.calculate_group_id([call_txn, payment_txn])
-            call_txn.group = gid
-            payment_txn.group = gid
-
-            call_txn = call_txn.sign(creator_private_key)
-            payment_txn = payment_txn.sign(creator_private_key)
-
-            txn_response = ApplicationManager.send_group_transactions(self.algod_client, [call_txn, payment_txn])
-            utils.console_log("Escrow funded with address: {}".format(escrow_address), "green")
+            trip_state, creator_address, _, _ = TripState.read(self.algod_client, self.app_id)
+            escrow_address = trip_state.escrow_address
+
+            group = self.build_fund_escrow_group(creator_private_key, trip_state)
+            txn_response = ApplicationManager.send_group_transactions(self.algod_client, group)
+            logger.info("Escrow funded with address: %s", escrow_address)
         except Exception as e:
-            utils.console_log("Error during fund_escrow: {}".format(e))
+            logger.error("Error during fund_escrow: %s", e)
             return False
 
     def participate(self, user_private_key: str, user_name: str):
@@ -292,65 +231,91 @@ class Trip:
         Add a user to the trip
         Perform a payment transaction from the user to the escrow
         Perform a check transaction from the verifier
+        The participation goes through the app participation queue, see ParticipationQueue
         :param user_private_key:
         :param user_name:
+        :return: True if the user is participating
         """
+        try:
+            ParticipationQueue.for_trip(self).submit(self, user_private_key).result()
+            logger.info("Participated to Application with app-id: %s", self.app_id)
+            return True
+        except ParticipationRejectedError as e:
+            logger.error("Error during participation call (%s): %s", e.kind, e)
+            return False
 
-        address = account.address_from_private_key(user_private_key)
-        local_state = algo_helper.read_local_state(self.algod_client, address, self.app_id)
-        if local_state is None:
-            try:
-                # opt in to write local state
-                call_txn = ApplicationManager.opt_in_app(algod_client=self.algod_client,
-                                                         address=address,
-                                                         app_id=self.app_id,
-                                                         sign_transaction=user_private_key)
-                txn_response = ApplicationManager.send_transaction(self.algod_client, call_txn)
-                utils.console_log("OptIn to Application with app-id: {}"
-                                  .format(self.app_id), "green")
-            except Exception as e:
-                utils.console_log("Error during optin call: {}".format(e))
-
-        app_args = [
-            self.app_contract.AppMethods.participate_trip
-        ]
+    def participate_many(self, users: [dict], max_workers: int = 10):
+        """
+        Add many users to the trip
+        The global state is read once, then the opt-in transactions of all the users are submitted together and
+        all the call+payment groups are submitted together, so the whole batch takes two rounds
+        :param users: list of users, each one as {'name', 'mnemonic'}
+        :param max_workers: max number of concurrent local state reads
+        :return: dict of user name -> True if the user is participating
+        """
+        results = {user.get('name'): False for user in users}
         try:
-            global_state, \
+            trip_state, \
             creator_address, \
             approval_program, \
-            clear_state_program = algo_helper.read_global_state(client=self.algod_client,
-                                                                app_id=self.app_id,
-                                                                to_array=False,
-                                                                show=False)
-
-            self.check_program_hash(approval_program=approval_program, clear_state_program=clear_state_program)
-
-            trip_cost = global_state.get("trip_cost")
-            escrow_address = algo_helper.BytesToAddress(global_state.get("escrow_address"))
-
-            call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
-                                                   address=address,
-                                                   app_id=self.app_id,
-                                                   app_args=app_args)
-
-            payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
-                                                     sender_address=address,
-                                                     receiver_address=escrow_address,
-                                                     amount=trip_cost)
-            # Atomic transfer
-            gid = transaction.calculate_group_id([call_txn, payment_txn])
-            call_txn.group = gid
-            payment_txn.group = gid
-
-            call_txn = call_txn.sign(user_private_key)
-            payment_txn = payment_txn.sign(user_private_key)
-
-            txn_response = ApplicationManager.send_group_transactions(self.algod_client, [call_txn, payment_txn])
-            utils.console_log("Participated to Application with app-id: {}"
-                              .format(self.app_id), "green")
+            clear_state_program = TripState.read(self.algod_client, self.app_id)
+
+            self.verify_programs(approval_program=approval_program, clear_state_program=clear_state_program)
         except Exception as e:
-            utils.console_log("Error during participation call: {}".format(e))
-            return False
+            logger.error("Error during participation call: %s", e)
+            return results
+
+        available_seats = trip_state.available_seats or 0
+        if len(users) > available_seats:
+            logger.warning("Only %s seats available, %s users will not participate",
+                           available_seats, len(users) - available_seats)
+            users = users[:available_seats]
+
+        participants = []
+        for user in users:
+            entry = self.account_registry.resolve(user)
+            participants.append((entry.name, entry.private_key, entry.address))
+
+        # opt in the users without local state, all the transactions are confirmed in the same round
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            local_states = list(executor.map(
+                lambda participant: self.local_state_reader.read_participant(participant[2], self.app_id),
+                participants))
+
+        pending_opt_ins = []
+        for (name, private_key, address), local_state in zip(participants, local_states):
+            if local_state is not None:
+                continue
+            try:
+                txn = self.build_opt_in_txn(private_key)
+                pending_opt_ins.append((name, address, ApplicationManager.submit_transaction(self.algod_client, txn)))
+            except Exception as e:
+                logger.error("Error during optin call for user %s: %s", name, e)
+        for name, address, pending_txn in pending_opt_ins:
+            try:
+                pending_txn.result()
+                self.local_state_reader.invalidate(address)
+                logger.info("User %s OptIn to Application with app-id: %s", name, self.app_id)
+            except Exception as e:
+                logger.error("Error during optin call for user %s: %s", name, e)
+
+        # participate, all the groups are confirmed in the same round
+        pending_groups = []
+        for name, private_key, address in participants:
+            try:
+                group = self.build_participation_group(private_key, trip_state)
+                pending_groups.append((name, ApplicationManager.submit_group_transactions(self.algod_client, group)))
+            except Exception as e:
+                logger.error("Error during participation call for user %s: %s", name, e)
+        for name, pending_txn in pending_groups:
+            try:
+                pending_txn.result()
+                results[name] = True
+                logger.info("User %s participated to Application with app-id: %s", name, self.app_id)
+            except Exception as e:
+                logger.error("Error during participation call for user %s: %s", name, e)
+
+        return results
 
     def cancel_participation(self,
                              creator_private_key: str,
@@ -365,62 +330,31 @@ class Trip:
         :param user_name:
         """
 
-        address = account.address_from_private_key(user_private_key)
-        local_state = algo_helper.read_local_state(self.algod_client, address, self.app_id)
-        if local_state is None:
+        address = self.account_registry.address_of(user_private_key)
+        participant_state = self.local_state_reader.read_participant(address, self.app_id)
+        if participant_state is None:
             try:
                 # opt in to write local state
-                txn = ApplicationManager.opt_in_app(algod_client=self.algod_client,
-                                                    address=address,
-                                                    app_id=self.app_id,
-                                                    sign_transaction=user_private_key)
+                txn = self.build_opt_in_txn(user_private_key)
                 txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-                utils.console_log("OptIn to Application with app-id: {}"
-                                  .format(self.app_id), "green")
+                self.local_state_reader.invalidate(address)
+                logger.info("OptIn to Application with app-id: %s", self.app_id)
             except Exception as e:
-                utils.console_log("Error during optin call: {}".format(e))
-
-        app_args = [
-            bytes(self.app_contract.AppMethods.cancel_trip_participation, encoding="raw_unicode_escape")
-        ]
+                logger.error("Error during optin call: %s", e)
 
         try:
-            global_state, \
+            trip_state, \
             creator_address, \
             approval_program, \
-            clear_state_program = algo_helper.read_global_state(client=self.algod_client,
-                                                                app_id=self.app_id,
-                                                                to_array=False,
-                                                                show=False)
-
-            self.check_program_hash(approval_program=approval_program, clear_state_program=clear_state_program)
-
-            trip_cost = global_state.get("trip_cost")
-            escrow_address = algo_helper.BytesToAddress(global_state.get("escrow_address"))
-
-            call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
-                                                   address=address,
-                                                   app_id=self.app_id,
-                                                   app_args=app_args)
-
-            payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
-                                                     sender_address=escrow_address,
-                                                     receiver_address=address,
-                                                     amount=trip_cost)
-            # Atomic transfer
-            gid = transaction.calculate_group_id([call_txn, payment_txn])
-            call_txn.group = gid
-            payment_txn.group = gid
-
-            call_txn = call_txn.sign(user_private_key)
-            escrow_logic_signature = transaction.LogicSig(self.escrow_bytes)
-            payment_txn = transaction.LogicSigTransaction(payment_txn, escrow_logic_signature)
-
-            txn_response = ApplicationManager.send_group_transactions(self.algod_client, [call_txn, payment_txn])
-            utils.console_log("Participation canceled to Application with app-id: {}"
-                              .format(self.app_id), "green")
+            clear_state_program = TripState.read(self.algod_client, self.app_id)
+
+            self.verify_programs(approval_program=approval_program, clear_state_program=clear_state_program)
+
+            group = self.build_cancel_participation_group(user_private_key, trip_state, self.escrow_bytes)
+            txn_response = ApplicationManager.send_group_transactions(self.algod_client, group)
+            logger.info("Participation canceled to Application with app-id: %s", self.app_id)
         except Exception as e:
-            utils.console_log("Error during participation cancel call: {}".format(e))
+            logger.error("Error during participation cancel call: %s", e)
             return False
 
     def start_trip(self, creator_private_key: str):
@@ -431,104 +365,81 @@ class Trip:
         :param creator_private_key:
         """
 
-        address = account.address_from_private_key(creator_private_key)
-
-        app_args = [
-            bytes(self.app_contract.AppMethods.start_trip, encoding="raw_unicode_escape"),
-        ]
-
         try:
-            global_state, \
+            trip_state, \
             creator_address, \
             approval_program, \
-            clear_state_program = algo_helper.read_global_state(client=self.algod_client,
-                                                                app_id=self.app_id,
-                                                                to_array=False,
-                                                                show=False)
-
-            self.check_program_hash(approval_program=approval_program, clear_state_program=clear_state_program)
-
-            trip_cost = global_state.get("trip_cost")
-            escrow_address = algo_helper.BytesToAddress(global_state.get("escrow_address"))
-
-            call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
-                                                   address=address,
-                                                   app_id=self.app_id,
-                                                   app_args=app_args)
-
-            payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
-                                                     sender_address=escrow_address,
-                                                     receiver_address=address,
-                                                     amount=trip_cost,
-                                                     close_remainder_to=address)
-            # Atomic transfer
-            gid = transaction.calculate_group_id([call_txn, payment_txn])
-            call_txn.group = gid
-            payment_txn.group = gid
-
-            call_txn = call_txn.sign(creator_private_key)
-            escrow_logic_signature = transaction.LogicSig(self.escrow_bytes)
-            payment_txn = transaction.LogicSigTransaction(payment_txn, escrow_logic_signature)
-
-            ApplicationManager.send_group_transactions(self.algod_client, [call_txn, payment_txn])
+            clear_state_program = TripState.read(self.algod_client, self.app_id)
+
+            self.verify_programs(approval_program=approval_program, clear_state_program=clear_state_program)
+
+            group = self.build_start_group(creator_private_key, trip_state, self.escrow_bytes)
+            ApplicationManager.send_group_transactions(self.algod_client, group)
         except Exception as e:
-            utils.console_log("Error during start_trip call: {}".format(e))
+            logger.error("Error during start_trip call: %s", e)
             return False
 
-    def close_trip(self, creator_private_key: str, participating_users: [dict]):
+    def close_trip(self, creator_private_key: str, participating_users: [dict], max_workers: int = 10):
         """
         Close the trip and delete the Smart Contract dApp
+        The ClearState transactions of all the users are built and signed up front,
+        then submitted concurrently and confirmed together
         :param participating_users:
         :param creator_private_key:
-        :return:
+        :param max_workers: max number of concurrent requests to the node
+        :return: dict of user name -> "cleared", "not_participating" or the error message, False if delete fails
         """
 
         try:
             # delete application
-            address = algo_helper.get_address_from_private_key(creator_private_key)
-            txn = ApplicationManager.delete_app(algod_client=self.algod_client,
-                                                address=address,
-                                                app_id=self.app_id,
-                                                sign_transaction=creator_private_key)
+            txn = self.build_delete_txn(creator_private_key)
             txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-            utils.console_log("Deleted Application with app-id: {}".format(self.app_id), "green")
+            ParticipationQueue.discard(self)
+            logger.info("Deleted Application with app-id: %s", self.app_id)
         except Exception as e:
-            utils.console_log("Error during delete_app call: {}".format(e))
+            logger.error("Error during delete_app call: %s", e)
             return False
 
+        results = {}
+        users = []
         for test_user in participating_users:
-            private_key = algo_helper.get_private_key_from_mnemonic(test_user.get('mnemonic'))
-            address = algo_helper.get_address_from_private_key(private_key)
-            local_state = algo_helper.read_local_state(self.algod_client, address, self.app_id)
-            if local_state is not None:
+            entry = self.account_registry.resolve(test_user)
+            users.append((entry.name, entry.private_key, entry.address))
+
+        def read_local_state(user):
+            try:
+                return self.local_state_reader.read_participant(user[2], self.app_id)
+            except Exception as e:
+                return e
+
+        def submit(clear_txn):
+            return ApplicationManager.submit_transaction(self.algod_client, clear_txn)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            local_states = list(executor.map(read_local_state, users))
+
+            # build and sign all the clear transactions up front
+            clear_txns = []
+            for (name, private_key, user_address), local_state in zip(users, local_states):
+                if isinstance(local_state, Exception):
+                    results[name] = str(local_state)
+                    continue
+                if local_state is None:
+                    results[name] = "not_participating"
+                    continue
+                clear_txns.append((name, self.build_clear_txn(private_key)))
+
+            submissions = [(name, executor.submit(submit, clear_txn)) for name, clear_txn in clear_txns]
+            for name, submission in submissions:
                 try:
                     # clear application from user account
-                    txn = ApplicationManager.clear_app(algod_client=self.algod_client,
-                                                       address=address,
-                                                       app_id=self.app_id,
-                                                       sign_transaction=private_key)
-                    txn_response = ApplicationManager.send_transaction(self.algod_client, txn)
-                    utils.console_log("Cleared app-id: {}".format(self.app_id), "green")
+                    submission.result().result()
+                    results[name] = "cleared"
+                    logger.info("Cleared app-id %s for user %s", self.app_id, name)
                 except Exception as e:
-                    utils.console_log("Error during clear_app call: {}".format(e))
-                    return False
+                    results[name] = str(e)
+                    logger.error("Error during clear_app call for user %s: %s", name, e)
 
-    def check_program_hash(self, approval_program, clear_state_program):
-        """
-        Check the contract programs
-        @param approval_program: given approval program hash
-        @param clear_state_program: given clear state program hash
-        """
-        if self.approval_program_hash is not None and self.clear_state_program_hash is not None:
-            if approval_program != self.approval_program_hash:
-                print("Given hash:")
-                print(approval_program)
-                print("Expected hash:")
-                print(self.approval_program_hash)
-                raise Exception("Approval program hash is invalid")
-            if clear_state_program != self.clear_state_program_hash:
-                print("Given hash:")
-                print(clear_state_program)
-                print("Expected hash:")
-                print(self.clear_state_program_hash)
-                raise Exception("Clear state program hash is invalid")
+        for name, private_key, user_address in users:
+            self.local_state_reader.invalidate(user_address)
+        return results
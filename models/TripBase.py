@@ -0,0 +1,338 @@
+# base class of Trip and AsyncTrip
+# holds what does not depend on the node client: the contract sources, the checks of the app programs and the
+# construction of the transactions and groups of each trip operation, the subclasses only do the node I/O
+
+from algosdk.future import transaction
+from algosdk.encoding import decode_address
+
+from constants import get_env
+from helpers import algo_helper
+from models.AccountRegistry import AccountRegistry
+from models.ApplicationManager import ApplicationManager
+from models.ProgramCache import ProgramCache
+from models.TripState import TripState
+from smart_contracts import carsharing_interface
+from smart_contracts.carsharing_interface import AppMethods
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class TripBase:
+    def __init__(self,
+                 algod_client,
+                 app_id: int = None,
+                 program_cache: ProgramCache = None,
+                 account_registry: AccountRegistry = None):
+        """
+        :param algod_client: algod.AlgodClient for Trip, AsyncAlgodClient for AsyncTrip
+        :param app_id:
+        :param program_cache:
+        :param account_registry:
+        """
+        self.algod_client = algod_client
+        self.teal_version_stateful = 5
+        self.teal_version_stateless = 4
+        # pyteal contract, built on first use by the deployment paths
+        self.contract = None
+        self.app_id = app_id
+        self.program_cache = program_cache if program_cache is not None else ProgramCache.shared()
+        self.account_registry = account_registry if account_registry is not None else AccountRegistry.shared()
+        # escrow program compiled for the current app_id, as (app_id, program)
+        self.escrow_program = None
+
+        # read contract program from env
+        self.approval_program_hash = get_env('APPROVAL_PROGRAM')
+        self.clear_state_program_hash = get_env('CLEAR_STATE_PROGRAM')
+
+    @property
+    def app_contract(self):
+        """
+        Get the pyteal contract, pyteal is only imported by the paths that compile it
+        :return:
+        """
+        if self.contract is None:
+            from smart_contracts.contract_carsharing import CarSharingContract
+            self.contract = CarSharingContract()
+        return self.contract
+
+    def get_contract_sources(self):
+        """
+        Compile the pyteal contract to TEAL assembly
+        :return: approval program, clear state program
+        """
+        from pyteal import compileTeal, Mode
+
+        approval_program = compileTeal(
+            self.app_contract.approval_program(),
+            mode=Mode.Application,
+            version=self.teal_version_stateful,
+        )
+        clear_program = compileTeal(
+            self.app_contract.clear_program(),
+            mode=Mode.Application,
+            version=self.teal_version_stateful
+        )
+        return approval_program, clear_program
+
+    def get_escrow_source(self):
+        """
+        Get the escrow contract source of the current app
+        :return:
+        """
+        if self.app_id is None:
+            raise ValueError("App not deployed")
+        return carsharing_interface.escrow_source(self.app_id, self.teal_version_stateless)
+
+    def get_cached_escrow_bytes(self):
+        """
+        Get the escrow program compiled for the current app
+        :return: None if not compiled yet
+        """
+        if self.escrow_program is not None and self.escrow_program[0] == self.app_id:
+            return self.escrow_program[1]
+        return None
+
+    # --- programs checks ---
+
+    def verify_programs(self, approval_program, clear_state_program):
+        """
+        Check the contract programs of the app read along with its state
+        The programs are compared on every call: an update of the app by another process is caught by the
+        next operation, and the comparison needs no node read of its own
+        @param approval_program: given approval program hash
+        @param clear_state_program: given clear state program hash
+        """
+        self.check_program_hash(approval_program=approval_program, clear_state_program=clear_state_program)
+
+    def check_program_hash(self, approval_program, clear_state_program):
+        """
+        Check the contract programs
+        @param approval_program: given approval program hash
+        @param clear_state_program: given clear state program hash
+        """
+        if self.approval_program_hash is not None and self.clear_state_program_hash is not None:
+            if approval_program != self.approval_program_hash:
+                logger.error("Given hash:\n%s\nExpected hash:\n%s", approval_program, self.approval_program_hash)
+                raise Exception("Approval program hash is invalid")
+            if clear_state_program != self.clear_state_program_hash:
+                logger.error("Given hash:\n%s\nExpected hash:\n%s", clear_state_program,
+                             self.clear_state_program_hash)
+                raise Exception("Clear state program hash is invalid")
+
+    # --- transactions ---
+    # params are the suggested params to use, the shared node params of the sync client if not given
+
+    @staticmethod
+    def assign_group(txns: list):
+        """
+        Make an atomic transfer of the given unsigned transactions
+        :param txns:
+        :return: the transactions
+        """
+        gid = transaction.calculate_group_id(txns)
+        for txn in txns:
+            txn.group = gid
+        return txns
+
+    def build_create_txn(self,
+                         creator_private_key: str,
+                         trip_creator_name: str,
+                         trip_start_address: str,
+                         trip_end_address: str,
+                         trip_start_date: str,
+                         trip_end_date: str,
+                         trip_cost: int,
+                         trip_available_seats: int,
+                         approval_program: bytes,
+                         clear_state_program: bytes,
+                         last_round: int = None,
+                         params: transaction.SuggestedParams = None):
+        """
+        Build and sign the creation of the app
+        :param last_round: current node round, the dates are converted to rounds from it, fetched if not given
+        :return: signed transaction
+        """
+        trip_start_date_round = algo_helper.datetime_to_rounds(self.algod_client, trip_start_date,
+                                                               last_round=last_round)
+        trip_end_date_round = algo_helper.datetime_to_rounds(self.algod_client, trip_end_date,
+                                                             last_round=last_round)
+
+        app_args = [
+            trip_creator_name,
+            trip_start_address,
+            trip_end_address,
+            trip_start_date,
+            algo_helper.intToBytes(trip_start_date_round),
+            trip_end_date,
+            algo_helper.intToBytes(trip_end_date_round),
+            algo_helper.intToBytes(trip_cost),
+            algo_helper.intToBytes(trip_available_seats),
+        ]
+
+        return ApplicationManager.create_app(algod_client=self.algod_client,
+                                             address=self.account_registry.address_of(creator_private_key),
+                                             approval_program=approval_program,
+                                             clear_program=clear_state_program,
+                                             global_schema=carsharing_interface.global_schema(),
+                                             local_schema=carsharing_interface.local_schema(),
+                                             app_args=app_args,
+                                             sign_transaction=creator_private_key,
+                                             params=params)
+
+    def build_initialize_escrow_txn(self,
+                                    creator_private_key: str,
+                                    escrow_address: str,
+                                    params: transaction.SuggestedParams = None):
+        """
+        Build and sign the initialization of the escrow
+        :return: signed transaction
+        """
+        return ApplicationManager.call_app(algod_client=self.algod_client,
+                                           address=self.account_registry.address_of(creator_private_key),
+                                           app_id=self.app_id,
+                                           app_args=[AppMethods.initialize_escrow, decode_address(escrow_address)],
+                                           sign_transaction=creator_private_key,
+                                           params=params)
+
+    def build_fund_escrow_group(self,
+                                creator_private_key: str,
+                                trip_state: TripState,
+                                params: transaction.SuggestedParams = None):
+        """
+        Build and sign the funding group: the fund call and the payment of the escrow min balance
+        :return: list of signed transactions
+        """
+        address = self.account_registry.address_of(creator_private_key)
+        call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
+                                               address=address,
+                                               app_id=self.app_id,
+                                               app_args=[AppMethods.fund_escrow],
+                                               params=params)
+
+        payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
+                                                 sender_address=address,
+                                                 receiver_address=trip_state.escrow_address,
+                                                 amount=ApplicationManager.Variables.escrow_min_balance,
+                                                 params=params)
+        self.assign_group([call_txn, payment_txn])
+        return [call_txn.sign(creator_private_key), payment_txn.sign(creator_private_key)]
+
+    def build_opt_in_txn(self, user_private_key: str, params: transaction.SuggestedParams = None):
+        """
+        Build and sign the opt in of a user, needed to write its local state
+        :return: signed transaction
+        """
+        return ApplicationManager.opt_in_app(algod_client=self.algod_client,
+                                             address=self.account_registry.address_of(user_private_key),
+                                             app_id=self.app_id,
+                                             sign_transaction=user_private_key,
+                                             params=params)
+
+    def build_participation_group(self,
+                                  user_private_key: str,
+                                  trip_state: TripState,
+                                  params: transaction.SuggestedParams = None):
+        """
+        Build and sign the participation group: the participate call and the payment to the escrow
+        :param user_private_key:
+        :param trip_state:
+        :param params:
+        :return: list of signed transactions
+        """
+        address = self.account_registry.address_of(user_private_key)
+        call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
+                                               address=address,
+                                               app_id=self.app_id,
+                                               app_args=[AppMethods.participate_trip],
+                                               params=params)
+
+        payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
+                                                 sender_address=address,
+                                                 receiver_address=trip_state.escrow_address,
+                                                 amount=trip_state.trip_cost,
+                                                 params=params)
+        self.assign_group([call_txn, payment_txn])
+        return [call_txn.sign(user_private_key), payment_txn.sign(user_private_key)]
+
+    def build_cancel_participation_group(self,
+                                         user_private_key: str,
+                                         trip_state: TripState,
+                                         escrow_bytes: bytes,
+                                         params: transaction.SuggestedParams = None):
+        """
+        Build and sign the cancel group: the cancel call and the refund from the escrow to the user
+        :return: list of signed transactions
+        """
+        address = self.account_registry.address_of(user_private_key)
+        call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
+                                               address=address,
+                                               app_id=self.app_id,
+                                               app_args=[bytes(AppMethods.cancel_trip_participation,
+                                                               encoding="raw_unicode_escape")],
+                                               params=params)
+
+        payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
+                                                 sender_address=trip_state.escrow_address,
+                                                 receiver_address=address,
+                                                 amount=trip_state.trip_cost,
+                                                 params=params)
+        self.assign_group([call_txn, payment_txn])
+
+        escrow_logic_signature = transaction.LogicSig(escrow_bytes)
+        return [call_txn.sign(user_private_key), transaction.LogicSigTransaction(payment_txn,
+                                                                                 escrow_logic_signature)]
+
+    def build_start_group(self,
+                          creator_private_key: str,
+                          trip_state: TripState,
+                          escrow_bytes: bytes,
+                          params: transaction.SuggestedParams = None):
+        """
+        Build and sign the start group: the start call and the payout of the escrow to the creator
+        :param creator_private_key:
+        :param trip_state:
+        :param escrow_bytes:
+        :param params:
+        :return: list of signed transactions
+        """
+        address = self.account_registry.address_of(creator_private_key)
+        call_txn = ApplicationManager.call_app(algod_client=self.algod_client,
+                                               address=address,
+                                               app_id=self.app_id,
+                                               app_args=[AppMethods.start_trip],
+                                               params=params)
+
+        payment_txn = ApplicationManager.payment(algod_client=self.algod_client,
+                                                 sender_address=trip_state.escrow_address,
+                                                 receiver_address=address,
+                                                 amount=trip_state.trip_cost,
+                                                 close_remainder_to=address,
+                                                 params=params)
+        self.assign_group([call_txn, payment_txn])
+
+        escrow_logic_signature = transaction.LogicSig(escrow_bytes)
+        return [call_txn.sign(creator_private_key), transaction.LogicSigTransaction(payment_txn,
+                                                                                    escrow_logic_signature)]
+
+    def build_delete_txn(self, creator_private_key: str, params: transaction.SuggestedParams = None):
+        """
+        Build and sign the deletion of the app
+        :return: signed transaction
+        """
+        return ApplicationManager.delete_app(algod_client=self.algod_client,
+                                             address=self.account_registry.address_of(creator_private_key),
+                                             app_id=self.app_id,
+                                             sign_transaction=creator_private_key,
+                                             params=params)
+
+    def build_clear_txn(self, user_private_key: str, params: transaction.SuggestedParams = None):
+        """
+        Build and sign the clear of the app from a user account
+        :return: signed transaction
+        """
+        return ApplicationManager.clear_app(algod_client=self.algod_client,
+                                            address=self.account_registry.address_of(user_private_key),
+                                            app_id=self.app_id,
+                                            sign_transaction=user_private_key,
+                                            params=params)
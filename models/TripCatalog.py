@@ -0,0 +1,206 @@
+# class to keep a local sqlite catalog of the trips published on chain
+# the catalog syncs incrementally from the indexer, trip searches are local index lookups
+
+import sqlite3
+from threading import Lock
+
+from constants import Constants
+from models.IndexerManager import IndexerHelper
+from models.TripState import TripState
+from smart_contracts.carsharing_interface import AppState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class TripCatalog:
+    columns = ("app_id", "creator", "creator_name", "departure_address", "arrival_address",
+               "departure_date", "departure_date_round", "arrival_date", "arrival_date_round",
+               "trip_cost", "max_participants", "available_seats", "app_state", "escrow_address",
+               "created_round", "updated_round", "deleted")
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS trips (
+            app_id INTEGER PRIMARY KEY,
+            creator TEXT,
+            creator_name TEXT,
+            departure_address TEXT,
+            arrival_address TEXT,
+            departure_date TEXT,
+            departure_date_round INTEGER,
+            arrival_date TEXT,
+            arrival_date_round INTEGER,
+            trip_cost INTEGER,
+            max_participants INTEGER,
+            available_seats INTEGER,
+            app_state INTEGER,
+            escrow_address TEXT,
+            created_round INTEGER,
+            updated_round INTEGER,
+            deleted INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS trips_route ON trips (departure_address, arrival_address, departure_date);
+        CREATE INDEX IF NOT EXISTS trips_departure_date ON trips (departure_date);
+        CREATE INDEX IF NOT EXISTS trips_available_seats ON trips (available_seats);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS pending_trips (
+            app_id INTEGER PRIMARY KEY
+        );
+    """
+
+    def __init__(self, indexer_helper: IndexerHelper, path: str = None):
+        self.indexer_helper = indexer_helper
+        self.path = path if path is not None else Constants.trip_catalog_path
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = Lock()
+        with self.lock, self.connection:
+            self.connection.executescript(self.schema)
+
+    def close(self):
+        self.connection.close()
+        self.indexer_helper.close()
+
+    @property
+    def last_round(self):
+        """
+        Last indexer round included in the catalog, 0 before the first sync
+        :return:
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM sync_state WHERE key = 'last_round'").fetchone()
+        return row["value"] if row is not None else 0
+
+    def sync(self, refresh_active: bool = True):
+        """
+        Add the trips created since the last processed round, then refresh the state of the active trips
+        A failed lookup of a trip is logged and skipped, a new trip is looked up again on the next sync
+        :param refresh_active: re-read the state of the trips not finished nor deleted
+        :return: number of new trips
+        """
+        min_round = self.last_round + 1
+        max_round = self.indexer_helper.indexerObj.health()["round"]
+        # the applications cached at older rounds are looked up again
+        self.indexer_helper.observe_round(max_round)
+        if max_round < min_round:
+            return 0
+
+        known = set()
+        with self.lock:
+            # trips found by a previous sync whose lookup failed
+            pending = [row["app_id"] for row in self.connection.execute("SELECT app_id FROM pending_trips")]
+            if refresh_active:
+                known = {row["app_id"] for row in self.connection.execute(
+                    "SELECT app_id FROM trips WHERE deleted = 0 AND (app_state IS NULL OR app_state != ?)",
+                    (AppState.finished,))}
+
+        new_ids = [app_id for app_id in self.indexer_helper.iter_app_ids_from_transactions_note(
+            Constants.transaction_note, min_round=min_round, max_round=max_round) if app_id not in known]
+
+        responses = self.indexer_helper.get_applications_from_ids(list(known) + pending + new_ids, include_all=True,
+                                                                  return_exceptions=True)
+        rows = []
+        failed = []
+        for app_id, response in responses.items():
+            if isinstance(response, Exception):
+                logger.error("Error during lookup of app-id %s: %s", app_id, response)
+                failed.append((app_id,))
+                continue
+            row = self._to_row(app_id, response)
+            if row is not None:
+                rows.append(row)
+        failed = [entry for entry in failed if entry[0] not in known]
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO trips ({}) VALUES ({})".format(", ".join(self.columns),
+                                                                       ", ".join("?" * len(self.columns))),
+                rows)
+            self.connection.execute("DELETE FROM pending_trips")
+            self.connection.executemany("INSERT INTO pending_trips (app_id) VALUES (?)", failed)
+            self.connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_round', ?)",
+                                    (max_round,))
+        return len(new_ids)
+
+    @staticmethod
+    def _to_row(app_id: int, response: dict):
+        """
+        Convert an indexer application response to a catalog row
+        :param app_id:
+        :param response:
+        :return:
+        """
+        application = response.get("application")
+        if application is None or "params" not in application:
+            return None
+        trip_state, creator, _, _ = TripState.from_application_info(application)
+        return (app_id, creator, trip_state.creator_name, trip_state.departure_address,
+                trip_state.arrival_address, trip_state.departure_date, trip_state.departure_date_round,
+                trip_state.arrival_date, trip_state.arrival_date_round, trip_state.trip_cost,
+                trip_state.max_participants, trip_state.available_seats, trip_state.app_state,
+                trip_state.escrow_address, application.get("created-at-round"), response.get("current-round"),
+                1 if application.get("deleted") else 0)
+
+    def search(self,
+               departure_address: str = None,
+               arrival_address: str = None,
+               departure_from: str = None,
+               departure_to: str = None,
+               min_seats: int = None,
+               include_finished: bool = False,
+               limit: int = None):
+        """
+        Search the catalog, dates use the '%Y-%m-%d %H:%M' format of the trips
+        :param departure_address:
+        :param arrival_address:
+        :param departure_from: earliest departure date, inclusive
+        :param departure_to: latest departure date, inclusive
+        :param min_seats: minimum number of available seats
+        :param include_finished: include the finished and deleted trips
+        :param limit:
+        :return: list of trips as dicts, ordered by departure date
+        """
+        conditions = []
+        args = []
+        if departure_address is not None:
+            conditions.append("departure_address = ?")
+            args.append(departure_address)
+        if arrival_address is not None:
+            conditions.append("arrival_address = ?")
+            args.append(arrival_address)
+        if departure_from is not None:
+            conditions.append("departure_date >= ?")
+            args.append(departure_from)
+        if departure_to is not None:
+            conditions.append("departure_date <= ?")
+            args.append(departure_to)
+        if min_seats is not None:
+            conditions.append("available_seats >= ?")
+            args.append(min_seats)
+        if not include_finished:
+            conditions.append("deleted = 0 AND (app_state IS NULL OR app_state != ?)")
+            args.append(AppState.finished)
+
+        query = "SELECT * FROM trips"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY departure_date"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(query, args)]
+
+    def get(self, app_id: int):
+        """
+        Get a trip from the catalog
+        :param app_id:
+        :return: trip as dict, None if not in the catalog
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM trips WHERE app_id = ?", (app_id,)).fetchone()
+        return dict(row) if row is not None else None
@@ -0,0 +1,240 @@
+# class to follow the trips state round by round
+# a background thread reads every new block, applies the state deltas of the carsharing application calls
+# to an in-memory view and notifies the subscribers of the changes
+
+import copy
+import itertools
+from threading import Event, Lock, Thread
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+from constants import Constants
+from helpers import algo_helper
+from models.TripState import TripState, ParticipantState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class TripEvent:
+    class Kind:
+        created = "created"
+        updated = "updated"
+        deleted = "deleted"
+        participant = "participant"
+
+    __slots__ = ("round", "app_id", "kind", "changes", "address")
+
+    def __init__(self, round_number: int, app_id: int, kind: str, changes: dict = None, address: str = None):
+        self.round = round_number
+        self.app_id = app_id
+        self.kind = kind
+        self.changes = changes if changes is not None else {}
+        # participant address for the local state changes
+        self.address = address
+
+    def __repr__(self):
+        return "TripEvent(round={}, app_id={}, kind={}, changes={}, address={})".format(
+            self.round, self.app_id, self.kind, self.changes, self.address)
+
+
+class TripFollower:
+    class OnComplete:
+        clear_state = 3
+        update_application = 4
+        delete_application = 5
+
+    def __init__(self, algod_client: algod.AlgodClient, app_ids: [int] = None, follow_new_trips: bool = True):
+        """
+        :param algod_client:
+        :param app_ids: trips to follow, their current state is read from the node
+        :param follow_new_trips: also follow the trips created with the carsharing transaction note
+        """
+        self.algod_client = algod_client
+        self.follow_new_trips = follow_new_trips
+        self.note = Constants.transaction_note.encode()
+        # app_id -> TripState
+        self.trips = {}
+        # app_id -> {address: ParticipantState}
+        self.participants = {}
+        # subscription id -> (callback, app_id)
+        self.subscribers = {}
+        self.subscription_ids = itertools.count(1)
+        self.last_round = None
+        # rounds whose block could not be applied, the view may miss their changes
+        self.skipped_rounds = []
+        self.thread = None
+        self.stopped = Event()
+        self.lock = Lock()
+        for app_id in app_ids or []:
+            self.track(app_id)
+
+    def track(self, app_id: int):
+        """
+        Follow an existing trip, reading its current state
+        :param app_id:
+        """
+        trip_state, _, _, _ = TripState.read(self.algod_client, app_id)
+        with self.lock:
+            self.trips[app_id] = trip_state
+            self.participants.setdefault(app_id, {})
+
+    def get_trip(self, app_id: int):
+        """
+        Get the current state of a followed trip
+        :param app_id:
+        :return: copy of the TripState, None if the trip is not followed
+        """
+        with self.lock:
+            trip_state = self.trips.get(app_id)
+            return copy.copy(trip_state) if trip_state is not None else None
+
+    def get_participants(self, app_id: int):
+        """
+        Get the local states of the trip participants observed since the follower started
+        :param app_id:
+        :return: dict of address -> ParticipantState
+        """
+        with self.lock:
+            return {address: copy.copy(state) for address, state in self.participants.get(app_id, {}).items()}
+
+    def subscribe(self, callback, app_id: int = None):
+        """
+        Register a callback invoked with a TripEvent for each change, from the follower thread
+        :param callback:
+        :param app_id: only notify the changes of this trip, all the trips if None
+        :return: subscription id
+        """
+        with self.lock:
+            subscription_id = next(self.subscription_ids)
+            self.subscribers[subscription_id] = (callback, app_id)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int):
+        with self.lock:
+            self.subscribers.pop(subscription_id, None)
+
+    def start(self, start_round: int = None):
+        """
+        Start following the rounds in a background thread
+        :param start_round: first round to read, the next round if None
+        """
+        if self.thread is not None:
+            return
+        if start_round is None:
+            start_round = self.algod_client.status().get("last-round") + 1
+        self.last_round = start_round - 1
+        self.stopped.clear()
+        self.thread = Thread(target=self._run, name="trip-follower", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stop following the rounds, the current wait for a new block is not interrupted
+        :param timeout:
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self):
+        while not self.stopped.is_set():
+            round_number = self.last_round + 1
+            try:
+                header = algo_helper.get_block(self.algod_client, round_number)
+                if header is None:
+                    self.algod_client.status_after_block(self.last_round)
+                    continue
+            except (AlgodHTTPError, OSError) as e:
+                # node not reachable, retry after a block time
+                logger.warning("Trip follower cannot read round %s: %s", round_number, e)
+                self.stopped.wait(Constants.block_speed)
+                continue
+
+            try:
+                self.process_block(header)
+            except Exception:
+                # the block would fail again on every retry, skip it instead of stalling the follower
+                logger.exception("Trip follower skipped round %s, the trips changed in it may be stale",
+                                 round_number)
+                with self.lock:
+                    self.skipped_rounds.append(round_number)
+                    self.last_round = round_number
+
+    def process_block(self, header: dict):
+        """
+        Apply the carsharing state changes of a block
+        :param header: block as returned by algo_helper.get_block
+        """
+        round_number = header["rnd"]
+        events = []
+        with self.lock:
+            for stxn in header.get("txns", []):
+                txn = stxn["txn"]
+                if txn.get("type") != "appl":
+                    continue
+                app_id = txn.get("apid", 0)
+                if app_id == 0:
+                    app_id = stxn.get("apid", 0)
+                    note = txn.get("note", b"")
+                    if not self.follow_new_trips or not isinstance(note, bytes) or not note.startswith(self.note):
+                        continue
+                    self.trips[app_id] = TripState()
+                    self.participants[app_id] = {}
+                    kind = TripEvent.Kind.created
+                elif app_id in self.trips:
+                    kind = TripEvent.Kind.updated
+                else:
+                    continue
+                events.extend(self._apply_transaction(round_number, app_id, kind, txn, stxn.get("dt", {})))
+            self.last_round = round_number
+            subscribers = list(self.subscribers.values())
+
+        for event in events:
+            for callback, app_id in subscribers:
+                if app_id is None or app_id == event.app_id:
+                    try:
+                        callback(event)
+                    except Exception:
+                        # a failing subscriber must not stop the delivery to the others
+                        logger.exception("Error in subscriber of %s", event)
+
+    def _apply_transaction(self, round_number: int, app_id: int, kind: str, txn: dict, eval_delta: dict):
+        """
+        Apply the state delta of an application call to the view
+        :return: list of TripEvent
+        """
+        events = []
+        sender = encoding.encode_address(txn["snd"])
+        on_complete = txn.get("apan", 0)
+
+        if on_complete == self.OnComplete.delete_application:
+            self.trips.pop(app_id, None)
+            self.participants.pop(app_id, None)
+            return [TripEvent(round_number, app_id, TripEvent.Kind.deleted)]
+
+        participants = self.participants[app_id]
+        if on_complete == self.OnComplete.clear_state:
+            if participants.pop(sender, None) is not None:
+                events.append(TripEvent(round_number, app_id, TripEvent.Kind.participant, address=sender))
+            return events
+
+        changes = self.trips[app_id].apply_delta(eval_delta.get("gd", {}))
+        if changes or kind == TripEvent.Kind.created:
+            events.append(TripEvent(round_number, app_id, kind, changes))
+
+        accounts = [sender] + [encoding.encode_address(address) for address in txn.get("apat", [])]
+        for index, local_delta in eval_delta.get("ld", {}).items():
+            if index >= len(accounts):
+                continue
+            address = accounts[index]
+            participant = participants.get(address)
+            if participant is None:
+                participant = participants[address] = ParticipantState()
+            changes = participant.apply_delta(local_delta)
+            if changes:
+                events.append(TripEvent(round_number, app_id, TripEvent.Kind.participant, changes, address))
+        return events
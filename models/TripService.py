@@ -0,0 +1,257 @@
+# class to drive many trips at once without user interaction
+# the trips are kept in a registry by app id, their lifecycle operations run on a shared worker pool
+# and a DepartureScheduler starts each trip once its departure round is reached
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from algosdk.v2client import algod
+
+from models.AccountRegistry import AccountRegistry
+from models.DepartureScheduler import Departure, DepartureScheduler
+from models.Trip import Trip
+from models.TripState import TripState
+from smart_contracts.carsharing_interface import AppState
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ManagedTrip:
+    class Status:
+        # waiting for the departure round
+        scheduled = "scheduled"
+        # start_trip submitted
+        starting = "starting"
+        started = "started"
+        # start given up by the scheduler
+        failed = "failed"
+        closed = "closed"
+
+    __slots__ = ("trip", "creator_private_key", "departure_round", "status", "lock", "last_error")
+
+    def __init__(self, trip: Trip, creator_private_key: str, departure_round: int, status: str):
+        self.trip = trip
+        self.creator_private_key = creator_private_key
+        self.departure_round = departure_round
+        self.status = status
+        # creator operations of a trip run one at a time
+        self.lock = Lock()
+        self.last_error = None
+
+    @property
+    def app_id(self):
+        return self.trip.app_id
+
+    def __repr__(self):
+        return "ManagedTrip(app_id={}, departure_round={}, status={})".format(self.app_id, self.departure_round,
+                                                                              self.status)
+
+
+class TripService:
+    class Variables:
+        # max number of lifecycle operations running at the same time
+        max_workers = 16
+
+    def __init__(self,
+                 algod_client: algod.AlgodClient,
+                 account_registry: AccountRegistry = None,
+                 max_workers: int = None):
+        self.algod_client = algod_client
+        self.account_registry = account_registry if account_registry is not None else AccountRegistry.shared()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers if max_workers is not None
+                                           else self.Variables.max_workers, thread_name_prefix="trip-service")
+        # app_id -> ManagedTrip
+        self.trips = {}
+        self.lock = Lock()
+        self.scheduler = DepartureScheduler(algod_client,
+                                            on_started=self._on_departure_started,
+                                            on_failed=self._on_departure_failed)
+
+    # --- registry ---
+
+    def register(self, app_id: int, creator_private_key: str):
+        """
+        Manage an existing trip, its state is read from the node
+        :param app_id:
+        :param creator_private_key:
+        :return: ManagedTrip
+        """
+        trip_state, _, _, _ = TripState.read(self.algod_client, app_id)
+        status = ManagedTrip.Status.started if trip_state.app_state == AppState.finished \
+            else ManagedTrip.Status.scheduled
+        trip = Trip(self.algod_client, app_id=app_id, account_registry=self.account_registry)
+        managed = ManagedTrip(trip, creator_private_key, trip_state.departure_date_round, status)
+        with self.lock:
+            self.trips[app_id] = managed
+        if status == ManagedTrip.Status.scheduled:
+            self.scheduler.schedule(trip, creator_private_key, managed.departure_round, managed.lock)
+        logger.info("Managing trip %s, departure round %s, %s", app_id, managed.departure_round, status)
+        return managed
+
+    def unregister(self, app_id: int):
+        """
+        Stop managing a trip
+        :param app_id:
+        :return: ManagedTrip, None if not managed
+        """
+        self.scheduler.cancel(app_id)
+        with self.lock:
+            return self.trips.pop(app_id, None)
+
+    def get(self, app_id: int):
+        """
+        Get a managed trip
+        :param app_id:
+        :return: ManagedTrip, None if not managed
+        """
+        return self.trips.get(app_id)
+
+    def get_trips(self, status: str = None):
+        """
+        Get the managed trips
+        :param status: only the trips with this status if given
+        :return: list of ManagedTrip
+        """
+        with self.lock:
+            return [managed for managed in self.trips.values() if status is None or managed.status == status]
+
+    # --- lifecycle operations ---
+
+    def create_trip(self,
+                    creator_private_key: str,
+                    creator_name: str,
+                    start_address: str,
+                    end_address: str,
+                    start_date: str,
+                    end_date: str,
+                    cost: int,
+                    seats: int):
+        """
+        Create, initialize and fund a new trip on the worker pool, then manage it
+        :return: Future resolved with the ManagedTrip, or raising if a step failed
+        """
+        def create():
+            trip = Trip(self.algod_client, account_registry=self.account_registry)
+            if trip.create_app(creator_private_key=creator_private_key,
+                               trip_creator_name=creator_name,
+                               trip_start_address=start_address,
+                               trip_end_address=end_address,
+                               trip_start_date=start_date,
+                               trip_end_date=end_date,
+                               trip_cost=cost,
+                               trip_available_seats=seats) is False:
+                raise RuntimeError("Trip creation failed")
+            if trip.initialize_escrow(creator_private_key) is False:
+                raise RuntimeError("Escrow initialization of trip {} failed".format(trip.app_id))
+            if trip.fund_escrow(creator_private_key) is False:
+                raise RuntimeError("Escrow funding of trip {} failed".format(trip.app_id))
+            return self.register(trip.app_id, creator_private_key)
+
+        return self.executor.submit(create)
+
+    def participate(self, app_id: int, user: dict):
+        """
+        Add a user to a managed trip
+        :param app_id:
+        :param user: {'name', 'mnemonic'}
+        :return: Future resolved with True if the user is participating
+        """
+        managed = self._get_managed(app_id)
+        entry = self.account_registry.resolve(user)
+        # the participations to a trip are coordinated by its ParticipationQueue, they do not take the trip lock
+        return self.executor.submit(managed.trip.participate, entry.private_key, entry.name)
+
+    def start_trip(self, app_id: int):
+        """
+        Start a managed trip now
+        :param app_id:
+        :return: Future resolved with True if the trip started
+        """
+        managed = self._get_managed(app_id)
+        with self.lock:
+            if managed.status not in (ManagedTrip.Status.scheduled, ManagedTrip.Status.failed):
+                raise ValueError("Trip {} is {}".format(app_id, managed.status))
+            managed.status = ManagedTrip.Status.starting
+        self.scheduler.cancel(app_id)
+        return self.executor.submit(self._start, managed)
+
+    def close_trip(self, app_id: int, participants: [dict]):
+        """
+        Delete a managed trip and clear its participants, the trip is no longer managed afterwards
+        :param app_id:
+        :param participants: list of {'name', 'mnemonic'}
+        :return: Future resolved with the close_trip results
+        """
+        managed = self._get_managed(app_id)
+        # a start submitted by the scheduler must not race with the deletion
+        self.scheduler.cancel(app_id)
+
+        def close():
+            with managed.lock:
+                results = managed.trip.close_trip(managed.creator_private_key, participants)
+            if results is not False:
+                managed.status = ManagedTrip.Status.closed
+                self.unregister(app_id)
+            return results
+
+        return self.executor.submit(close)
+
+    def _get_managed(self, app_id: int):
+        managed = self.trips.get(app_id)
+        if managed is None:
+            raise KeyError("Trip {} is not managed".format(app_id))
+        return managed
+
+    def _start(self, managed: ManagedTrip):
+        """
+        Run start_trip, a failed start is scheduled again for the departure round
+        :param managed:
+        :return: True if the trip started
+        """
+        with managed.lock:
+            started = managed.trip.start_trip(managed.creator_private_key) is not False
+        with self.lock:
+            if started:
+                managed.status = ManagedTrip.Status.started
+                managed.last_error = None
+            else:
+                managed.status = ManagedTrip.Status.scheduled
+                managed.last_error = "start_trip failed"
+        if started:
+            logger.info("Trip %s started", managed.app_id)
+        else:
+            self.scheduler.schedule(managed.trip, managed.creator_private_key, managed.departure_round,
+                                    managed.lock)
+        return started
+
+    # --- scheduler ---
+
+    def start(self):
+        """
+        Start the departure scheduler in a background thread
+        """
+        self.scheduler.start()
+
+    def stop(self, timeout: float = None, wait: bool = True):
+        """
+        Stop the scheduler and the worker pool, the current wait for a new block is not interrupted
+        :param timeout: max seconds to wait for the scheduler thread
+        :param wait: wait for the running operations
+        """
+        self.scheduler.stop(timeout)
+        self.executor.shutdown(wait=wait)
+
+    def _on_departure_started(self, departure: Departure):
+        with self.lock:
+            managed = self.trips.get(departure.app_id)
+            if managed is not None:
+                managed.status = ManagedTrip.Status.started
+                managed.last_error = None
+
+    def _on_departure_failed(self, departure: Departure):
+        with self.lock:
+            managed = self.trips.get(departure.app_id)
+            if managed is not None:
+                managed.status = ManagedTrip.Status.failed
+                managed.last_error = departure.last_error
@@ -0,0 +1,166 @@
+# typed views of the carsharing application state
+# global and local state are decoded in a single pass using the state keys of carsharing_interface
+
+import base64
+
+from algosdk import encoding
+
+from smart_contracts.carsharing_interface import GlobalState, LocalState
+
+
+class StateType:
+    uint = "uint"
+    string = "string"
+    address = "address"
+
+
+def decode_bytes(raw: bytes, value_type: str):
+    """
+    Decode a byte string state value according to its schema type
+    :param raw:
+    :param value_type:
+    :return:
+    """
+    if value_type == StateType.address and len(raw) == 32:
+        return encoding.encode_address(raw)
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return base64.b64encode(raw).decode('ascii')
+
+
+def decode_value(value: dict, value_type: str):
+    """
+    Decode a state value according to its schema type
+    :param value: state value as returned by algod, {'type', 'bytes', 'uint'}
+    :param value_type:
+    :return:
+    """
+    if value['type'] != 1:
+        return value['uint']
+    return decode_bytes(base64.b64decode(value['bytes']), value_type)
+
+
+class AppState:
+    # state key -> (attribute name, type), filled by the subclasses
+    schema = {}
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for attribute in self.__slots__:
+            setattr(self, attribute, kwargs.get(attribute))
+
+    @classmethod
+    def from_state(cls, state: list):
+        """
+        Decode a list of algod key-value state entries, keys not in the schema are ignored
+        :param state:
+        :return:
+        """
+        decoded = cls()
+        for item in state:
+            entry = cls.schema.get(item['key'])
+            if entry is not None:
+                setattr(decoded, entry[0], decode_value(item['value'], entry[1]))
+        return decoded
+
+    def apply_delta(self, delta: dict):
+        """
+        Apply a state delta as stored in blocks, {key: {'at': action, 'bs': bytes, 'ui': uint}}
+        Action 1 sets bytes, 2 sets an uint, 3 deletes the key
+        Keys and byte values may be strings decoded with surrogate escapes, see algo_helper.get_block
+        :param delta:
+        :return: dict of the changed attributes and their new value
+        """
+        changes = {}
+        for key, value_delta in delta.items():
+            if isinstance(key, str):
+                key = key.encode('utf-8', 'surrogateescape')
+            entry = self.schema.get(base64.b64encode(key).decode('ascii'))
+            if entry is None:
+                continue
+            action = value_delta.get('at')
+            if action == 1:
+                raw = value_delta.get('bs', b'')
+                if isinstance(raw, str):
+                    raw = raw.encode('utf-8', 'surrogateescape')
+                value = decode_bytes(raw, entry[1])
+            elif action == 2:
+                value = value_delta.get('ui', 0)
+            else:
+                value = None
+            setattr(self, entry[0], value)
+            changes[entry[0]] = value
+        return changes
+
+    def to_dict(self):
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ", ".join("{}={!r}".format(k, v) for k, v in self.to_dict().items()))
+
+
+def build_schema(keys, types: dict):
+    """
+    Index the schema entries by base64 key, the encoding used by algod
+    :param keys: class of the state keys, its attribute names are the attribute names of the decoded state
+    :param types: attribute name -> type
+    :return:
+    """
+    return {base64.b64encode(getattr(keys, attribute).encode('utf-8')).decode('ascii'): (attribute, value_type)
+            for attribute, value_type in types.items()}
+
+
+class TripState(AppState):
+    __slots__ = ("creator_address", "creator_name", "departure_address", "arrival_address",
+                 "departure_date", "departure_date_round", "arrival_date", "arrival_date_round",
+                 "max_participants", "trip_cost", "app_state", "available_seats", "escrow_address")
+
+    schema = build_schema(GlobalState, {
+        "creator_address": StateType.address,
+        "creator_name": StateType.string,
+        "departure_address": StateType.string,
+        "arrival_address": StateType.string,
+        "departure_date": StateType.string,
+        "departure_date_round": StateType.uint,
+        "arrival_date": StateType.string,
+        "arrival_date_round": StateType.uint,
+        "max_participants": StateType.uint,
+        "trip_cost": StateType.uint,
+        "app_state": StateType.uint,
+        "available_seats": StateType.uint,
+        "escrow_address": StateType.address,
+    })
+
+    @classmethod
+    def from_application_info(cls, results: dict):
+        """
+        Decode the response of the algod application endpoint
+        :param results:
+        :return: trip state, creator, approval program, clear state program
+        """
+        params = results['params']
+        return cls.from_state(params.get('global-state', [])), params.get('creator'), \
+            params.get('approval-program'), params.get('clear-state-program')
+
+    @classmethod
+    def read(cls, client, app_id: int):
+        """
+        Read the trip state of an application
+        :param client:
+        :param app_id:
+        :return: trip state, creator, approval program, clear state program
+        """
+        return cls.from_application_info(client.application_info(app_id))
+
+
+class ParticipantState(AppState):
+    __slots__ = ("is_participating",)
+
+    schema = build_schema(LocalState, {
+        "is_participating": StateType.uint,
+    })
@@ -0,0 +1,69 @@
+# headless service managing the trips of the creator account
+# the trips are started by the departure scheduler of TripService, stop the service with Ctrl+C
+
+import argparse
+import time
+
+from constants import Constants, get_env
+from models import NodeMetrics
+from models.AccountRegistry import AccountRegistry
+from models.IndexerManager import IndexerHelper
+from models.InstrumentedClient import InstrumentedAlgodClient
+from models.TripCatalog import TripCatalog
+from models.TripService import ManagedTrip, TripService
+from utilities.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def catalog_app_ids(creator_address: str):
+    """
+    Get the trips of the creator not started yet, from the indexer
+    :param creator_address:
+    :return:
+    """
+    catalog = TripCatalog(IndexerHelper(metrics_sink=NodeMetrics.get_default_sink()))
+    try:
+        catalog.sync()
+        return [trip["app_id"] for trip in catalog.search(include_finished=False) if trip["creator"] == creator_address]
+    finally:
+        catalog.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the trips of the creator account")
+    parser.add_argument("--app-id", type=int, action="append", default=[], help="trip to manage, repeatable")
+    parser.add_argument("--catalog", action="store_true", help="also manage the trips of the creator on the indexer")
+    parser.add_argument("--max-workers", type=int, default=None, help="max concurrent lifecycle operations")
+    args = parser.parse_args()
+
+    account_registry = AccountRegistry.shared()
+    creator = account_registry.from_mnemonic(Constants.creator_mnemonic)
+    algod_client = InstrumentedAlgodClient(Constants.algod_token, Constants.algod_address,
+                                           metrics_sink=NodeMetrics.get_default_sink())
+
+    app_ids = list(args.app_id)
+    if not app_ids and not args.catalog and get_env('APP_ID') is not None:
+        app_ids.append(int(get_env('APP_ID')))
+    if args.catalog:
+        app_ids += [app_id for app_id in catalog_app_ids(creator.address) if app_id not in app_ids]
+
+    service = TripService(algod_client, account_registry=account_registry, max_workers=args.max_workers)
+    for app_id in app_ids:
+        try:
+            service.register(app_id, creator.private_key)
+        except Exception as e:
+            logger.error("Cannot manage trip %s: %s", app_id, e)
+
+    service.start()
+    logger.info("Managing %s trips", len(service.get_trips()))
+    try:
+        while True:
+            time.sleep(Constants.block_speed)
+    except KeyboardInterrupt:
+        logger.info("Stopping, %s trips still scheduled", len(service.get_trips(ManagedTrip.Status.scheduled)))
+        service.stop(timeout=Constants.block_speed, wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# interface of the carsharing contracts that does not need pyteal
+# used by the paths that only read the state or sign transactions
+
+from algosdk.future import transaction
+
+
+class AppMethods:
+    initialize_escrow = "initializeEscrow"
+    fund_escrow = "fundEscrow"
+    update_trip = "updateTrip"
+    participate_trip = "participateTrip"
+    start_trip = "startTrip"
+    cancel_trip_participation = "cancelParticipation"
+
+
+class GlobalState:
+    # attribute name -> global state key, CarSharingContract.Variables and TripState use the same names
+    creator_address = "creator"
+    creator_name = "creator_name"
+    departure_address = "departure_address"
+    arrival_address = "arrival_address"
+    departure_date = "departure_date"
+    departure_date_round = "departure_date_round"
+    arrival_date = "arrival_date"
+    arrival_date_round = "arrival_date_round"
+    max_participants = "max_participants"
+    trip_cost = "trip_cost"
+    app_state = "trip_state"
+    available_seats = "available_seats"
+    escrow_address = "escrow_address"
+
+
+class LocalState:
+    is_participating = "is_participating"
+
+
+class AppState:
+    not_initialized = 0
+    initialized = 1
+    ready = 2
+    finished = 3
+
+
+def global_schema():
+    """
+    global_schema of the contract
+    :return:
+    """
+    return transaction.StateSchema(num_uints=6, num_byte_slices=7)
+
+
+def local_schema():
+    """
+    local_schema of the contract
+    :return:
+    """
+    return transaction.StateSchema(num_uints=1, num_byte_slices=0)
+
+
+def escrow_source(app_id: int, version: int):
+    """
+    TEAL source of smart_contracts.contract_escrow as produced by compileTeal in Signature mode
+    compile_contract.py checks that it matches the pyteal contract
+    :param app_id:
+    :param version:
+    :return:
+    """
+    return "\n".join([
+        "#pragma version {}".format(version),
+        "global GroupSize",
+        "int 2",
+        "==",
+        "assert",
+        "gtxn 0 ApplicationID",
+        "int {}".format(app_id),
+        "==",
+        "assert",
+        "gtxn 1 TypeEnum",
+        "int pay",
+        "==",
+        "assert",
+        "int 1",
+        "return",
+    ])
@@ -1,6 +1,7 @@
-import algosdk
 from pyteal import *
 
+from smart_contracts import carsharing_interface
+
 
 class CarSharingContract:
     class Constants:
@@ -8,29 +9,23 @@ class CarSharingContract:
 
     class Variables:
         # Global State Keys
-        creator_address = Bytes("creator")  # Bytes
-        creator_name = Bytes("creator_name")  # Bytes
-        departure_address = Bytes("departure_address")  # Bytes
-        arrival_address = Bytes("arrival_address")  # Bytes
-        departure_date = Bytes("departure_date")  # Bytes
-        departure_date_round = Bytes("departure_date_round")  # Int
-        arrival_date = Bytes("arrival_date")  # Bytes
-        arrival_date_round = Bytes("arrival_date_round")  # Int
-        max_participants = Bytes("max_participants")  # Int
-        trip_cost = Bytes("trip_cost")  # Int
-        app_state = Bytes("trip_state")  # Int
-        available_seats = Bytes("available_seats")  # Int
-        escrow_address = Bytes("escrow_address")  # Bytes
+        creator_address = Bytes(carsharing_interface.GlobalState.creator_address)  # Bytes
+        creator_name = Bytes(carsharing_interface.GlobalState.creator_name)  # Bytes
+        departure_address = Bytes(carsharing_interface.GlobalState.departure_address)  # Bytes
+        arrival_address = Bytes(carsharing_interface.GlobalState.arrival_address)  # Bytes
+        departure_date = Bytes(carsharing_interface.GlobalState.departure_date)  # Bytes
+        departure_date_round = Bytes(carsharing_interface.GlobalState.departure_date_round)  # Int
+        arrival_date = Bytes(carsharing_interface.GlobalState.arrival_date)  # Bytes
+        arrival_date_round = Bytes(carsharing_interface.GlobalState.arrival_date_round)  # Int
+        max_participants = Bytes(carsharing_interface.GlobalState.max_participants)  # Int
+        trip_cost = Bytes(carsharing_interface.GlobalState.trip_cost)  # Int
+        app_state = Bytes(carsharing_interface.GlobalState.app_state)  # Int
+        available_seats = Bytes(carsharing_interface.GlobalState.available_seats)  # Int
+        escrow_address = Bytes(carsharing_interface.GlobalState.escrow_address)  # Bytes
         # Local State Keys
-        is_participating = Bytes("is_participating")  # Int
+        is_participating = Bytes(carsharing_interface.LocalState.is_participating)  # Int
 
-    class AppMethods:
-        initialize_escrow = "initializeEscrow"
-        fund_escrow = "fundEscrow"
-        update_trip = "updateTrip"
-        participate_trip = "participateTrip"
-        start_trip = "startTrip"
-        cancel_trip_participation = "cancelParticipation"
+    AppMethods = carsharing_interface.AppMethods
 
     class AppState:
         not_initialized = Int(0)
@@ -399,8 +394,7 @@ class CarSharingContract:
         global_schema of the contract
         :return:
         """
-        return algosdk.future.transaction.StateSchema(num_uints=6,
-                                                      num_byte_slices=7)
+        return carsharing_interface.global_schema()
 
     @property
     def local_schema(self):
@@ -408,5 +402,4 @@ class CarSharingContract:
         local_schema of the contract
         :return:
         """
-        return algosdk.future.transaction.StateSchema(num_uints=1,
-                                                      num_byte_slices=0)
+        return carsharing_interface.local_schema()
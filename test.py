@@ -1,8 +1,9 @@
-from algosdk.v2client import algod
-
 from constants import Constants
 from helpers import algo_helper
+from models import NodeMetrics
 from models.IndexerManager import IndexerHelper
+from models.InstrumentedClient import InstrumentedAlgodClient
+from models.TripCatalog import TripCatalog
 
 
 def main():
@@ -10,10 +11,14 @@ def main():
     private_key = algo_helper.get_private_key_from_mnemonic(mnemonic)
     address = algo_helper.get_address_from_private_key(private_key)
 
-    algod_client = algod.AlgodClient(Constants.algod_token, Constants.algod_address)
+    metrics_sink = NodeMetrics.get_default_sink()
+    algod_client = InstrumentedAlgodClient(Constants.algod_token, Constants.algod_address, metrics_sink=metrics_sink)
 
-    indexer = IndexerHelper()
-    ids = indexer.get_app_ids_from_transactions_note(Constants.transaction_note)
+    indexer = IndexerHelper(metrics_sink=metrics_sink)
+    catalog = TripCatalog(indexer)
+    print("New trips: {}".format(catalog.sync()))
+    # app ids grow with the creation order, the last one is the newest trip
+    ids = sorted(trip["app_id"] for trip in catalog.search(include_finished=True))
     print(ids)
     app_info = indexer.get_application_from_id(ids[-1])
     print(app_info)
@@ -0,0 +1,27 @@
+# fixtures of the tests running against the mock algod
+# the mock runs in dev mode: every submission produces a new block, as the sandbox in dev mode
+
+import pytest
+from algosdk.v2client import algod
+
+from utilities.mock_algod import MockAlgodServer, MockIndexerServer
+
+
+@pytest.fixture
+def algod_server():
+    server = MockAlgodServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def algod_client(algod_server):
+    return algod.AlgodClient(algod_server.token, algod_server.address)
+
+
+@pytest.fixture
+def indexer_server(algod_server):
+    # pages of at most 2 transactions, less than the page size asked by IndexerHelper
+    server = MockIndexerServer(algod_server.ledger, max_transactions_limit=2).start()
+    yield server
+    server.stop()
@@ -0,0 +1,39 @@
+# checks of the shared account registry
+
+from algosdk import account, mnemonic
+
+from constants import Constants
+from models.AccountRegistry import AccountRegistry
+
+
+def test_shared_registry_reads_the_accounts_on_lookup(monkeypatch):
+    private_key, address = account.generate_account()
+    loaded = []
+
+    def read_accounts(filename):
+        loaded.append(filename)
+        return [{'name': "user", 'mnemonic': mnemonic.from_private_key(private_key)}]
+
+    monkeypatch.setattr("constants.read_test_users", read_accounts)
+    Constants.reload()
+    try:
+        registry = AccountRegistry.shared()
+        assert registry.address_of(private_key) == address
+        assert loaded == []
+        assert registry.get("user").address == address
+        assert loaded == ["assets/accounts.csv"]
+
+        Constants.reload()
+        assert AccountRegistry.shared() is not registry
+    finally:
+        monkeypatch.undo()
+        Constants.reload()
+
+
+def test_derived_addresses_are_bounded(monkeypatch):
+    monkeypatch.setattr(AccountRegistry.Variables, "max_derived_addresses", 2)
+    registry = AccountRegistry()
+    keys = [account.generate_account() for _ in range(3)]
+    for private_key, address in keys:
+        assert registry.address_of(private_key) == address
+    assert list(registry.derived_addresses) == [private_key for private_key, _ in keys[1:]]
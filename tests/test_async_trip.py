@@ -0,0 +1,57 @@
+# checks of the asyncio Trip API against the mock algod
+
+import asyncio
+from datetime import datetime, timedelta
+
+from algosdk import account, mnemonic
+
+from constants import Constants
+from models.AsyncAlgodClient import AsyncAlgodClient
+from models.AsyncTrip import AsyncTrip
+from models.ProgramCache import ProgramCache
+
+
+async def run_lifecycle(algod_server, program_cache):
+    creator_private_key, _ = account.generate_account()
+    user_private_key, user_address = account.generate_account()
+    user = {'name': "user", 'mnemonic': mnemonic.from_private_key(user_private_key)}
+    ledger = algod_server.ledger
+    start_date = (datetime.now() + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+
+    async with AsyncAlgodClient(algod_server.token, algod_server.address) as algod_client:
+        trip = AsyncTrip(algod_client, program_cache=program_cache)
+        app_id = await trip.create_app(creator_private_key, "creator", "departure", "arrival", start_date,
+                                       end_date, 5000, 2)
+        assert app_id
+        await trip.initialize_escrow(creator_private_key)
+        await trip.fund_escrow(creator_private_key)
+        state = ledger.apps[app_id]['global']
+        assert state['trip_state'] == ledger.AppState.ready
+
+        await trip.participate(user_private_key, "user")
+        assert state['available_seats'] == 1
+        assert (await trip.read_local_state(user_address)).is_participating == 1
+        await trip.cancel_participation(creator_private_key, user_private_key, "user")
+        assert state['available_seats'] == 2
+        await trip.participate(user_private_key, "user")
+        assert state['available_seats'] == 1
+
+        while ledger.round < state['departure_date_round']:
+            ledger.next_round()
+        await trip.start_trip(creator_private_key)
+        assert state['trip_state'] == ledger.AppState.finished
+
+        assert await trip.close_trip(creator_private_key, [user])
+        assert app_id not in ledger.apps
+        assert app_id not in ledger.accounts[user_address]['local']
+
+
+def test_trip_lifecycle(algod_server, tmp_path):
+    asyncio.run(run_lifecycle(algod_server, ProgramCache(cache_dir=str(tmp_path))))
+
+
+def test_trip_lifecycle_compiled_by_algod(algod_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(Constants, "compile_backend", "algod")
+    asyncio.run(run_lifecycle(algod_server, ProgramCache(cache_dir=str(tmp_path))))
+    assert algod_server.stats.snapshot()["routes"].get("post_compile")
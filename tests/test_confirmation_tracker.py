@@ -0,0 +1,32 @@
+# checks of the shared confirmation tracker
+
+import socket
+
+import pytest
+from algosdk import account
+from algosdk.v2client import algod
+
+from constants import Constants
+from models.ApplicationManager import ApplicationManager
+from models.ConfirmationTracker import ConfirmationTimeoutError, ConfirmationTracker
+
+
+def test_send_transaction_returns_pending_info(algod_client):
+    private_key, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    txn = ApplicationManager.payment(algod_client, sender, receiver, 1000, sign_transaction=private_key)
+    txinfo = ApplicationManager.send_transaction(algod_client, txn)
+    assert txinfo['confirmed-round'] > 0
+    assert txinfo['txn']['txn']['amt'] == 1000
+
+
+def test_pending_transactions_fail_when_node_unreachable(monkeypatch):
+    monkeypatch.setattr(Constants, "block_speed", 0.01)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    algod_client = algod.AlgodClient("a" * 64, "http://127.0.0.1:{}".format(port))
+    tracker = ConfirmationTracker(algod_client, max_node_errors=3)
+    future = tracker.track("TXID")
+    with pytest.raises(ConfirmationTimeoutError):
+        future.result(timeout=10)
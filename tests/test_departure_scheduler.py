@@ -0,0 +1,71 @@
+# checks of the departure scheduler against the trip operations
+
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+
+from algosdk import account
+
+from models.DepartureScheduler import DepartureScheduler
+from models.Trip import Trip
+
+
+def create_trip(algod_client):
+    creator_private_key, _ = account.generate_account()
+    trip = Trip(algod_client)
+    start_date = (datetime.now() + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+    trip.create_app(creator_private_key, "creator", "departure", "arrival", start_date, end_date, 5000, 2)
+    trip.initialize_escrow(creator_private_key)
+    trip.fund_escrow(creator_private_key)
+    return trip, creator_private_key
+
+
+class TripLock:
+    """
+    Lock telling when the scheduler waits for it
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.waiting = Event()
+
+    def __enter__(self):
+        self.waiting.set()
+        self.lock.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.lock.release()
+
+
+def test_departure_cancelled_while_waiting_for_the_trip_lock(algod_client):
+    trip, creator_private_key = create_trip(algod_client)
+    started = []
+    scheduler = DepartureScheduler(algod_client, on_started=started.append)
+    trip_lock = TripLock()
+    scheduler.schedule(trip, creator_private_key, 0, trip_lock)
+
+    results = {}
+    with trip_lock.lock:
+        thread = Thread(target=lambda: results.update(scheduler.on_round(1)))
+        thread.start()
+        trip_lock.waiting.wait(10)
+        scheduler.cancel(trip.app_id)
+    thread.join()
+    scheduler.stop()
+
+    assert results == {trip.app_id: False}
+    assert started == []
+
+
+def test_scheduler_started_again_after_stop(algod_client, algod_server):
+    trip, creator_private_key = create_trip(algod_client)
+    departure_round = algod_server.ledger.apps[trip.app_id]['global']['departure_date_round']
+    while algod_server.ledger.round < departure_round:
+        algod_server.ledger.next_round()
+    started = []
+    scheduler = DepartureScheduler(algod_client, on_started=started.append)
+    scheduler.stop()
+    scheduler.schedule(trip, creator_private_key, departure_round)
+    assert scheduler.on_round(departure_round) == {trip.app_id: True}
+    assert [departure.app_id for departure in started] == [trip.app_id]
+    scheduler.stop()
@@ -0,0 +1,43 @@
+# checks of the trip discovery through the mock indexer
+
+from datetime import datetime, timedelta
+
+from algosdk import account
+
+from constants import Constants
+from models.IndexerManager import IndexerHelper
+from models.Trip import Trip
+
+
+def test_discovery_follows_pages_shorter_than_the_page_size(algod_client, indexer_server):
+    creator_private_key, _ = account.generate_account()
+    start_date = (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+    app_ids = [Trip(algod_client).create_app(creator_private_key, "creator", "departure", "arrival", start_date,
+                                             end_date, 5000, 2) for _ in range(5)]
+
+    indexer_helper = IndexerHelper(host=indexer_server.address, token=indexer_server.token)
+    assert indexer_helper.get_app_ids_from_transactions_note(Constants.transaction_note) == app_ids
+    assert indexer_server.stats.snapshot()['routes']['get_transactions'] == 3
+
+
+def test_applications_cached_until_a_new_round(algod_client, algod_server, indexer_server):
+    creator_private_key, _ = account.generate_account()
+    start_date = (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+    app_id = Trip(algod_client).create_app(creator_private_key, "creator", "departure", "arrival", start_date,
+                                           end_date, 5000, 2)
+
+    indexer_helper = IndexerHelper(host=indexer_server.address, token=indexer_server.token)
+    indexer_helper.get_applications_from_ids([app_id, app_id])
+    indexer_helper.get_applications_from_ids([app_id])
+    assert indexer_server.stats.snapshot()['routes']['get_application'] == 1
+
+    algod_server.ledger.next_round()
+    indexer_helper.observe_round(indexer_helper.indexerObj.health()["round"])
+    indexer_helper.get_applications_from_ids([app_id])
+    assert indexer_server.stats.snapshot()['routes']['get_application'] == 2
+
+    executor = indexer_helper.executor
+    indexer_helper.close()
+    assert indexer_helper.executor is None and executor._shutdown
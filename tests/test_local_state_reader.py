@@ -0,0 +1,22 @@
+# checks of the account index cached by the local state reader
+
+from algosdk import account
+
+from models.LocalStateReader import LocalStateReader
+
+
+def test_account_index_read_again_after_a_new_round(algod_client, algod_server):
+    _, address = account.generate_account()
+    reader = LocalStateReader(algod_client)
+    # node without the per-application account endpoint
+    reader.per_app_endpoint = False
+
+    assert reader.read_opt_in(address, 1) == (False, None)
+    reader.observe_round(algod_server.ledger.round)
+    assert reader.read_opt_in(address, 1) == (False, None)
+    assert algod_server.stats.snapshot()['routes']['get_account'] == 1
+
+    algod_server.ledger.next_round()
+    reader.observe_round(algod_server.ledger.round)
+    reader.read_opt_in(address, 1)
+    assert algod_server.stats.snapshot()['routes']['get_account'] == 2
@@ -0,0 +1,35 @@
+# checks of the request metrics of the instrumented clients
+
+import time
+
+from models.InstrumentedClient import InstrumentedAlgodClient
+from models.NodeMetrics import InMemoryMetricsSink, PrometheusFileSink
+
+
+def test_instrumented_client_counts_the_response_bytes(algod_server):
+    sink = InMemoryMetricsSink()
+    algod_client = InstrumentedAlgodClient(algod_server.token, algod_server.address, metrics_sink=sink)
+    algod_client.status()
+    try:
+        algod_client.application_info(1)
+    except Exception as e:
+        assert str(e) == "application does not exist"
+
+    stats = {entry['endpoint']: entry for entry in sink.snapshot()}
+    assert stats["GET /status"]['count'] == 1
+    assert stats["GET /applications/{id}"]['errors'] == 1
+    assert sum(entry['bytes_received'] for entry in stats.values()) == algod_server.stats.snapshot()['bytes_sent']
+
+
+def test_prometheus_file_written_in_background(algod_server, tmp_path):
+    path = tmp_path / "metrics.prom"
+    sink = PrometheusFileSink(str(path), write_interval=0)
+    algod_client = InstrumentedAlgodClient(algod_server.token, algod_server.address, metrics_sink=sink)
+    algod_client.status()
+
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sink.close()
+    assert 'endpoint="GET /status"' in path.read_text()
+    assert sink.writer.name == "metrics-writer" and not sink.writer.is_alive()
@@ -0,0 +1,60 @@
+# checks of the seat accounting of the participation queue
+
+from datetime import datetime, timedelta
+
+import pytest
+from algosdk import account
+
+from models.ParticipationQueue import ParticipationQueue
+from models.Trip import Trip
+
+
+@pytest.fixture
+def trip(algod_client):
+    creator_private_key, _ = account.generate_account()
+    trip = Trip(algod_client)
+    start_date = (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M')
+    end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+    trip.create_app(creator_private_key, "creator", "departure", "arrival", start_date, end_date, 5000, 1)
+    trip.initialize_escrow(creator_private_key)
+    trip.fund_escrow(creator_private_key)
+    trip.creator_private_key = creator_private_key
+    return trip
+
+
+def test_seat_freed_by_cancel_is_available(trip, algod_server):
+    first_private_key, _ = account.generate_account()
+    second_private_key, _ = account.generate_account()
+    assert trip.participate(first_private_key, "first")
+    assert not trip.participate(second_private_key, "second")
+
+    trip.cancel_participation(trip.creator_private_key, first_private_key, "first")
+    assert trip.participate(second_private_key, "second")
+    assert algod_server.ledger.apps[trip.app_id]['global']['available_seats'] == 0
+
+
+def test_queue_closed_with_the_trip(trip):
+    queue = ParticipationQueue.for_trip(trip)
+    assert trip.close_trip(trip.creator_private_key, []) == {}
+    assert ParticipationQueue.for_trip(trip) is not queue
+    with pytest.raises(RuntimeError):
+        queue.submit(trip, trip.creator_private_key)
+
+
+def test_participation_retried_after_the_opt_in(trip, algod_server, algod_client):
+    user_private_key, user_address = account.generate_account()
+    build_participation_group = trip.build_participation_group
+    attempts = []
+
+    def build_expired_once(user_private_key, trip_state, params=None):
+        # the first group is built with params already expired when submitted, after the opt-in is confirmed
+        attempts.append(trip_state)
+        if len(attempts) == 1:
+            params = algod_client.suggested_params()
+            params.first = params.last = 1
+        return build_participation_group(user_private_key, trip_state, params)
+
+    trip.build_participation_group = build_expired_once
+    assert trip.participate(user_private_key, "user")
+    assert len(attempts) == 2
+    assert algod_server.ledger.accounts[user_address]['local'][trip.app_id]['is_participating'] == 1
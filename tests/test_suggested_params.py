@@ -0,0 +1,45 @@
+# checks of the suggested params shared between transactions
+
+from algosdk import account
+
+from models.ApplicationManager import ApplicationManager
+from models.SuggestedParamsProvider import SuggestedParamsProvider
+
+
+def test_params_fetched_once_per_round(algod_client):
+    provider = SuggestedParamsProvider(algod_client)
+    first = provider.get()
+    second = provider.get()
+    assert provider.stats == {'hits': 1, 'misses': 1}
+    assert (second.first, second.last) == (first.first, first.last)
+    assert second.gh == first.gh
+
+
+def test_observed_round_moves_validity_window(algod_client):
+    provider = SuggestedParamsProvider(algod_client)
+    params = provider.get()
+    provider.observe_round(params.first + 3)
+    moved = provider.get()
+    assert moved.first == params.first + 3
+    assert moved.last - moved.first == params.last - params.first
+    # rounds older than the known one are ignored
+    provider.observe_round(params.first)
+    assert provider.get().first == params.first + 3
+
+
+def test_old_round_fetched_again(algod_client, algod_server):
+    provider = SuggestedParamsProvider(algod_client, max_round_age=0)
+    params = provider.get()
+    algod_server.ledger.next_round()
+    assert provider.get().first == params.first + 1
+    assert provider.stats['misses'] == 2
+
+
+def test_identical_transactions_sent_in_sequence(algod_client):
+    private_key, sender = account.generate_account()
+    _, receiver = account.generate_account()
+    confirmed_rounds = []
+    for _ in range(2):
+        txn = ApplicationManager.payment(algod_client, sender, receiver, 1000, sign_transaction=private_key)
+        confirmed_rounds.append(ApplicationManager.send_transaction(algod_client, txn)['confirmed-round'])
+    assert confirmed_rounds[1] > confirmed_rounds[0]
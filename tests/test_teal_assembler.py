@@ -0,0 +1,123 @@
+# checks of the local TEAL assembler against the bytecode produced by algod /compile
+# the programs of .env.example were compiled by algod, they are disassembled with their constants inlined
+# (int/byte pseudo-ops, labels instead of offsets) and assembled again, so the constant blocks,
+# the push opcodes and the branch offsets are all rebuilt by the assembler
+
+import base64
+import os
+
+import pytest
+from dotenv import dotenv_values
+
+from helpers import teal_assembler
+
+env_example = dotenv_values(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env.example"))
+
+# opcode byte -> (name, immediates)
+opcode_names = {opcode: (name, immediates) for name, (opcode, _, immediates) in teal_assembler.opcodes.items()}
+
+
+def decode_uvarint(program: bytes, position: int):
+    value = 0
+    shift = 0
+    while True:
+        byte = program[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, position
+
+
+def disassemble(program: bytes):
+    """
+    Disassemble a program, the constant references are replaced by int/byte pseudo-ops
+    :param program:
+    :return: TEAL source
+    """
+    version, position = decode_uvarint(program, 0)
+    int_block = []
+    byte_block = []
+    # (position, instruction)
+    instructions = []
+    # target position -> label
+    labels = {}
+    while position < len(program):
+        start = position
+        opcode = program[position]
+        position += 1
+        if opcode == 0x20:
+            count, position = decode_uvarint(program, position)
+            for _ in range(count):
+                value, position = decode_uvarint(program, position)
+                int_block.append(value)
+        elif opcode == 0x26:
+            count, position = decode_uvarint(program, position)
+            for _ in range(count):
+                length, position = decode_uvarint(program, position)
+                byte_block.append(program[position:position + length])
+                position += length
+        elif opcode == 0x21:
+            instructions.append((start, "int {}".format(int_block[program[position]])))
+            position += 1
+        elif 0x22 <= opcode <= 0x25:
+            instructions.append((start, "int {}".format(int_block[opcode - 0x22])))
+        elif opcode == 0x27:
+            instructions.append((start, "byte 0x{}".format(byte_block[program[position]].hex())))
+            position += 1
+        elif 0x28 <= opcode <= 0x2b:
+            instructions.append((start, "byte 0x{}".format(byte_block[opcode - 0x28].hex())))
+        elif opcode == 0x80:
+            length, position = decode_uvarint(program, position)
+            instructions.append((start, "byte 0x{}".format(program[position:position + length].hex())))
+            position += length
+        elif opcode == 0x81:
+            value, position = decode_uvarint(program, position)
+            instructions.append((start, "int {}".format(value)))
+        else:
+            name, immediates = opcode_names[opcode]
+            tokens = [name]
+            for immediate in immediates:
+                if immediate == "label":
+                    offset = int.from_bytes(program[position:position + 2], "big", signed=True)
+                    position += 2
+                    target = position + offset
+                    tokens.append(labels.setdefault(target, "label{}".format(target)))
+                elif immediate == "uint8":
+                    tokens.append(str(program[position]))
+                    position += 1
+                else:
+                    tokens.append(teal_assembler.field_groups[immediate][program[position]])
+                    position += 1
+            instructions.append((start, " ".join(tokens)))
+
+    lines = ["#pragma version {}".format(version)]
+    for start, instruction in instructions:
+        if start in labels:
+            lines.append("{}:".format(labels[start]))
+        lines.append(instruction)
+    if len(program) in labels:
+        lines.append("{}:".format(labels[len(program)]))
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("key", ["APPROVAL_PROGRAM", "APPROVAL_PROGRAM_TEST", "CLEAR_STATE_PROGRAM"])
+def test_assemble_matches_algod(key):
+    compiled = base64.b64decode(env_example[key])
+    assert teal_assembler.assemble(disassemble(compiled)) == compiled
+
+
+def test_constants_referenced_once_are_pushed():
+    program = teal_assembler.assemble("#pragma version 5\nint 7\nint 1\nint 1\n+\n+\nreturn")
+    # intcblock 1, pushint 7, intc_0, intc_0
+    assert program == bytes([0x05, 0x20, 0x01, 0x01, 0x81, 0x07, 0x22, 0x22, 0x08, 0x08, 0x43])
+
+
+def test_constants_not_optimized_before_version_4():
+    program = teal_assembler.assemble("#pragma version 3\nint 7\nint 1\n+\nreturn")
+    assert program == bytes([0x03, 0x20, 0x02, 0x07, 0x01, 0x22, 0x23, 0x08, 0x43])
+
+
+def test_backward_branch_requires_version_4():
+    with pytest.raises(teal_assembler.TealAssemblyError):
+        teal_assembler.assemble("#pragma version 3\nloop:\nint 1\nbnz loop")
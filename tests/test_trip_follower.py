@@ -0,0 +1,42 @@
+# checks of the trip follower against the mock algod
+
+import time
+from datetime import datetime, timedelta
+
+from algosdk import account
+
+from models.Trip import Trip
+from models.TripFollower import TripEvent, TripFollower
+
+
+def test_block_failing_to_apply_is_skipped(algod_client, algod_server):
+    follower = TripFollower(algod_client)
+    events = []
+    follower.subscribe(events.append)
+    process_block = follower.process_block
+    first_round = algod_server.ledger.round + 1
+
+    def fail_first_round(header):
+        if header["rnd"] == first_round:
+            raise ValueError("invalid state delta")
+        process_block(header)
+
+    follower.process_block = fail_first_round
+    follower.start(first_round)
+    try:
+        creator_private_key, _ = account.generate_account()
+        start_date = (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M')
+        end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M')
+        trip = Trip(algod_client)
+        trip.create_app(creator_private_key, "creator", "departure", "arrival", start_date, end_date, 5000, 2)
+        trip.create_app(creator_private_key, "creator", "departure", "arrival", start_date, end_date, 5000, 2)
+
+        deadline = time.monotonic() + 10
+        while follower.last_round < algod_server.ledger.round and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        algod_server.ledger.next_round()
+        follower.stop()
+
+    assert follower.skipped_rounds == [first_round]
+    assert [(event.app_id, event.kind) for event in events] == [(trip.app_id, TripEvent.Kind.created)]
@@ -0,0 +1,126 @@
+# logging of the carsharing modules, built on the standard logging package
+# messages are formatted only when their level is enabled, levels can be set per module:
+# Constants.log_levels = {"models.ApplicationManager": "DEBUG"} shows the transactions of the ApplicationManager only
+# the CARSHARING_LOG_LEVEL environment variable overrides Constants.log_level
+
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from threading import Lock
+
+from constants import Constants
+
+root_name = "carsharing"
+
+colors = {
+    'red': "\033[91m",
+    'green': "\033[92m",
+    'yellow': "\033[93m",
+    'blue': "\033[94m",
+}
+
+level_colors = {
+    logging.CRITICAL: 'red',
+    logging.ERROR: 'red',
+    logging.WARNING: 'yellow',
+    logging.INFO: 'green',
+}
+
+# attributes of every LogRecord, the other ones are the fields given with extra=
+_record_attributes = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "color"}
+
+configured = False
+configure_lock = Lock()
+# modules with a level set by the last configuration
+configured_modules = []
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    Colored messages as printed by utils.console_log, the color is given with extra={'color': ...}
+    or derived from the level
+    """
+
+    def format(self, record: logging.LogRecord):
+        message = super().format(record)
+        color = colors.get(getattr(record, "color", None) or level_colors.get(record.levelno))
+        if color is None:
+            return message
+        return "{}{}\033[0m".format(color, message)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with the fields given with extra=
+    """
+
+    def format(self, record: logging.LogRecord):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name[len(root_name) + 1:],
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _record_attributes:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyJson:
+    """
+    Argument of a log call dumped to JSON only if the message is emitted
+    """
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value, indent: int = 4):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self):
+        return json.dumps(self.value, indent=self.indent, sort_keys=True, default=str)
+
+
+def configure(level: str = None, module_levels: dict = None, log_format: str = None, stream=None):
+    """
+    Configure the carsharing loggers, replacing the previous configuration
+    :param level: level of all the modules, defaults to CARSHARING_LOG_LEVEL or Constants.log_level
+    :param module_levels: module -> level, defaults to Constants.log_levels
+    :param log_format: "console" or "json", defaults to Constants.log_format
+    :param stream: defaults to stdout
+    """
+    global configured
+    with configure_lock:
+        root = logging.getLogger(root_name)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
+        log_format = log_format if log_format is not None else Constants.log_format
+        handler.setFormatter(JsonFormatter() if log_format == "json" else ConsoleFormatter())
+        root.addHandler(handler)
+        root.propagate = False
+        root.setLevel((level or os.environ.get("CARSHARING_LOG_LEVEL") or Constants.log_level).upper())
+
+        for module in configured_modules:
+            logging.getLogger("{}.{}".format(root_name, module)).setLevel(logging.NOTSET)
+        configured_modules.clear()
+        for module, module_level in (module_levels if module_levels is not None else Constants.log_levels).items():
+            logging.getLogger("{}.{}".format(root_name, module)).setLevel(module_level.upper())
+            configured_modules.append(module)
+        configured = True
+
+
+def get_logger(name: str):
+    """
+    Get the logger of a module, the loggers are configured from Constants on first use
+    :param name: module name, usually __name__
+    :return:
+    """
+    if not configured:
+        configure()
+    return logging.getLogger("{}.{}".format(root_name, name))
@@ -0,0 +1,851 @@
+# local mock of the algod and indexer REST APIs
+# keeps an in-memory ledger and emulates the CarSharingContract application calls,
+# so the Trip lifecycle can be driven without an Algorand node
+import base64
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import msgpack
+from algosdk import encoding, logic
+from algosdk.future import transaction
+
+from helpers import teal_assembler
+
+
+class MockTransactionError(Exception):
+    pass
+
+
+class MockLedger:
+    class Variables:
+        genesis_id = "mock-v1"
+        genesis_hash = base64.b64encode(hashlib.sha256(b"mock-algod").digest()).decode()
+        initial_balance = 100000000000
+        first_app_id = 1000
+        max_txn_life = 1000
+
+    class AppState:
+        not_initialized = 0
+        initialized = 1
+        ready = 2
+        finished = 3
+
+    def __init__(self, round_time: float = 0.0):
+        self.round_time = round_time
+        self.round = 1
+        self.round_timestamp = time.time()
+        self.next_app_id = self.Variables.first_app_id
+        # app_id -> {creator, approval-program, clear-state-program, global, created-tx}
+        self.apps = {}
+        # app_id -> app, the deleted applications are still returned by the indexer
+        self.deleted_apps = {}
+        # address -> {amount, local: {app_id: {key: value}}}
+        self.accounts = {}
+        # tx_id -> {stxn, confirmed-round, application-index}
+        self.transactions = {}
+        # transactions waiting for the next round
+        self.pool = []
+        # round -> list of block transactions
+        self.blocks = {1: []}
+        self.condition = threading.Condition()
+
+    def get_account(self, address: str):
+        """
+        Get an account, creating it with the initial balance if not existing
+        :param address:
+        :return:
+        """
+        if address not in self.accounts:
+            self.accounts[address] = {'amount': self.Variables.initial_balance, 'local': {}}
+        return self.accounts[address]
+
+    def next_round(self):
+        """
+        Produce a new block with the transactions in the pool
+        """
+        with self.condition:
+            self.round += 1
+            self.round_timestamp = time.time()
+            block_txns = []
+            for tx_id in self.pool:
+                entry = self.transactions[tx_id]
+                entry['confirmed-round'] = self.round
+                block_txns.append(entry)
+            self.pool = []
+            self.blocks[self.round] = block_txns
+            self.condition.notify_all()
+
+    def wait_for_round_after(self, round_number: int, timeout: float = 60.0):
+        """
+        Wait until a round greater than the given one is produced
+        :param round_number:
+        :param timeout:
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.round <= round_number:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+    def submit(self, raw: bytes):
+        """
+        Evaluate and add to the pool a group of signed transactions
+        :param raw: concatenated msgpack signed transactions
+        :return: id of the first transaction
+        """
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(raw)
+        stxns = list(unpacker)
+        if not stxns:
+            raise MockTransactionError("empty transaction group")
+
+        with self.condition:
+            tx_ids = []
+            for stxn in stxns:
+                tx_id = transaction.Transaction.undictify(dict(stxn["txn"])).get_txid()
+                if tx_id in self.transactions:
+                    raise MockTransactionError("transaction already in ledger: {}".format(tx_id))
+                txn = stxn["txn"]
+                if not txn.get("fv", 0) <= self.round <= txn.get("lv", 0):
+                    raise MockTransactionError("txn dead: round {} outside of {}--{}".format(
+                        self.round, txn.get("fv", 0), txn.get("lv", 0)))
+                tx_ids.append(tx_id)
+
+            # evaluate the whole group on a copy of the state, atomic transfer semantics
+            snapshot = copy.deepcopy((self.apps, self.deleted_apps, self.accounts, self.next_app_id))
+            try:
+                apply_data = [self._apply(stxn["txn"], [s["txn"] for s in stxns]) for stxn in stxns]
+            except MockTransactionError:
+                self.apps, self.deleted_apps, self.accounts, self.next_app_id = snapshot
+                raise
+
+            for tx_id, stxn, data in zip(tx_ids, stxns, apply_data):
+                self.transactions[tx_id] = {'tx_id': tx_id, 'stxn': stxn, 'confirmed-round': 0, **data}
+                self.pool.append(tx_id)
+                if 'application-index' in data:
+                    self.apps[data['application-index']]['created-tx'] = tx_id
+
+        if self.round_time <= 0:
+            # dev mode: every submission produces a block
+            self.next_round()
+        return tx_ids[0]
+
+    def _apply(self, txn: dict, group: [dict]):
+        """
+        Apply a transaction to the ledger
+        :param txn:
+        :param group:
+        :return: apply data of the transaction
+        """
+        sender = encoding.encode_address(txn["snd"])
+        self.get_account(sender)['amount'] -= txn.get("fee", 0)
+
+        if txn["type"] == "pay":
+            receiver = encoding.encode_address(txn["rcv"]) if "rcv" in txn else None
+            amount = txn.get("amt", 0)
+            if receiver is not None:
+                self.get_account(sender)['amount'] -= amount
+                self.get_account(receiver)['amount'] += amount
+            if "close" in txn:
+                close_to = encoding.encode_address(txn["close"])
+                self.get_account(close_to)['amount'] += self.get_account(sender)['amount']
+                self.get_account(sender)['amount'] = 0
+            return {}
+
+        if txn["type"] == "appl":
+            app_id = txn.get("apid", 0)
+            global_before = dict(self.apps[app_id]['global']) if app_id in self.apps else {}
+            local_before = dict(self.get_account(sender)['local'].get(app_id, {}))
+            data = self._apply_app_call(sender, txn, group)
+
+            # eval delta of the call, as stored in blocks
+            app_id = data.get('application-index', app_id)
+            eval_delta = {}
+            if app_id in self.apps:
+                global_delta = self.state_delta(global_before, self.apps[app_id]['global'])
+                if global_delta:
+                    eval_delta['gd'] = global_delta
+            local = self.get_account(sender)['local']
+            if app_id in local:
+                local_delta = self.state_delta(local_before, local[app_id])
+                if local_delta:
+                    eval_delta['ld'] = {0: local_delta}
+            if eval_delta:
+                data['eval-delta'] = eval_delta
+            return data
+
+        raise MockTransactionError("unsupported transaction type: {}".format(txn["type"]))
+
+    def _apply_app_call(self, sender: str, txn: dict, group: [dict]):
+        """
+        Apply an application call, emulating the CarSharingContract approval program
+        :param sender:
+        :param txn:
+        :param group:
+        :return:
+        """
+        app_id = txn.get("apid", 0)
+        on_complete = txn.get("apan", 0)
+        args = txn.get("apaa", [])
+
+        def check(condition, message):
+            if not condition:
+                raise MockTransactionError("logic eval error: assert failed: {}".format(message))
+
+        if app_id == 0:
+            check(len(args) == 9, "invalid number of arguments")
+            app_id = self.next_app_id
+            self.next_app_id += 1
+            seats = int.from_bytes(args[8], "big")
+            self.apps[app_id] = {
+                'creator': sender,
+                'approval-program': txn.get("apap", b""),
+                'clear-state-program': txn.get("apsu", b""),
+                'global': {
+                    'creator': txn["snd"],
+                    'creator_name': args[0],
+                    'departure_address': args[1],
+                    'arrival_address': args[2],
+                    'departure_date': args[3],
+                    'departure_date_round': int.from_bytes(args[4], "big"),
+                    'arrival_date': args[5],
+                    'arrival_date_round': int.from_bytes(args[6], "big"),
+                    'trip_cost': int.from_bytes(args[7], "big"),
+                    'max_participants': seats,
+                    'available_seats': seats,
+                    'trip_state': self.AppState.not_initialized,
+                },
+            }
+            state = self.apps[app_id]['global']
+            check(self.round <= state['departure_date_round'], "departure round already passed")
+            check(state['departure_date_round'] < state['arrival_date_round'], "invalid dates")
+            check(seats > 0, "no seats")
+            return {'application-index': app_id}
+
+        if on_complete == transaction.OnComplete.ClearStateOC:
+            # clear state always succeeds, even for deleted applications
+            self.get_account(sender)['local'].pop(app_id, None)
+            return {}
+
+        check(app_id in self.apps, "application does not exist")
+        app = self.apps[app_id]
+        state = app['global']
+        is_creator = sender == app['creator']
+        no_participants = state['available_seats'] == state['max_participants']
+        local = self.get_account(sender)['local']
+
+        if on_complete == transaction.OnComplete.OptInOC:
+            # checked by the ledger before the approval program runs
+            if app_id in local:
+                raise MockTransactionError("account {} has already opted in to app {}".format(sender, app_id))
+            check(state['trip_state'] == self.AppState.ready, "trip not ready")
+            check(not is_creator, "creator cannot opt in")
+            check(self.round <= state['departure_date_round'], "trip started")
+            check(state['available_seats'] > 0, "no available seats")
+            local[app_id] = {}
+        elif on_complete == transaction.OnComplete.UpdateApplicationOC:
+            check(is_creator and no_participants and state['trip_state'] != self.AppState.finished,
+                  "cannot update")
+            app['approval-program'] = txn.get("apap", b"")
+            app['clear-state-program'] = txn.get("apsu", b"")
+        elif on_complete == transaction.OnComplete.DeleteApplicationOC:
+            check(is_creator and (no_participants or state['trip_state'] == self.AppState.finished),
+                  "cannot delete")
+            self.deleted_apps[app_id] = self.apps.pop(app_id)
+        elif on_complete == transaction.OnComplete.NoOpOC:
+            self._apply_method(sender, is_creator, args, app_id, state, local, group, check)
+        else:
+            raise MockTransactionError("unsupported on completion: {}".format(on_complete))
+        return {}
+
+    def _apply_method(self, sender, is_creator, args, app_id, state, local, group, check):
+        """
+        Apply a NoOp application call
+        """
+        check(len(args) > 0, "missing method")
+        method = args[0]
+        payment = group[1] if len(group) == 2 and group[1]["type"] == "pay" else None
+        escrow_address = state.get('escrow_address')
+
+        if method == b"initializeEscrow":
+            check(state['trip_state'] == self.AppState.not_initialized, "trip already initialized")
+            check(len(group) == 1 and is_creator, "invalid escrow initialization")
+            state['escrow_address'] = args[1]
+            state['trip_state'] = self.AppState.initialized
+        elif method == b"fundEscrow":
+            check(state['trip_state'] == self.AppState.initialized and is_creator, "cannot fund escrow")
+            check(payment is not None and payment.get("rcv") == escrow_address, "invalid payment")
+            state['trip_state'] = self.AppState.ready
+        elif method == b"participateTrip":
+            check(state['trip_state'] == self.AppState.ready and not is_creator, "cannot participate")
+            check(state['available_seats'] > 0, "no available seats")
+            check(self.round <= state['departure_date_round'], "trip started")
+            check(app_id in local, "account not opted in")
+            check(local[app_id].get('is_participating', 0) == 0, "already participating")
+            check(payment is not None and payment.get("rcv") == escrow_address
+                  and payment.get("amt", 0) == state['trip_cost'], "invalid payment")
+            state['available_seats'] -= 1
+            local[app_id]['is_participating'] = 1
+        elif method == b"cancelParticipation":
+            check(state['trip_state'] == self.AppState.ready and not is_creator, "cannot cancel")
+            check(self.round <= state['departure_date_round'], "trip started")
+            check(app_id in local and local[app_id].get('is_participating', 0) == 1, "not participating")
+            check(payment is not None and payment.get("snd") == escrow_address
+                  and payment.get("amt", 0) == state['trip_cost'], "invalid refund")
+            state['available_seats'] += 1
+            local[app_id]['is_participating'] = 0
+        elif method == b"startTrip":
+            check(state['trip_state'] == self.AppState.ready and is_creator, "cannot start")
+            check(self.round >= state['departure_date_round'], "trip not started yet")
+            check(payment is not None and payment.get("snd") == escrow_address, "invalid payment")
+            state['trip_state'] = self.AppState.finished
+        else:
+            check(False, "unknown method")
+
+    @staticmethod
+    def state_delta(before: dict, after: dict):
+        """
+        Compute a state delta in the block format: action 1 sets bytes, 2 sets an uint, 3 deletes
+        :param before:
+        :param after:
+        :return:
+        """
+        delta = {}
+        for key, value in after.items():
+            if before.get(key) != value:
+                if isinstance(value, int):
+                    delta[key.encode()] = {'at': 2, 'ui': value}
+                else:
+                    delta[key.encode()] = {'at': 1, 'bs': value}
+        for key in before.keys() - after.keys():
+            delta[key.encode()] = {'at': 3}
+        return delta
+
+    # --- REST views ---
+
+    @staticmethod
+    def format_state(state: dict):
+        """
+        Format a state dict as algod key-value list
+        :param state:
+        :return:
+        """
+        formatted = []
+        for key, value in state.items():
+            if isinstance(value, int):
+                formatted_value = {'type': 2, 'uint': value, 'bytes': ""}
+            else:
+                formatted_value = {'type': 1, 'uint': 0, 'bytes': base64.b64encode(value).decode()}
+            formatted.append({'key': base64.b64encode(key.encode()).decode(), 'value': formatted_value})
+        return formatted
+
+    def format_application(self, app_id: int, app: dict):
+        return {
+            'id': app_id,
+            'params': {
+                'creator': app['creator'],
+                'approval-program': base64.b64encode(app['approval-program']).decode(),
+                'clear-state-program': base64.b64encode(app['clear-state-program']).decode(),
+                'global-state': self.format_state(app['global']),
+                'global-state-schema': {'num-uint': 6, 'num-byte-slice': 7},
+                'local-state-schema': {'num-uint': 1, 'num-byte-slice': 0},
+            },
+        }
+
+    def application_info(self, app_id: int):
+        with self.condition:
+            if app_id not in self.apps:
+                return None
+            return self.format_application(app_id, self.apps[app_id])
+
+    def local_state_info(self, app_id: int, local: dict):
+        info = {'id': app_id, 'schema': {'num-uint': 1, 'num-byte-slice': 0}}
+        if local:
+            info['key-value'] = self.format_state(local)
+        return info
+
+    def account_info(self, address: str):
+        with self.condition:
+            account = self.get_account(address)
+            return {
+                'address': address,
+                'amount': account['amount'],
+                'round': self.round,
+                'apps-local-state': [self.local_state_info(app_id, local)
+                                     for app_id, local in account['local'].items()],
+                'created-apps': [self.application_info(app_id) for app_id, app in self.apps.items()
+                                 if app['creator'] == address],
+            }
+
+    def account_application_info(self, address: str, app_id: int):
+        with self.condition:
+            account = self.get_account(address)
+            if app_id not in account['local'] and not (app_id in self.apps
+                                                       and self.apps[app_id]['creator'] == address):
+                return None
+            info = {'round': self.round}
+            if app_id in account['local']:
+                info['app-local-state'] = self.local_state_info(app_id, account['local'][app_id])
+            if app_id in self.apps and self.apps[app_id]['creator'] == address:
+                info['created-app'] = self.application_info(app_id)['params']
+            return info
+
+    def pending_transaction_info(self, tx_id: str):
+        with self.condition:
+            if tx_id not in self.transactions:
+                return None
+            entry = self.transactions[tx_id]
+            info = {
+                'pool-error': "",
+                'txn': json.loads(json.dumps(entry['stxn'], default=_encode_json)),
+            }
+            if entry['confirmed-round']:
+                info['confirmed-round'] = entry['confirmed-round']
+            if 'application-index' in entry:
+                info['application-index'] = entry['application-index']
+            return info
+
+    def block(self, round_number: int):
+        """
+        Get a block in msgpack format, transactions are stored as in algod blocks (SignedTxnInBlock)
+        :param round_number:
+        :return:
+        """
+        with self.condition:
+            if round_number not in self.blocks:
+                return None
+            txns = []
+            for entry in self.blocks[round_number]:
+                stxn = dict(entry['stxn'])
+                txn = dict(stxn['txn'])
+                txn.pop("gh", None)
+                has_genesis_id = txn.pop("gen", None) is not None
+                stxn['txn'] = txn
+                if has_genesis_id:
+                    stxn['hgi'] = True
+                if 'application-index' in entry:
+                    stxn['apid'] = entry['application-index']
+                if 'eval-delta' in entry:
+                    stxn['dt'] = entry['eval-delta']
+                txns.append(stxn)
+            header = {
+                'rnd': round_number,
+                'gen': self.Variables.genesis_id,
+                'gh': base64.b64decode(self.Variables.genesis_hash),
+            }
+            if txns:
+                header['txns'] = txns
+            return msgpack.packb({'block': header}, use_bin_type=True)
+
+
+    # --- indexer views ---
+
+    def indexer_application(self, app_id: int, include_all: bool = False):
+        """
+        Get an application as returned by the indexer
+        :param app_id:
+        :param include_all: include the deleted applications
+        :return:
+        """
+        with self.condition:
+            app = self.apps.get(app_id)
+            deleted = app is None
+            if deleted:
+                app = self.deleted_apps.get(app_id) if include_all else None
+            if app is None:
+                return None
+            application = self.format_application(app_id, app)
+            application['deleted'] = deleted
+            created = self.transactions.get(app.get('created-tx'))
+            if created is not None and created['confirmed-round']:
+                application['created-at-round'] = created['confirmed-round']
+            return application
+
+    def search_transactions(self, note_prefix: bytes = b"", tx_type: str = None, min_round: int = None,
+                            max_round: int = None, limit: int = 1000, offset: int = 0):
+        """
+        Search the confirmed transactions as the indexer, the next token is the offset of the next page
+        :return: list of indexer transactions, next offset or None on the last page
+        """
+        with self.condition:
+            matches = []
+            for round_number in sorted(self.blocks):
+                if min_round is not None and round_number < min_round:
+                    continue
+                if max_round is not None and round_number > max_round:
+                    break
+                for entry in self.blocks[round_number]:
+                    txn = entry['stxn']['txn']
+                    if tx_type is not None and txn.get("type") != tx_type:
+                        continue
+                    if not txn.get("note", b"").startswith(note_prefix):
+                        continue
+                    matches.append(entry)
+
+            page = []
+            for entry in matches[offset:offset + limit]:
+                txn = entry['stxn']['txn']
+                indexed = {
+                    'id': entry['tx_id'],
+                    'confirmed-round': entry['confirmed-round'],
+                    'sender': encoding.encode_address(txn["snd"]),
+                    'tx-type': txn["type"],
+                    'note': base64.b64encode(txn.get("note", b"")).decode(),
+                }
+                if 'application-index' in entry:
+                    indexed['created-application-index'] = entry['application-index']
+                page.append(indexed)
+            next_offset = offset + limit if offset + limit < len(matches) else None
+            return page, next_offset
+
+
+def _encode_json(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value)))
+
+
+class MockRequestStats:
+    """
+    Counters of the requests served by a mock server, bodies only, HTTP headers are not counted
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            # CPU time of the threads serving the requests and producing the rounds
+            self.cpu_seconds = 0.0
+            # route handler -> number of requests
+            self.routes = {}
+
+    def on_request(self, route: str, size: int):
+        with self.lock:
+            self.requests += 1
+            self.bytes_received += size
+            self.routes[route] = self.routes.get(route, 0) + 1
+
+    def on_response(self, size: int):
+        with self.lock:
+            self.bytes_sent += size
+
+    def on_cpu(self, seconds: float):
+        with self.lock:
+            self.cpu_seconds += seconds
+
+    def snapshot(self):
+        """
+        Get a copy of the counters
+        :return:
+        """
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'bytes_received': self.bytes_received,
+                'bytes_sent': self.bytes_sent,
+                'cpu_seconds': self.cpu_seconds,
+                'routes': dict(self.routes),
+            }
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # (method, path pattern, handler method name), filled by the subclasses
+    routes = []
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def ledger(self) -> MockLedger:
+        return self.server.ledger
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method: str):
+        path, _, query = self.path.partition("?")
+        self.query = dict(item.split("=", 1) for item in query.split("&") if "=" in item)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                self.server.on_request(method, handler, len(self.body))
+                try:
+                    getattr(self, handler)(*match.groups())
+                except MockTransactionError as e:
+                    self.send_json({'message': "TransactionPool.Remember: {}".format(e)}, 400)
+                return
+        self.server.on_request(method, path, len(self.body))
+        self.send_json({'message': "Not Found"}, 404)
+
+    def send_body(self, body: bytes, status: int = 200, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.on_response(len(body))
+
+    def send_json(self, obj, status: int = 200):
+        self.send_body(json.dumps(obj).encode(), status)
+
+
+class _MockAlgodHandler(_MockHandler):
+    routes = [
+        ("GET", r"/health", "get_health"),
+        ("GET", r"/v2/status", "get_status"),
+        ("GET", r"/v2/status/wait-for-block-after/(\d+)", "get_status_after_block"),
+        ("GET", r"/v2/transactions/params", "get_params"),
+        ("POST", r"/v2/teal/compile", "post_compile"),
+        ("POST", r"/v2/transactions", "post_transactions"),
+        ("GET", r"/v2/transactions/pending/(\w+)", "get_pending_transaction"),
+        ("GET", r"/v2/applications/(\d+)", "get_application"),
+        ("GET", r"/v2/accounts/(\w+)/applications/(\d+)", "get_account_application"),
+        ("GET", r"/v2/accounts/(\w+)", "get_account"),
+        ("GET", r"/v2/blocks/(\d+)", "get_block"),
+    ]
+
+    def get_health(self):
+        self.send_json(None)
+
+    def get_status(self):
+        self.send_json({
+            'last-round': self.ledger.round,
+            'time-since-last-round': int((time.time() - self.ledger.round_timestamp) * 1e9),
+            'catchup-time': 0,
+            'last-version': "future",
+        })
+
+    def get_status_after_block(self, round_number):
+        self.ledger.wait_for_round_after(int(round_number))
+        self.get_status()
+
+    def get_params(self):
+        self.send_json({
+            'consensus-version': "future",
+            'fee': 0,
+            'genesis-hash': self.ledger.Variables.genesis_hash,
+            'genesis-id': self.ledger.Variables.genesis_id,
+            'last-round': self.ledger.round,
+            'min-fee': 1000,
+        })
+
+    def post_compile(self):
+        try:
+            program = teal_assembler.assemble(self.body.decode())
+        except teal_assembler.TealAssemblyError as e:
+            self.send_json({'message': str(e)}, 400)
+            return
+        self.send_json({'hash': logic.address(program), 'result': base64.b64encode(program).decode()})
+
+    def post_transactions(self):
+        tx_id = self.ledger.submit(self.body)
+        self.send_json({'txId': tx_id})
+
+    def get_pending_transaction(self, tx_id):
+        info = self.ledger.pending_transaction_info(tx_id)
+        if info is None:
+            self.send_json({'message': "txn does not exist"}, 404)
+        else:
+            self.send_json(info)
+
+    def get_application(self, app_id):
+        info = self.ledger.application_info(int(app_id))
+        if info is None:
+            self.send_json({'message': "application does not exist"}, 404)
+        else:
+            self.send_json(info)
+
+    def get_account(self, address):
+        self.send_json(self.ledger.account_info(address))
+
+    def get_account_application(self, address, app_id):
+        info = self.ledger.account_application_info(address, int(app_id))
+        if info is None:
+            self.send_json({'message': "account application info not found"}, 404)
+        else:
+            self.send_json(info)
+
+    def get_block(self, round_number):
+        block = self.ledger.block(int(round_number))
+        if block is None:
+            self.send_json({'message': "ledger does not have entry {}".format(round_number)}, 404)
+        elif self.query.get("format") == "msgpack":
+            self.send_body(block, content_type="application/msgpack")
+        else:
+            self.send_json({'message': "only msgpack blocks are supported"}, 400)
+
+
+class _MockIndexerHandler(_MockHandler):
+    routes = [
+        ("GET", r"/health", "get_health"),
+        ("GET", r"/v2/transactions", "get_transactions"),
+        ("GET", r"/v2/applications/(\d+)", "get_application"),
+        ("GET", r"/v2/applications", "get_applications"),
+    ]
+
+    def get_int(self, name: str, default: int = None):
+        return int(self.query[name]) if name in self.query else default
+
+    def get_health(self):
+        self.send_json({
+            'db-available': True,
+            'is-migrating': False,
+            'message': str(self.ledger.round),
+            'round': self.ledger.round,
+            'version': "mock",
+        })
+
+    def get_transactions(self):
+        note_prefix = base64.b64decode(unquote(self.query.get("note-prefix", "")))
+        # the indexer caps the requested limit, the page can be shorter than asked while more follow
+        limit = min(self.get_int("limit", 1000), self.server.max_transactions_limit)
+        transactions, next_offset = self.ledger.search_transactions(note_prefix=note_prefix,
+                                                                    tx_type=self.query.get("tx-type"),
+                                                                    min_round=self.get_int("min-round"),
+                                                                    max_round=self.get_int("max-round"),
+                                                                    limit=limit,
+                                                                    offset=self.get_int("next", 0))
+        response = {'current-round': self.ledger.round, 'transactions': transactions}
+        if next_offset is not None:
+            response['next-token'] = str(next_offset)
+        self.send_json(response)
+
+    def get_application(self, app_id):
+        application = self.ledger.indexer_application(int(app_id), self.query.get("include-all") == "True")
+        if application is None:
+            self.send_json({'message': "no application found for application-id: {}".format(app_id)}, 404)
+        else:
+            self.send_json({'application': application, 'current-round': self.ledger.round})
+
+    def get_applications(self):
+        applications = []
+        app_id = self.get_int("application-id")
+        if app_id is not None:
+            application = self.ledger.indexer_application(app_id, self.query.get("include-all") == "True")
+            if application is not None:
+                applications.append(application)
+        self.send_json({'applications': applications, 'current-round': self.ledger.round})
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, handler, ledger: MockLedger, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        :param handler:
+        :param ledger:
+        :param host:
+        :param port:
+        :param latency: seconds added before serving each request
+        """
+        super().__init__((host, port), handler)
+        self.ledger = ledger
+        self.latency = latency
+        self.stats = MockRequestStats()
+        self.threads = []
+        self.running = False
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def on_request(self, method: str, route: str, size: int):
+        """
+        Hook called on every request
+        :param method:
+        :param route: name of the handler method, the path if no route matches
+        :param size: body size
+        """
+        self.stats.on_request(route, size)
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def on_response(self, size: int):
+        """
+        Hook called on every response
+        """
+        self.stats.on_response(size)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            # a thread is started for each connection, its CPU time is the cost of serving it
+            self.stats.on_cpu(time.thread_time())
+
+    def start(self):
+        """
+        Start serving requests in a background thread
+        :return:
+        """
+        self.running = True
+        self.threads.append(threading.Thread(target=self.serve_forever, daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the server
+        """
+        self.running = False
+        self.shutdown()
+        self.server_close()
+
+
+class MockAlgodServer(_MockServer):
+    token = "a" * 64
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, round_time: float = 0.0, latency: float = 0.0):
+        super().__init__(_MockAlgodHandler, MockLedger(round_time=round_time), host, port, latency)
+
+    def start(self):
+        """
+        Start serving requests and producing rounds in background threads
+        :return:
+        """
+        if self.ledger.round_time > 0:
+            self.threads.append(threading.Thread(target=self._produce_rounds, daemon=True))
+        return super().start()
+
+    def _produce_rounds(self):
+        while self.running:
+            time.sleep(self.ledger.round_time)
+            cpu_start = time.thread_time()
+            self.ledger.next_round()
+            self.stats.on_cpu(time.thread_time() - cpu_start)
+
+
+class MockIndexerServer(_MockServer):
+    token = ""
+
+    def __init__(self, ledger: MockLedger, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 max_transactions_limit: int = 10000):
+        """
+        :param ledger: ledger of the MockAlgodServer to index
+        :param max_transactions_limit: max number of transactions per page, as the indexer configuration
+        """
+        super().__init__(_MockIndexerHandler, ledger, host, port, latency)
+        self.max_transactions_limit = max_transactions_limit
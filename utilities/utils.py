@@ -1,6 +1,3 @@
-import numpy as np
-
-
 def console_log(message, color='red', newline=False):
     """
     Print a colored console message
@@ -24,6 +21,8 @@ def console_log(message, color='red', newline=False):
 
 
 def toArray(obj):
+    # numpy is only needed to print states as arrays, import it on first use
+    import numpy as np
     data = list(obj.items())
     return np.array(data)
 
@@ -32,8 +31,7 @@ def parse_response(response):
     """
     Parse a response into json
     :param response:
+    :return: the formatted json
     """
     import json
-    res = json.dumps(response, indent=2, sort_keys=True)
-    print(res)
-    return res
+    return json.dumps(response, indent=2, sort_keys=True)